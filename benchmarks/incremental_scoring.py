@@ -0,0 +1,113 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+"""
+Compares scoring streamed completions once each stream has closed with scoring them incrementally while their
+tokens arrive: the time from the last stream closing to having every reward, and the total scoring CPU time.
+
+Usage:
+    python benchmarks/incremental_scoring.py --streams 50 --sentences 40 --token_ms 2
+"""
+
+import time
+import random
+import asyncio
+import argparse
+
+from prompting.validator.pipeline import default_pipeline, score_stream
+
+SENTENCES = [
+    "Why did the computer go to the doctor?",
+    "Because it had a virus!",
+    "I love how friendly and helpful this answer is.",
+    "That was a terrible joke, honestly.",
+    "The weather is sunny and warm outside.",
+    "It is not a very good idea, but it works.",
+]
+
+
+async def tokens(text: str, token_ms: float):
+    """Yields `text` word by word like StreamPrompting.process_streaming_response, every word taking `token_ms`."""
+    for word in text.split(" "):
+        await asyncio.sleep(random.uniform(0, 2 * token_ms) / 1000)
+        yield [word + " "]
+
+
+async def collect(text: str, token_ms: float) -> str:
+    completion = ""
+    async for chunk in tokens(text, token_ms):
+        completion += "".join(chunk)
+    return completion
+
+
+async def after_close(pipeline, texts, token_ms):
+    completions = await asyncio.gather(
+        *[collect(text, token_ms) for text in texts]
+    )
+    closed = time.perf_counter()
+    rewards = pipeline.score(0, completions)
+    return rewards, closed
+
+
+async def incremental(pipeline, texts, token_ms):
+    closed = []
+
+    async def scored(text):
+        async def timed():
+            async for chunk in tokens(text, token_ms):
+                yield chunk
+            closed.append(time.perf_counter())
+
+        return await score_stream(pipeline, 0, timed())
+
+    rewards = await asyncio.gather(*[scored(text) for text in texts])
+    return rewards, max(closed)
+
+
+def bench(step, pipeline, texts, token_ms):
+    start_cpu = time.process_time()
+    rewards, closed = asyncio.run(step(pipeline, texts, token_ms))
+    return (
+        rewards,
+        time.perf_counter() - closed,
+        time.process_time() - start_cpu,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--sentences", type=int, default=40)
+    parser.add_argument("--token_ms", type=float, default=2)
+    args = parser.parse_args()
+
+    pipeline = default_pipeline(max_chars=10**9, sentiment="lexicon")
+    pipeline.warm_up()
+    texts = [
+        " ".join(random.choice(SENTENCES) for _ in range(args.sentences))
+        for _ in range(args.streams)
+    ]
+
+    results = {}
+    for name, step in (
+        ("after close", after_close),
+        ("incremental", incremental),
+    ):
+        results[name], tail, cpu = bench(step, pipeline, texts, args.token_ms)
+        print(
+            f"{name:<12}: {tail * 1000:7.1f}ms from last token to rewards, {cpu:5.2f}s cpu"
+        )
+    assert results["after close"] == results["incremental"]
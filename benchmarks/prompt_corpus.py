@@ -0,0 +1,112 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+"""
+Builds a synthetic prompt corpus and measures the offset index build, random access through the memory-mapped
+corpus, and the resident memory it adds, compared with loading every prompt into a list. Resident memory is split
+into anonymous memory, private to the process, and file-backed pages of the mapped corpus and index, which the kernel
+can drop whenever it needs the memory.
+
+Usage:
+    python benchmarks/prompt_corpus.py --prompts 2000000 --samples 100000
+"""
+
+import os
+import gc
+import json
+import time
+import random
+import argparse
+import tempfile
+
+from prompting.validator.corpus import PromptCorpus, PromptSource, build_index
+
+
+def rss_mb() -> dict:
+    """Current anonymous and file-backed resident memory of the process in MiB, from /proc on Linux."""
+    rss = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon:", "RssFile:")):
+                rss[line.split(":")[0][3:].lower()] = (
+                    int(line.split()[1]) / 1024
+                )
+    return rss
+
+
+def growth(baseline: dict) -> str:
+    return ", ".join(
+        f"{kind} rss +{value - baseline[kind]:.0f} MiB"
+        for kind, value in rss_mb().items()
+    )
+
+
+def write_corpus(path: str, prompts: int):
+    topics = [
+        "the moon",
+        "databases",
+        "cats",
+        "the ocean",
+        "compilers",
+        "jazz",
+        "volcanoes",
+    ]
+    with open(path, "w") as f:
+        for i in range(prompts):
+            prompt = f"Prompt {i}: tell me something surprising about {random.choice(topics)}."
+            f.write(
+                json.dumps({"prompt": prompt, "criteria": ["Be brief."]})
+                + "\n"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prompts", type=int, default=2_000_000)
+    parser.add_argument("--samples", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "prompts.jsonl")
+        write_corpus(path, args.prompts)
+        print(
+            f"corpus: {args.prompts} prompts, {os.path.getsize(path) / 2**20:.0f} MiB"
+        )
+
+        start = time.perf_counter()
+        build_index(path)
+        print(f"index build: {time.perf_counter() - start:6.2f}s")
+
+        baseline = rss_mb()
+        corpus = PromptCorpus(path)
+        source = PromptSource(corpus, prefetch=0, seed=0)
+        start = time.perf_counter()
+        for _ in range(args.samples):
+            source.sample()
+        seconds = time.perf_counter() - start
+        print(
+            f"mmap corpus: {seconds / args.samples * 1e6:6.1f}us per random prompt, {growth(baseline)}"
+        )
+        source.close()
+        gc.collect()
+
+        baseline = rss_mb()
+        start = time.perf_counter()
+        with open(path) as f:
+            prompts = [json.loads(line) for line in f]
+        print(
+            f"in-memory list: {time.perf_counter() - start:6.2f}s to load, {growth(baseline)}"
+        )
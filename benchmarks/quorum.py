@@ -0,0 +1,112 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""
+Measures forward step throughput of waiting for every miner versus completing on a quorum, against a MockDendrite
+with heavy-tailed injected latencies and a fixed share of dead axons.
+
+Usage:
+    python benchmarks/quorum.py --sample_size 50 --timeout 10 --steps 5
+"""
+
+import time
+import random
+import asyncio
+import argparse
+import bittensor as bt
+
+from prompting.mock import MockDendrite, MockMetagraph, MockSubtensor
+from prompting.protocol import Prompting
+from prompting.validator.quorum import query_quorum
+
+
+def heavy_tailed_latency(median: float, sigma: float, dead: set, seed: int):
+    """Log-normal latencies around `median`, the axons of the `dead` hotkeys never answer."""
+    rng = random.Random(seed)
+
+    def latency(axon: bt.AxonInfo) -> float:
+        if axon.hotkey in dead:
+            return float("inf")
+        return rng.lognormvariate(0, sigma) * median
+
+    return latency
+
+
+async def step(dendrite, axons, timeout, **quorum):
+    synapse = Prompting(character_info="", criteria=[], messages=[])
+    synapse.add_message("Tell me a joke.")
+    if not quorum:
+        await dendrite(
+            axons=axons, synapse=synapse, deserialize=True, timeout=timeout
+        )
+        return len(axons)
+    result = await query_quorum(
+        dendrite, axons, synapse, timeout=timeout, **quorum
+    )
+    result.cancel()
+    return len(result.arrived)
+
+
+async def bench(dendrite, axons, timeout, steps, **quorum):
+    start = time.perf_counter()
+    responses = 0
+    for _ in range(steps):
+        responses += await step(dendrite, axons, timeout, **quorum)
+    elapsed = time.perf_counter() - start
+    return steps / elapsed, responses / steps
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sample_size", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--median_latency", type=float, default=0.3)
+    parser.add_argument("--sigma", type=float, default=1.0)
+    parser.add_argument("--dead_fraction", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    subtensor = MockSubtensor(netuid=1, n=args.sample_size)
+    axons = MockMetagraph(subtensor=subtensor).axons[: args.sample_size]
+    # The same axons are dead in every mode, and every mode draws the same latencies.
+    dead = set(
+        random.Random(args.seed).sample(
+            [axon.hotkey for axon in axons],
+            round(args.dead_fraction * len(axons)),
+        )
+    )
+
+    modes = {
+        "all responses": {},
+        "quorum 0.9": {"quorum": 0.9},
+        "quorum 0.8": {"quorum": 0.8},
+        "soft deadline 2s": {"soft_deadline": 2.0},
+    }
+    for name, quorum in modes.items():
+        dendrite = MockDendrite(
+            bt.MockWallet(),
+            latency_fn=heavy_tailed_latency(
+                args.median_latency, args.sigma, dead, args.seed
+            ),
+        )
+        rate, responses = asyncio.run(
+            bench(dendrite, axons, args.timeout, args.steps, **quorum)
+        )
+        print(
+            f"{name:<17}: {rate:6.2f} steps/s, {responses:5.1f} responses/step scored in-step"
+        )
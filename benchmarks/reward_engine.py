@@ -0,0 +1,112 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""
+Reports reward throughput of the serial get_rewards path and of the process-pool reward engine on 1, 4 and all cores,
+and of the serial path behind the reward cache when miners return duplicate completions to the prompts the steps
+cycle through.
+
+Usage:
+    python benchmarks/reward_engine.py --sample_size 50 --steps 20 --distinct 10 --prompts 4
+"""
+
+import os
+import time
+import random
+import argparse
+
+from prompting.validator.reward_engine import RewardEngine
+
+SENTENCES = [
+    "Why did the computer go to the doctor?",
+    "Because it had a virus!",
+    "I love how friendly and helpful this answer is.",
+    "That was a terrible joke, honestly.",
+    "The weather is sunny and warm outside.",
+    "Nobody expected the result to be this good.",
+]
+
+
+def completion(sentences: int) -> str:
+    return " ".join(random.choice(SENTENCES) for _ in range(sentences))
+
+
+def bench(
+    engine: RewardEngine, completions, steps: int, prompts: int = 0
+) -> float:
+    """Responses scored per second, every step querying a new prompt or, with `prompts`, cycling through that many."""
+    engine.rewards(-1, completions)
+    start = time.perf_counter()
+    for step in range(steps):
+        engine.rewards(step % prompts if prompts else step, completions)
+    return steps * len(completions) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sample_size", type=int, default=50)
+    parser.add_argument("--sentences", type=int, default=8)
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--chunksize", type=int, default=0)
+    parser.add_argument(
+        "--distinct",
+        type=int,
+        default=10,
+        help="Distinct completions per step.",
+    )
+    parser.add_argument(
+        "--prompts",
+        type=int,
+        default=4,
+        help="Distinct prompts the cached steps cycle through.",
+    )
+    args = parser.parse_args()
+
+    completions = [completion(args.sentences) for _ in range(args.sample_size)]
+    print(
+        f"{args.sample_size} completions of {args.sentences} sentences per step"
+    )
+
+    serial = bench(RewardEngine(processes=0), completions, args.steps)
+    print(f"serial       : {serial:8.1f} responses/s")
+    for processes in sorted({1, 4, os.cpu_count()}):
+        engine = RewardEngine(processes=processes, chunksize=args.chunksize)
+        try:
+            engine.start()
+            throughput = bench(engine, completions, args.steps)
+        finally:
+            engine.shutdown()
+        print(
+            f"{processes:3d} processes: {throughput:8.1f} responses/s ({throughput / serial:.2f}x serial)"
+        )
+
+    # Rewards are cached per prompt, so duplicates hit within a step and across the steps sharing a prompt.
+    distinct = completions[: args.distinct]
+    duplicated = [random.choice(distinct) for _ in range(args.sample_size)]
+    cached = bench(
+        RewardEngine(processes=0, cache_size=4096),
+        duplicated,
+        args.steps,
+        args.prompts,
+    )
+    uncached = bench(
+        RewardEngine(processes=0), duplicated, args.steps, args.prompts
+    )
+    print(
+        f"{args.distinct} distinct completions over {args.prompts} prompts: {uncached:8.1f} responses/s uncached, "
+        f"{cached:8.1f} responses/s cached ({cached / uncached:.2f}x)"
+    )
@@ -0,0 +1,89 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""
+Offline simulation of queries-to-convergence for the miner sampling strategies.
+
+Every simulated miner has a hidden quality, and each query returns that quality plus noise, clipped to [0, 1]. The
+validator state is the same score engine and reward history the validator uses. A run has converged once the
+`top` highest scored uids match the `top` best miners to within `overlap`, and stayed so for `patience` steps, since
+the top of the ranking is where nearly all of the weight goes.
+
+Usage:
+    python benchmarks/sampler_simulation.py --n 1024 --sample_size 50 --seeds 5
+"""
+
+import torch
+import argparse
+
+from prompting.validator.history import RewardHistory
+from prompting.validator.sampling import SAMPLERS
+from prompting.validator.scores import ScoreEngine
+
+
+def simulate(name, args, seed):
+    torch.manual_seed(seed)
+    quality = torch.rand(args.n) ** 3
+    best = set(torch.topk(quality, args.top).indices.tolist())
+
+    engine = ScoreEngine(args.n, alpha=args.alpha)
+    history = RewardHistory(args.n, window=32)
+    sampler = SAMPLERS[name](exploration=args.exploration)
+    candidates = torch.arange(args.n)
+
+    streak = 0
+    for step in range(1, args.max_steps + 1):
+        uids = sampler.sample(candidates, args.sample_size, history)
+        rewards = (quality[uids] + args.noise * torch.randn(len(uids))).clamp(
+            0, 1
+        )
+        engine.update(rewards, uids)
+        history.push(uids, rewards)
+        # Every simulated query has finished, so strategies capping queries in flight can hand the uids out again.
+        sampler.release(uids)
+
+        found = set(torch.topk(engine.scores, args.top).indices.tolist())
+        streak = (
+            streak + 1 if len(found & best) >= args.overlap * args.top else 0
+        )
+        if streak >= args.patience:
+            return (step - args.patience + 1) * args.sample_size
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=1024)
+    parser.add_argument("--sample_size", type=int, default=50)
+    parser.add_argument("--top", type=int, default=32)
+    parser.add_argument("--overlap", type=float, default=0.9)
+    parser.add_argument("--patience", type=int, default=20)
+    parser.add_argument("--noise", type=float, default=0.1)
+    parser.add_argument("--alpha", type=float, default=0.1)
+    parser.add_argument("--exploration", type=float, default=0.1)
+    parser.add_argument("--max_steps", type=int, default=5000)
+    parser.add_argument("--seeds", type=int, default=5)
+    args = parser.parse_args()
+
+    for name in SAMPLERS:
+        queries = [simulate(name, args, seed) for seed in range(args.seeds)]
+        converged = [q for q in queries if q is not None]
+        mean = sum(converged) / len(converged) if converged else float("nan")
+        print(
+            f"{name:<11} converged {len(converged)}/{args.seeds} runs, "
+            f"mean {mean:10.0f} dendrite calls to convergence"
+        )
@@ -0,0 +1,74 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""
+Benchmarks a single score update at subnet scale.
+
+Usage:
+    python benchmarks/score_engine.py --n 4096 --sample_size 50
+"""
+
+import time
+import torch
+import argparse
+
+from prompting.validator.scores import ScoreEngine
+
+
+def scatter_update(scores, rewards, uids, alpha):
+    """The update_scores implementation the score engine replaced, for comparison."""
+    scattered = scores.scatter(0, uids, rewards)
+    return alpha * scattered + (1 - alpha) * scores
+
+
+def bench(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=4096)
+    parser.add_argument("--sample_size", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    uids = torch.randperm(args.n)[: args.sample_size]
+    duplicate_uids = torch.randint(0, args.n, (args.sample_size,))
+    rewards = torch.rand(args.sample_size)
+    scores = torch.zeros(args.n)
+
+    print(
+        f"scatter (baseline):      {bench(lambda: scatter_update(scores, rewards, uids, 0.1), args.iterations):8.1f} us/update"
+    )
+    for policy in ("mean", "last"):
+        for half_life in (0, 3600):
+            engine = ScoreEngine(
+                args.n, alpha=0.1, duplicate_policy=policy, half_life=half_life
+            )
+            unique = bench(
+                lambda: engine.update(rewards, uids), args.iterations
+            )
+            duplicate = bench(
+                lambda: engine.update(rewards, duplicate_uids), args.iterations
+            )
+            print(
+                f"engine policy={policy} half_life={half_life:<5}: "
+                f"{unique:8.1f} us/update unique uids, {duplicate:8.1f} us/update duplicate uids"
+            )
@@ -0,0 +1,100 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""
+Compares the TextBlob sentiment reward with the compiled lexicon scorer: import and warm-up time in a fresh
+interpreter, reward throughput on a batch of responses, and the largest reward difference between the two.
+
+Usage:
+    python benchmarks/sentiment.py --sample_size 50 --sentences 8 --steps 20
+"""
+
+import sys
+import time
+import random
+import argparse
+import subprocess
+
+from prompting.validator.reward import reward
+from prompting.validator.sentiment import LexiconSentiment
+
+SENTENCES = [
+    "Why did the computer go to the doctor?",
+    "Because it had a virus!",
+    "I love how friendly and helpful this answer is.",
+    "That was a terrible joke, honestly.",
+    "The weather is sunny and warm outside.",
+    "Nobody expected the result to be this good.",
+    "It is not a very interesting story :(",
+    "What a truly wonderful surprise!!",
+]
+
+STARTUP = {
+    "textblob": "from prompting.validator.reward import reward; reward(0, 'Warm up. Done!')",
+    "lexicon": "from prompting.validator.sentiment import LexiconSentiment; LexiconSentiment().score(['Warm up. Done!'])",
+}
+
+
+def startup_seconds(code: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True)
+    return time.perf_counter() - start
+
+
+def throughput(fn, responses, steps: int) -> float:
+    fn(responses)
+    start = time.perf_counter()
+    for _ in range(steps):
+        fn(responses)
+    return steps * len(responses) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sample_size", type=int, default=50)
+    parser.add_argument("--sentences", type=int, default=8)
+    parser.add_argument("--steps", type=int, default=20)
+    args = parser.parse_args()
+
+    responses = [
+        " ".join(random.choice(SENTENCES) for _ in range(args.sentences))
+        for _ in range(args.sample_size)
+    ]
+    scorer = LexiconSentiment()
+
+    baseline = startup_seconds("import prompting")
+    for name, code in STARTUP.items():
+        print(
+            f"{name:<8} import + first reward: {startup_seconds(code) - baseline:6.2f}s over importing prompting"
+        )
+
+    textblob_rate = throughput(
+        lambda batch: [reward(0, response) for response in batch],
+        responses,
+        args.steps,
+    )
+    lexicon_rate = throughput(scorer.score, responses, args.steps)
+    print(f"textblob: {textblob_rate:8.1f} responses/s")
+    print(
+        f"lexicon : {lexicon_rate:8.1f} responses/s ({lexicon_rate / textblob_rate:.1f}x)"
+    )
+
+    difference = max(
+        abs(reward(0, response) - lexicon)
+        for response, lexicon in zip(responses, scorer.score(responses))
+    )
+    print(f"max reward difference: {difference:.2e}")
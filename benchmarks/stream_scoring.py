@@ -0,0 +1,101 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""
+Compares the wall time of a forward step that scores every response in one batch after the slowest miner with one
+that scores responses while the others are still pending, in batches of whatever arrived meanwhile, for a CPU-heavy
+reward.
+
+Usage:
+    python benchmarks/stream_scoring.py --sample_size 50 --max_latency 1.0 --reward_ms 20
+"""
+
+import time
+import torch
+import asyncio
+import argparse
+import bittensor as bt
+
+from prompting.mock import MockDendrite, MockMetagraph, MockSubtensor
+from prompting.protocol import Prompting
+from prompting.validator.quorum import ArrivalScorer, query_quorum
+
+
+def cpu_reward(milliseconds: float) -> float:
+    end = time.perf_counter() + milliseconds / 1000
+    while time.perf_counter() < end:
+        pass
+    return 1.0
+
+
+def synapse() -> Prompting:
+    prompting = Prompting(character_info="", criteria=[], messages=[])
+    prompting.add_message("Tell me a joke.")
+    return prompting
+
+
+async def batch_step(dendrite, axons, timeout, reward_ms):
+    responses = await dendrite(
+        axons=axons, synapse=synapse(), deserialize=True, timeout=timeout
+    )
+    return [cpu_reward(reward_ms) for _ in responses]
+
+
+async def streamed_step(dendrite, axons, timeout, reward_ms):
+    scorer = ArrivalScorer(
+        lambda responses: torch.FloatTensor(
+            [cpu_reward(reward_ms) for _ in responses]
+        )
+    )
+    result = await query_quorum(
+        dendrite, axons, synapse(), timeout=timeout, on_response=scorer
+    )
+    return await scorer.gather(result.arrived)
+
+
+def bench(step, steps, *args):
+    async def run():
+        start = time.perf_counter()
+        for _ in range(steps):
+            await step(*args)
+        return (time.perf_counter() - start) / steps
+
+    return asyncio.run(run())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sample_size", type=int, default=50)
+    parser.add_argument("--max_latency", type=float, default=1.0)
+    parser.add_argument("--reward_ms", type=float, default=20)
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--steps", type=int, default=3)
+    args = parser.parse_args()
+
+    subtensor = MockSubtensor(netuid=1, n=args.sample_size)
+    axons = MockMetagraph(subtensor=subtensor).axons[: args.sample_size]
+    dendrite = MockDendrite(bt.MockWallet(), max_time=args.max_latency)
+    scoring = args.sample_size * args.reward_ms / 1000
+
+    print(
+        f"network <= {args.max_latency:.2f}s, scoring = {scoring:.2f}s per step"
+    )
+    for name, step in (("batch", batch_step), ("streamed", streamed_step)):
+        wall = bench(
+            step, args.steps, dendrite, axons, args.timeout, args.reward_ms
+        )
+        print(f"{name:<8}: {wall:6.2f}s per step")
@@ -0,0 +1,103 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""
+Benchmarks get_random_uids at subnet scale with growing exclude lists.
+
+Usage:
+    python benchmarks/uids.py --n 4096 --sample_size 50
+"""
+
+import time
+import torch
+import random
+import argparse
+
+from prompting.utils.uids import check_uid_availability, get_random_uids
+
+
+class Axon:
+    def __init__(self, is_serving):
+        self.is_serving = is_serving
+
+
+class Metagraph:
+    def __init__(self, n):
+        self.n = torch.tensor(n)
+        self.axons = [Axon(random.random() > 0.2) for _ in range(n)]
+        self.validator_permit = torch.rand(n) > 0.9
+        self.S = torch.rand(n) * 2048
+
+
+class Validator:
+    def __init__(self, metagraph, vpermit_tao_limit=1024):
+        self.metagraph = metagraph
+        self.config = argparse.Namespace(
+            neuron=argparse.Namespace(vpermit_tao_limit=vpermit_tao_limit)
+        )
+
+
+def loop_get_random_uids(self, k, exclude=None):
+    """The get_random_uids implementation the availability mask replaced, for comparison."""
+    candidate_uids = []
+    avail_uids = []
+    for uid in range(self.metagraph.n.item()):
+        uid_is_available = check_uid_availability(
+            self.metagraph, uid, self.config.neuron.vpermit_tao_limit
+        )
+        uid_is_not_excluded = exclude is None or uid not in exclude
+        if uid_is_available:
+            avail_uids.append(uid)
+            if uid_is_not_excluded:
+                candidate_uids.append(uid)
+    available_uids = candidate_uids
+    if len(candidate_uids) < k:
+        available_uids += random.sample(
+            [uid for uid in avail_uids if uid not in candidate_uids],
+            k - len(candidate_uids),
+        )
+    return torch.tensor(random.sample(available_uids, k))
+
+
+def bench(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e3
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=4096)
+    parser.add_argument("--sample_size", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    validator = Validator(Metagraph(args.n))
+    for exclude_size in (0, 256, 2048):
+        exclude = random.sample(range(args.n), exclude_size)
+        loop = bench(
+            lambda: loop_get_random_uids(validator, args.sample_size, exclude),
+            args.iterations,
+        )
+        masked = bench(
+            lambda: get_random_uids(validator, args.sample_size, exclude),
+            args.iterations,
+        )
+        print(
+            f"exclude={exclude_size:<5} loop: {loop:8.2f} ms/call  mask: {masked:8.3f} ms/call"
+        )
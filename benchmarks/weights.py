@@ -0,0 +1,94 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""
+Benchmarks weight processing at subnet scale against `bt.utils.weight_utils`, fully offline on a MockSubtensor, and
+checks that both produce the same uint16 payload.
+
+Usage:
+    python benchmarks/weights.py --n 4096
+"""
+
+import time
+import torch
+import argparse
+import bittensor as bt
+
+from prompting.mock import MockMetagraph, MockSubtensor
+from prompting.validator.weights import (
+    SubnetHyperparameters,
+    convert_weights_and_uids_for_emit,
+    process_weights,
+)
+
+
+def bench(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = fn()
+    return (time.perf_counter() - start) / iterations * 1e3, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=4096)
+    parser.add_argument("--netuid", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    subtensor = MockSubtensor(args.netuid, n=args.n)
+    metagraph = MockMetagraph(args.netuid, subtensor=subtensor)
+    uids = metagraph.uids.to("cpu")
+    raw_weights = torch.nn.functional.normalize(
+        torch.rand(args.n) ** 4, p=1, dim=0
+    )
+
+    def library():
+        return bt.utils.weight_utils.convert_weights_and_uids_for_emit(
+            *bt.utils.weight_utils.process_weights_for_netuid(
+                uids=uids,
+                weights=raw_weights,
+                netuid=args.netuid,
+                subtensor=subtensor,
+                metagraph=metagraph,
+            )
+        )
+
+    def fetch():
+        return SubnetHyperparameters(
+            min_allowed_weights=subtensor.min_allowed_weights(
+                netuid=args.netuid
+            ),
+            max_weight_limit=subtensor.max_weight_limit(netuid=args.netuid),
+            n=int(metagraph.n),
+        )
+
+    hyperparameters = fetch()
+
+    def local():
+        return convert_weights_and_uids_for_emit(
+            *process_weights(uids, raw_weights, hyperparameters)
+        )
+
+    library_ms, expected = bench(library, args.iterations)
+    fetch_ms, _ = bench(fetch, args.iterations)
+    local_ms, payload = bench(local, args.iterations)
+    print(f"{hyperparameters}")
+    print(f"bt.utils.weight_utils: {library_ms:8.2f} ms/epoch")
+    print(f"hyperparameter fetch:  {fetch_ms:8.2f} ms/epoch (once per epoch)")
+    print(f"local pipeline:        {local_ms:8.2f} ms/call")
+    print(f"identical payload:     {payload == expected}")
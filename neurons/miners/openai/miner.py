@@ -114,7 +114,9 @@ class OpenAIMiner(BaseMinerNeuron):
 
         api_key = config.openai.api_key  # Fetch from configuration
         if api_key is None:
-            api_key = os.getenv("OPENAI_API_KEY")  # Fallback to environment variable
+            api_key = os.getenv(
+                "OPENAI_API_KEY"
+            )  # Fallback to environment variable
             if api_key is None:
                 raise ValueError(
                     "OpenAI API key is required: the miner requires an `OPENAI_API_KEY` either passed directly to the constructor, defined in the configuration, or set in the environment variables."
@@ -147,14 +149,17 @@ class OpenAIMiner(BaseMinerNeuron):
         """
         try:
             start_time = time.time()
-            bt.logging.debug(f"Message received, forwarding synapse: {synapse}")
+            bt.logging.debug(
+                f"Message received, forwarding synapse: {synapse}"
+            )
 
             messages = [
                 (
                     {
                         "role": message.name,
                         "content": self.append_criteria(
-                            message.content + synapse.character_info, synapse.criteria
+                            message.content + synapse.character_info,
+                            synapse.criteria,
                         ),
                     }
                     if message.name == "system"
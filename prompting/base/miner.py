@@ -15,7 +15,6 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
-import time
 import torch
 import asyncio
 import threading
@@ -110,16 +109,14 @@ class BaseMinerNeuron(BaseNeuron):
         # This loop maintains the miner's operations until intentionally stopped.
         try:
             while not self.should_exit:
-                while (
-                    self.block - self.metagraph.last_update[self.uid]
-                    < self.config.neuron.epoch_length
-                ):
-                    # Wait before checking again.
-                    time.sleep(1)
-
-                    # Check if we should exit.
-                    if self.should_exit:
-                        break
+                # Sleep until the predicted end of the epoch instead of polling the block. Syncing needs more than
+                # epoch_length blocks since the last update, hence the first block past the epoch.
+                self.block_clock.wait_until(
+                    int(self.metagraph.last_update[self.uid])
+                    + self.config.neuron.epoch_length
+                    + 1,
+                    should_stop=lambda: self.should_exit,
+                )
 
                 # Sync metagraph and potentially set weights.
                 self.sync()
@@ -193,12 +190,15 @@ class BaseMinerNeuron(BaseNeuron):
         try:
             # --- query the chain for the most current number of peers on the network
             chain_weights = torch.zeros(
-                self.subtensor.subnetwork_n(netuid=self.metagraph.netuid)
+                self.chain.call(
+                    self.subtensor.subnetwork_n, netuid=self.metagraph.netuid
+                )
             )
             chain_weights[self.uid] = 1
 
             # --- Set weights.
-            self.subtensor.set_weights(
+            self.chain.call(
+                self.subtensor.set_weights,
                 wallet=self.wallet,
                 netuid=self.metagraph.netuid,
                 uids=torch.arange(0, len(chain_weights)),
@@ -218,5 +218,5 @@ class BaseMinerNeuron(BaseNeuron):
         """Resyncs the metagraph and updates the hotkeys and moving averages based on the new metagraph."""
         bt.logging.info("resync_metagraph()")
 
-        # Sync the metagraph.
-        self.metagraph.sync(subtensor=self.subtensor)
+        # Build a fresh snapshot and swap it in, so request handlers never see a half-synced metagraph.
+        self.metagraph = self.chain.call(self.build_metagraph)
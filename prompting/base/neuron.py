@@ -24,7 +24,8 @@ from abc import ABC, abstractmethod
 
 # Sync calls set weights and also resyncs the metagraph.
 from prompting.utils.config import check_config, add_args, config
-from prompting.utils.misc import ttl_get_block
+from prompting.utils.clock import BlockClock
+from prompting.utils.subtensor import AsyncSubtensor, CachingSubtensor
 from prompting import __spec_version__ as spec_version
 from prompting.mock import MockSubtensor, MockMetagraph
 
@@ -48,14 +49,14 @@ class BaseNeuron(ABC):
     def config(cls):
         return config(cls)
 
-    subtensor: "bt.subtensor"
+    subtensor: "CachingSubtensor"
     wallet: "bt.wallet"
     metagraph: "bt.metagraph"
     spec_version: int = spec_version
 
     @property
     def block(self):
-        return ttl_get_block(self)
+        return self.block_clock.current()
 
     def __init__(self, config=None):
         base_config = copy.deepcopy(config or BaseNeuron.config())
@@ -82,18 +83,40 @@ class BaseNeuron(ABC):
             self.subtensor = MockSubtensor(
                 self.config.netuid, wallet=self.wallet
             )
-            self.metagraph = MockMetagraph(
-                self.config.netuid, subtensor=self.subtensor
-            )
         else:
             self.wallet = bt.wallet(config=self.config)
             self.subtensor = bt.subtensor(config=self.config)
-            self.metagraph = self.subtensor.metagraph(self.config.netuid)
+
+        # Answers registration, block, n and hyperparameter queries from the metagraph or a cache, and counts RPCs.
+        self.subtensor = CachingSubtensor(
+            self.subtensor,
+            metagraph_fn=lambda: getattr(self, "metagraph", None),
+            hyperparameter_ttl=self.config.neuron.chain_cache_ttl,
+        )
+        self.metagraph = self.build_metagraph()
 
         bt.logging.info(f"Wallet: {self.wallet}")
         bt.logging.info(f"Subtensor: {self.subtensor}")
         bt.logging.info(f"Metagraph: {self.metagraph}")
 
+        # Blocking chain calls go through a bounded thread pool with per-call timeouts,
+        # so a slow chain endpoint cannot stall the neuron indefinitely.
+        self.chain = AsyncSubtensor(
+            self.subtensor,
+            max_workers=self.config.neuron.chain_workers,
+            timeout=self.config.neuron.chain_timeout,
+        )
+
+        # Predicts the current block between periodic corrections, so reading it does not cost an RPC.
+        # Corrections read the chain itself, a cached block could be a block time behind.
+        self.block_clock = BlockClock(
+            lambda: self.chain.call(self.subtensor.latest_block),
+            correction_interval=self.config.neuron.block_correction_interval,
+        )
+        if self.config.neuron.block_subscription and not self.config.mock:
+            # Header subscriptions hold their connection, so they get one of their own.
+            self.block_clock.subscribe(bt.subtensor(config=self.config))
+
         # Check if the miner is registered on the Bittensor network before proceeding further.
         self.check_registered()
 
@@ -121,27 +144,47 @@ class BaseNeuron(ABC):
         # Ensure miner or validator hotkey is still registered on the network.
         self.check_registered()
 
-        if self.should_sync_metagraph():
-            self.resync_metagraph()
+        try:
+            if self.should_sync_metagraph():
+                self.resync_metagraph()
 
-        if self.should_set_weights():
-            self.set_weights()
+            if self.should_set_weights():
+                self.set_weights()
+        except TimeoutError as err:
+            # A slow chain endpoint skips this sync instead of ending the run loop, the next sync tries again.
+            bt.logging.warning(f"Skipping sync: {err}")
 
         # Always save state.
         self.save_state()
 
     def check_registered(self):
         # --- Check for registration.
-        if not self.subtensor.is_hotkey_registered(
-            netuid=self.config.netuid,
-            hotkey_ss58=self.wallet.hotkey.ss58_address,
-        ):
+        try:
+            registered = self.chain.call(
+                self.subtensor.is_hotkey_registered,
+                netuid=self.config.netuid,
+                hotkey_ss58=self.wallet.hotkey.ss58_address,
+            )
+        except TimeoutError:
+            # A slow chain endpoint is not a reason to shut down, check again on the next sync.
+            return
+
+        if not registered:
             bt.logging.error(
                 f"Wallet: {self.wallet} is not registered on netuid {self.config.netuid}."
                 f" Please register the hotkey using `btcli subnets register` before trying again"
             )
             exit()
 
+    def build_metagraph(self) -> "bt.metagraph":
+        """
+        Builds and syncs a new metagraph snapshot. The snapshot currently in use is left untouched, so resyncs can
+        prepare the next snapshot off to the side and swap it in with a single assignment.
+        """
+        if self.config.mock:
+            return MockMetagraph(self.config.netuid, subtensor=self.subtensor)
+        return self.subtensor.metagraph(self.config.netuid)
+
     def should_sync_metagraph(self):
         """
         Check if enough epoch blocks have elapsed since the last checkpoint to sync.
@@ -0,0 +1,153 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import time
+import asyncio
+import bittensor as bt
+
+from typing import Awaitable, Callable, Optional
+
+from prompting.utils.metrics import RateMeter
+
+
+class ForwardScheduler:
+    """
+    Sliding-window scheduler for validator forwards.
+
+    Keeps exactly `concurrency` forwards in flight and starts a new one as soon as any of them finishes, instead of
+    waiting for the slowest forward of a batch. Optionally paces forward starts to a steady `target_rate`.
+
+    Args:
+        forward_fn (Callable): Coroutine function running a single forward.
+        concurrency (int): Number of forwards kept in flight.
+        target_rate (float): Forwards started per second. A non-positive value disables pacing.
+        on_complete (Callable): Optional callback invoked after every successful forward.
+
+    Example:
+        scheduler = ForwardScheduler(self.forward, concurrency=4, target_rate=2.0)
+        await scheduler.run(should_stop=lambda: self.should_exit)
+    """
+
+    def __init__(
+        self,
+        forward_fn: Callable[[], Awaitable],
+        concurrency: int,
+        target_rate: float = 0,
+        on_complete: Optional[Callable[[], None]] = None,
+    ):
+        self.forward_fn = forward_fn
+        self.concurrency = max(int(concurrency), 1)
+        self.target_rate = target_rate
+        self.on_complete = on_complete
+
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.completion_meter = RateMeter()
+        self._in_flight = set()
+        self._next_start = time.monotonic()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of forwards currently in flight."""
+        return len(self._in_flight)
+
+    def completion_rate(self) -> float:
+        """Completed forwards per second over the last minute."""
+        return self.completion_meter.rate()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "completion_rate": self.completion_rate(),
+        }
+
+    async def _run_one(self):
+        try:
+            await self.forward_fn()
+        except Exception as err:
+            self.failed += 1
+            bt.logging.error(f"Forward failed: {err}")
+            return
+        self.completed += 1
+        self.completion_meter.mark()
+        if self.on_complete is not None:
+            self.on_complete()
+
+    def _start_delay(self) -> float:
+        """Seconds to wait before the next forward may start to honor the target rate."""
+        if self.target_rate <= 0:
+            return 0
+        return self._next_start - time.monotonic()
+
+    def _start(self):
+        if self.target_rate > 0:
+            self._next_start = (
+                max(self._next_start, time.monotonic()) + 1 / self.target_rate
+            )
+        self._in_flight.add(asyncio.create_task(self._run_one()))
+        self.started += 1
+
+    async def _wait(self, timeout: Optional[float] = None):
+        """Waits until at least one forward finishes or the timeout passes."""
+        if not self._in_flight:
+            if timeout is not None:
+                await asyncio.sleep(timeout)
+            return
+        _, self._in_flight = await asyncio.wait(
+            self._in_flight,
+            timeout=timeout,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+
+    async def run(
+        self,
+        should_stop: Optional[Callable[[], bool]] = None,
+        max_forwards: Optional[int] = None,
+    ):
+        """
+        Runs forwards until `should_stop` returns True or `max_forwards` forwards have been started, then waits for
+        the forwards still in flight to finish.
+        """
+
+        def can_start() -> bool:
+            if should_stop is not None and should_stop():
+                return False
+            return (
+                max_forwards is None or self.started - started < max_forwards
+            )
+
+        started = self.started
+        while True:
+            while self.queue_depth < self.concurrency and can_start():
+                delay = self._start_delay()
+                if delay > 0:
+                    break
+                self._start()
+
+            if not can_start():
+                if not self._in_flight:
+                    return
+                await self._wait()
+            elif self.queue_depth < self.concurrency:
+                # Waiting on the target rate; wake up early if a forward finishes.
+                await self._wait(timeout=self._start_delay())
+            else:
+                await self._wait()
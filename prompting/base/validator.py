@@ -17,19 +17,44 @@
 # DEALINGS IN THE SOFTWARE.
 
 
+import os
 import copy
 import torch
 import asyncio
 import argparse
 import threading
+import concurrent.futures
 import bittensor as bt
 
 from typing import List
 from traceback import print_exception
 
 from prompting.base.neuron import BaseNeuron
+from prompting.base.scheduler import ForwardScheduler
 from prompting.mock import MockDendrite
 from prompting.utils.config import add_validator_args
+from prompting.utils.metrics import IdleTracker, LoopLagMonitor
+from prompting.utils.metagraph import diff_metagraphs
+from prompting.validator.scores import ScoreEngine
+from prompting.validator.history import RewardHistory
+from prompting.validator.health import MinerHealth
+from prompting.validator.deadline import AdaptiveDeadline
+from prompting.validator.reward_engine import RewardEngine
+from prompting.validator.pipeline import default_pipeline
+from prompting.validator.sampling import build_sampler
+from prompting.validator.corpus import PromptCorpus, PromptSource
+from prompting.validator.weights import (
+    convert_weights_and_uids_for_emit,
+    fetch_hyperparameters,
+    process_weights,
+)
+from prompting.utils.checkpoint import (
+    CheckpointWriter,
+    atomic_save,
+    load_checkpoint,
+    torch_load,
+)
+from prompting.utils.mmap_state import MmapStateFile
 
 
 class BaseValidatorNeuron(BaseNeuron):
@@ -57,8 +82,108 @@ class BaseValidatorNeuron(BaseNeuron):
 
         # Set up initial scoring weights for validation
         bt.logging.info("Building validation weights.")
-        self.scores = torch.zeros(
-            self.metagraph.n, dtype=torch.float32, device=self.device
+        self.score_engine = ScoreEngine(
+            int(self.metagraph.n),
+            alpha=self.config.neuron.moving_average_alpha,
+            device=self.device,
+            duplicate_policy=self.config.neuron.duplicate_uid_policy,
+            half_life=self.config.neuron.score_half_life,
+        )
+        # Guards scores and hotkeys, which background tasks may touch from a worker thread.
+        self.scores_lock = self.score_engine.lock
+
+        # Last rewards and latencies of every miner, to tell consistent miners from one-off spikes.
+        self.reward_history = RewardHistory(
+            int(self.metagraph.n),
+            window=self.config.neuron.reward_history_window,
+            device=self.device,
+        )
+
+        # Latency and failures of every miner, skipping dead axons until a probe shows they are back.
+        self.health = MinerHealth(
+            int(self.metagraph.n),
+            failure_threshold=self.config.neuron.circuit_failure_threshold,
+            cooldown=self.config.neuron.circuit_cooldown,
+        )
+
+        # Per-request deadline that follows how fast miners answer, bounded by neuron.timeout.
+        self.deadline = AdaptiveDeadline(
+            max_timeout=self.config.neuron.timeout,
+            min_timeout=self.config.neuron.min_timeout,
+            percentile=self.config.neuron.deadline_percentile,
+            margin=self.config.neuron.deadline_margin,
+        )
+
+        # Computes rewards, on worker processes warmed up once here when neuron.reward_processes is set. Shared by all
+        # concurrent forwards, so its reward cache covers identical completions across them.
+        reward_pipeline = default_pipeline(
+            max_chars=self.config.neuron.max_completion_chars,
+            sentiment=self.config.neuron.sentiment_scorer,
+        )
+        self.reward_engine = RewardEngine(
+            processes=self.config.neuron.reward_processes,
+            chunksize=self.config.neuron.reward_chunksize,
+            cache_size=self.config.neuron.reward_cache_size,
+            reward_fn=reward_pipeline,
+            initializer=reward_pipeline.warm_up,
+        )
+        self.reward_engine.start()
+        # Runs the reward computations of the forwards, one batch per forward at a time, so they neither queue behind
+        # nor hold up the checkpoint and sync tasks on the loop's default executor.
+        self.reward_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(self.config.neuron.num_concurrent_forwards, 1),
+            thread_name_prefix="rewards",
+        )
+
+        # Prompts of the forwards, sampled from the memory-mapped corpus and prefetched on a background thread.
+        corpus_path = self.config.neuron.prompt_corpus
+        self.prompts = PromptSource(
+            PromptCorpus(corpus_path) if corpus_path else None,
+            prefetch=self.config.neuron.prompt_prefetch,
+        )
+
+        # Tasks scoring responses that arrived after their forward completed on a quorum.
+        self.late_tasks = set()
+
+        # Picks which available miners each forward queries, from the reward history above.
+        self.sampler = build_sampler(
+            self.config.neuron.sampler,
+            exploration=self.config.neuron.sampler_exploration,
+            max_in_flight=self.config.neuron.max_inflight_per_uid,
+        )
+
+        # Writes state snapshots and score deltas in the background, so the step loop never waits on disk.
+        if self.config.neuron.state_format == "mmap":
+            # Memory-mapped state that external tools can read while the validator runs.
+            state_file = MmapStateFile(
+                os.path.join(self.config.neuron.full_path, "state.npy")
+            )
+            self.save_fn, self.load_fn = state_file.save, state_file.load
+            state_path = state_file.path
+        else:
+            self.save_fn, self.load_fn = atomic_save, torch_load
+            state_path = os.path.join(self.config.neuron.full_path, "state.pt")
+        self.checkpoint = CheckpointWriter(
+            state_path,
+            snapshot_fn=self.state_dict,
+            save_fn=self.save_fn,
+            interval=self.config.neuron.save_interval,
+        )
+
+        # Subnet limits used for weight processing, snapshotted once per epoch in resync_metagraph.
+        self.hyperparameters = None
+
+        # Tracks how long the query pipeline sits with no forward in flight.
+        self.idle_tracker = IdleTracker()
+
+        # Measures how long the event loop is blocked, e.g. by chain calls made on the loop thread.
+        self.loop_lag = LoopLagMonitor()
+
+        # Keeps num_concurrent_forwards forwards in flight, starting a new one as soon as any finishes.
+        self.scheduler = ForwardScheduler(
+            self.tracked_forward,
+            concurrency=self.config.neuron.num_concurrent_forwards,
+            target_rate=self.config.neuron.target_forward_rate,
         )
 
         # Init sync with the network. Updates the metagraph.
@@ -79,6 +204,15 @@ class BaseValidatorNeuron(BaseNeuron):
         self.thread: threading.Thread = None
         self.lock = asyncio.Lock()
 
+    @property
+    def scores(self) -> torch.FloatTensor:
+        """Moving average scores of the miners, owned by the score engine."""
+        return self.score_engine.scores
+
+    @scores.setter
+    def scores(self, scores: torch.FloatTensor):
+        self.score_engine.load(scores)
+
     def serve_axon(self):
         """Serve axon to enable external connections."""
 
@@ -104,12 +238,23 @@ class BaseValidatorNeuron(BaseNeuron):
             )
             pass
 
+    async def tracked_forward(self):
+        """Runs a single forward while recording it as in flight for idle time accounting."""
+        self.idle_tracker.begin()
+        try:
+            return await self.forward()
+        finally:
+            self.idle_tracker.end()
+
     async def concurrent_forward(self):
-        coroutines = [
-            self.forward()
-            for _ in range(self.config.neuron.num_concurrent_forwards)
-        ]
-        await asyncio.gather(*coroutines)
+        """
+        Runs one step of the stepped loop: starts `num_concurrent_forwards` forwards and waits for all of them, so the
+        step lasts as long as its slowest forward. The default pipelined loop has no such barrier.
+        """
+        await self.scheduler.run(
+            should_stop=lambda: self.should_exit,
+            max_forwards=self.config.neuron.num_concurrent_forwards,
+        )
 
     def run(self):
         """
@@ -136,10 +281,15 @@ class BaseValidatorNeuron(BaseNeuron):
 
         bt.logging.info(f"Validator starting at block: {self.block}")
 
-        # This loop maintains the validator's operations until intentionally stopped.
+        if self.config.neuron.pipelined:
+            return self.run_pipelined()
+
+        # The stepped loop (--no-neuron.pipelined) maintains the validator's operations until intentionally stopped.
         try:
             while True:
-                bt.logging.info(f"step({self.step}) block({self.block})")
+                bt.logging.info(
+                    f"step({self.step}) block({self.block}) idle({self.idle_tracker.idle_seconds_per_hour():.1f}s/hour)"
+                )
 
                 # Run multiple forwards concurrently.
                 self.loop.run_until_complete(self.concurrent_forward())
@@ -166,6 +316,113 @@ class BaseValidatorNeuron(BaseNeuron):
                 print_exception(type(err), err, err.__traceback__)
             )
 
+        # Checkpoint one last time so no progress is lost on shutdown.
+        finally:
+            self.loop.run_until_complete(self._cancel_late_tasks())
+            self.checkpoint.flush()
+
+    def run_pipelined(self):
+        """
+        Runs the validator as a long-lived asyncio pipeline. Forwards are issued back to back while registration checks,
+        metagraph resyncs, weight setting and checkpointing run as independent background tasks on their own schedule,
+        so none of them stalls miner querying.
+
+        The background tasks are executed in the default thread pool executor, and the chain calls they make go through
+        the bounded `self.chain` pool with per-call timeouts, so the event loop sending synapses is never blocked on the
+        chain. Event loop lag is sampled continuously and logged with every background sync.
+        """
+        try:
+            self.loop.run_until_complete(self._pipeline())
+
+        # If someone intentionally stops the validator, it'll safely terminate operations.
+        except KeyboardInterrupt:
+            self.axon.stop()
+            bt.logging.success("Validator killed by keyboard interrupt.")
+            exit()
+
+        # In case of unforeseen errors, the validator will log the error and continue operations.
+        except Exception as err:
+            bt.logging.error("Error during validation", str(err))
+            bt.logging.debug(
+                print_exception(type(err), err, err.__traceback__)
+            )
+
+    async def _pipeline(self):
+        """Runs the forward pipeline alongside the background sync, weight setting and checkpoint tasks."""
+        background_tasks = [
+            asyncio.create_task(
+                self._periodic(
+                    self.config.neuron.sync_interval, self._sync_step
+                )
+            ),
+            asyncio.create_task(
+                self._periodic(
+                    self.config.neuron.sync_interval, self._set_weights_step
+                )
+            ),
+            asyncio.create_task(self.loop_lag.monitor()),
+        ]
+        # Every completed forward counts as a step; new forwards start as soon as a slot frees up.
+        self.scheduler.on_complete = self._advance_step
+        try:
+            await self.scheduler.run(should_stop=lambda: self.should_exit)
+        finally:
+            self.scheduler.on_complete = None
+            for task in background_tasks:
+                task.cancel()
+            await asyncio.gather(*background_tasks, return_exceptions=True)
+            await self._cancel_late_tasks()
+            # Checkpoint one last time so no progress is lost on shutdown.
+            await self.loop.run_in_executor(None, self.checkpoint.flush)
+
+    async def _cancel_late_tasks(self):
+        """Cancels the tasks still waiting on late responses and waits for them to release their miners."""
+        tasks = list(self.late_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _advance_step(self):
+        self.step += 1
+
+    async def _periodic(self, interval: float, fn):
+        """Calls the blocking function `fn` in the executor every `interval` seconds until the validator exits."""
+        while not self.should_exit:
+            await asyncio.sleep(interval)
+            try:
+                await self.loop.run_in_executor(None, fn)
+            except Exception as err:
+                bt.logging.error(
+                    f"Background task {fn.__name__} failed: {err}"
+                )
+
+    def _sync_step(self):
+        """Checks registration and resyncs the metagraph if an epoch has elapsed."""
+        self.check_registered()
+        if self.should_sync_metagraph():
+            self.resync_metagraph()
+        bt.logging.info(
+            f"step({self.step}) block({self.block}) idle({self.idle_tracker.idle_seconds_per_hour():.1f}s/hour) "
+            f"queue_depth({self.scheduler.queue_depth}) completion_rate({self.scheduler.completion_rate():.2f}/s) "
+            f"loop_lag(mean={self.loop_lag.mean() * 1000:.1f}ms max={self.loop_lag.max * 1000:.1f}ms) "
+            f"chain_timeouts({self.chain.timeouts}) rpc_rate({self.subtensor.rpc_per_minute():.1f}/min) "
+            f"open_circuits({self.health.open_count()})"
+        )
+        bt.logging.debug(f"Chain RPC stats: {self.subtensor.stats()}")
+        bt.logging.debug(f"Reward cache: {self.reward_engine.cache_info()}")
+        bt.logging.debug(
+            f"Reward stages: {self.reward_engine.stage_timings()}"
+        )
+        bt.logging.debug(
+            f"Prompts: {self.prompts.ready()} ready, {self.prompts.misses} misses, {self.prompts.skipped} skipped"
+        )
+        self.loop_lag.reset()
+
+    def _set_weights_step(self):
+        """Sets weights if an epoch has elapsed."""
+        if self.should_set_weights():
+            self.set_weights()
+
     def run_in_background_thread(self):
         """
         Starts the validator's operations in a background thread upon entering the context.
@@ -213,6 +470,15 @@ class BaseValidatorNeuron(BaseNeuron):
             self.thread.join(5)
             self.is_running = False
             bt.logging.debug("Stopped")
+        if (
+            self.late_tasks
+            and not self.loop.is_running()
+            and not self.loop.is_closed()
+        ):
+            self.loop.run_until_complete(self._cancel_late_tasks())
+        self.reward_executor.shutdown(wait=False)
+        self.reward_engine.shutdown()
+        self.prompts.close()
 
     def set_weights(self):
         """
@@ -227,36 +493,47 @@ class BaseValidatorNeuron(BaseNeuron):
 
         # Calculate the average reward for each uid across non-zero values.
         # Replace any NaN values with 0.
-        raw_weights = torch.nn.functional.normalize(self.scores, p=1, dim=0)
+        raw_weights = torch.nn.functional.normalize(
+            self.score_engine.current(), p=1, dim=0
+        )
 
         bt.logging.debug("raw_weights", raw_weights)
         bt.logging.debug("raw_weight_uids", self.metagraph.uids.to("cpu"))
+        if self.hyperparameters is None:
+            self.hyperparameters = fetch_hyperparameters(self)
+        bt.logging.debug("hyperparameters", self.hyperparameters)
+
         # Process the raw weights to final_weights via subtensor limitations.
-        (
-            processed_weight_uids,
-            processed_weights,
-        ) = bt.utils.weight_utils.process_weights_for_netuid(
+        processed_weight_uids, processed_weights = process_weights(
             uids=self.metagraph.uids.to("cpu"),
             weights=raw_weights.to("cpu"),
-            netuid=self.config.netuid,
-            subtensor=self.subtensor,
-            metagraph=self.metagraph,
+            hyperparameters=self.hyperparameters,
         )
         bt.logging.debug("processed_weights", processed_weights)
         bt.logging.debug("processed_weight_uids", processed_weight_uids)
 
         # Convert to uint16 weights and uids.
-        (
-            uint_uids,
-            uint_weights,
-        ) = bt.utils.weight_utils.convert_weights_and_uids_for_emit(
+        uint_uids, uint_weights = convert_weights_and_uids_for_emit(
             uids=processed_weight_uids, weights=processed_weights
         )
         bt.logging.debug("uint_weights", uint_weights)
         bt.logging.debug("uint_uids", uint_uids)
 
+        if self.config.neuron.weights_dry_run:
+            payload = {
+                "netuid": self.config.netuid,
+                "uids": uint_uids,
+                "weights": uint_weights,
+                "version_key": self.spec_version,
+            }
+            bt.logging.info(
+                f"Dry run, not setting weights on chain: {payload}"
+            )
+            return
+
         # Set the weights on chain via our subtensor connection.
-        result = self.subtensor.set_weights(
+        result = self.chain.call(
+            self.subtensor.set_weights,
             wallet=self.wallet,
             netuid=self.config.netuid,
             uids=uint_uids,
@@ -274,40 +551,56 @@ class BaseValidatorNeuron(BaseNeuron):
         """Resyncs the metagraph and updates the hotkeys and moving averages based on the new metagraph."""
         bt.logging.info("resync_metagraph()")
 
-        # Copies state of metagraph before syncing.
-        previous_metagraph = copy.deepcopy(self.metagraph)
+        # Build the new snapshot off to the side; forwards keep using the current one meanwhile.
+        metagraph = self.chain.call(self.build_metagraph)
+        diff = diff_metagraphs(
+            self.metagraph, metagraph, old_hotkeys=self.hotkeys
+        )
 
-        # Sync the metagraph.
-        self.metagraph.sync(subtensor=self.subtensor)
+        with self.scores_lock:
+            if diff.changed:
+                bt.logging.info(
+                    f"Metagraph updated, re-syncing hotkeys and moving averages: {diff}"
+                )
 
-        # Check if the metagraph axon info has changed.
-        if previous_metagraph.axons == self.metagraph.axons:
-            return
+            # Check to see if the metagraph has changed size.
+            # If so, we need to add moving averages for the new uids.
+            self.sampler.resize(diff.new_n)
+            self.score_engine.resize(diff.new_n)
+            self.reward_history.resize(diff.new_n)
+            self.health.resize(diff.new_n)
 
-        bt.logging.info(
-            "Metagraph updated, re-syncing hotkeys, dendrite pool and moving averages"
-        )
-        # Zero out all hotkeys that have been replaced.
-        for uid, hotkey in enumerate(self.hotkeys):
-            if hotkey != self.metagraph.hotkeys[uid]:
-                self.scores[uid] = 0  # hotkey has been replaced
-
-        # Check to see if the metagraph has changed size.
-        # If so, we need to add new hotkeys and moving averages.
-        if len(self.hotkeys) < len(self.metagraph.hotkeys):
-            # Update the size of the moving average scores.
-            new_moving_average = torch.zeros((self.metagraph.n)).to(
-                self.device
-            )
-            min_len = min(len(self.hotkeys), len(self.scores))
-            new_moving_average[:min_len] = self.scores[:min_len]
-            self.scores = new_moving_average
+            # Zero out all hotkeys that have been replaced.
+            if diff.replaced:
+                self.score_engine.reset(diff.replaced)
+                self.reward_history.reset(diff.replaced)
+                self.health.reset(diff.replaced)
 
-        # Update the hotkeys.
-        self.hotkeys = copy.deepcopy(self.metagraph.hotkeys)
+            # Swap in the new snapshot and its hotkeys together.
+            self.hotkeys = list(metagraph.hotkeys)
+            self.metagraph = metagraph
 
-    def update_scores(self, rewards: torch.FloatTensor, uids: List[int]):
-        """Performs exponential moving average on the scores based on the rewards received from the miners."""
+        # Snapshot the subnet limits for this epoch's weight setting, keeping the last ones if the chain is slow.
+        try:
+            self.hyperparameters = fetch_hyperparameters(self, metagraph)
+        except TimeoutError:
+            bt.logging.warning("Timed out fetching subnet hyperparameters.")
+            if self.hyperparameters is not None:
+                self.hyperparameters.n = int(metagraph.n)
+
+    def update_scores(
+        self,
+        rewards: torch.FloatTensor,
+        uids: List[int],
+        latencies: torch.FloatTensor = None,
+    ):
+        """
+        Performs exponential moving average on the scores based on the rewards received from the miners.
+
+        The update is applied in place by the score engine, batched with any update committed concurrently by other
+        forwards. Duplicate uids are combined according to `neuron.duplicate_uid_policy`. The rewards and response
+        latencies are also appended to the per-miner reward history.
+        """
 
         # Check if rewards contains NaN values.
         if torch.isnan(rewards).any():
@@ -315,47 +608,84 @@ class BaseValidatorNeuron(BaseNeuron):
             # Replace any NaN values in rewards with 0.
             rewards = torch.nan_to_num(rewards, 0)
 
-        # Check if `uids` is already a tensor and clone it to avoid the warning.
-        if isinstance(uids, torch.Tensor):
-            uids_tensor = uids.clone().detach()
-        else:
-            uids_tensor = torch.tensor(uids).to(self.device)
-
-        # Compute forward pass rewards, assumes uids are mutually exclusive.
-        # shape: [ metagraph.n ]
-        scattered_rewards: torch.FloatTensor = self.scores.scatter(
-            0, uids_tensor, rewards
-        ).to(self.device)
-        bt.logging.debug(f"Scattered rewards: {rewards}")
-
         # Update scores with rewards produced by this step.
         # shape: [ metagraph.n ]
-        alpha: float = self.config.neuron.moving_average_alpha
-        self.scores: torch.FloatTensor = alpha * scattered_rewards + (
-            1 - alpha
-        ) * self.scores.to(self.device)
+        with self.scores_lock:
+            self.score_engine.update(rewards, uids)
+            self.reward_history.push(uids, rewards, latencies)
+
+            # Log the new scores of the updated uids so they can be recovered between full snapshots.
+            uids = torch.as_tensor(uids, dtype=torch.long)
+            self.checkpoint.append_delta(
+                {
+                    "step": self.step,
+                    "uids": uids.tolist(),
+                    "scores": self.scores[uids].tolist(),
+                    "last_scored": self.score_engine.last_scored[
+                        uids
+                    ].tolist(),
+                }
+            )
         bt.logging.debug(f"Updated moving avg scores: {self.scores}")
 
-    def save_state(self):
-        """Saves the state of the validator to a file."""
-        bt.logging.info("Saving validator state.")
-
-        # Save the state of the validator to file.
-        torch.save(
-            {
+    def state_dict(self) -> dict:
+        """Returns a consistent copy of the validator state to checkpoint."""
+        with self.scores_lock:
+            return {
                 "step": self.step,
-                "scores": self.scores,
-                "hotkeys": self.hotkeys,
-            },
-            self.config.neuron.full_path + "/state.pt",
-        )
+                "scores": self.scores.clone(),
+                "last_scored": self.score_engine.last_scored.clone(),
+                "reward_history": self.reward_history.state_dict(),
+                "hotkeys": list(self.hotkeys),
+                "last_update": torch.as_tensor(
+                    self.metagraph.last_update
+                ).clone(),
+                "delta_seq": self.checkpoint.seq,
+            }
+
+    def save_state(self):
+        """
+        Requests a checkpoint of the validator state. The state is written by the background checkpoint writer at
+        most every `neuron.save_interval` seconds and on shutdown, so this never blocks on disk I/O.
+        """
+        self.checkpoint.request()
 
     def load_state(self):
-        """Loads the state of the validator from a file."""
+        """Loads the state of the validator from the last snapshot and replays the score deltas logged after it."""
         bt.logging.info("Loading validator state.")
 
-        # Load the state of the validator from file.
-        state = torch.load(self.config.neuron.full_path + "/state.pt")
-        self.step = state["step"]
-        self.scores = state["scores"]
-        self.hotkeys = state["hotkeys"]
+        state, deltas = load_checkpoint(self.checkpoint.path, self.load_fn)
+        if state is None and not deltas:
+            bt.logging.warning("No saved validator state found.")
+            return
+
+        with self.scores_lock:
+            if state is not None:
+                self.step = state["step"]
+                self.score_engine.load(
+                    state["scores"], state.get("last_scored")
+                )
+                if "reward_history" in state:
+                    self.reward_history.load_state_dict(
+                        state["reward_history"]
+                    )
+                self.hotkeys = state["hotkeys"]
+                self.checkpoint.seq = max(
+                    self.checkpoint.seq, state.get("delta_seq", 0)
+                )
+
+            for delta in deltas:
+                uids = torch.tensor(delta["uids"], dtype=torch.long)
+                self.score_engine.resize(int(uids.max()) + 1)
+                self.scores[uids] = torch.tensor(
+                    delta["scores"], dtype=self.scores.dtype
+                ).to(self.device)
+                self.score_engine.last_scored[uids] = torch.tensor(
+                    delta["last_scored"], dtype=torch.float64
+                ).to(self.device)
+                self.step = delta["step"]
+                self.checkpoint.seq = max(self.checkpoint.seq, delta["seq"])
+
+        bt.logging.info(
+            f"Loaded validator state at step {self.step}, replayed {len(deltas)} deltas."
+        )
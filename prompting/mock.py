@@ -4,12 +4,22 @@ import asyncio
 import random
 import bittensor as bt
 
-from typing import List
+from typing import Callable, List, Optional
+
+from prompting.utils.clock import VirtualBlockSource
 
 
 class MockSubtensor(bt.MockSubtensor):
-    def __init__(self, netuid, n=16, wallet=None, network="mock"):
+    """
+    Mock subtensor with a registered validator and `n` miners.
+
+    `delay` injects a fixed latency, in seconds, into the chain calls neurons make on their hot paths, which is
+    useful to check that a slow chain endpoint does not stall the event loop.
+    """
+
+    def __init__(self, netuid, n=16, wallet=None, network="mock", delay=0):
         super().__init__(network=network)
+        self.delay = 0
 
         if not self.subnet_exists(netuid):
             self.create_subnet(netuid)
@@ -34,12 +44,46 @@ class MockSubtensor(bt.MockSubtensor):
                 stake=100000,
             )
 
+        self.delay = delay
+
+    def _sleep(self):
+        if self.delay > 0:
+            time.sleep(self.delay)
+
+    def is_hotkey_registered(self, *args, **kwargs):
+        self._sleep()
+        return super().is_hotkey_registered(*args, **kwargs)
+
+    def get_current_block(self, *args, **kwargs):
+        self._sleep()
+        return super().get_current_block(*args, **kwargs)
+
+    def subnetwork_n(self, *args, **kwargs):
+        self._sleep()
+        return super().subnetwork_n(*args, **kwargs)
+
+    def neurons_lite(self, *args, **kwargs):
+        self._sleep()
+        return super().neurons_lite(*args, **kwargs)
+
+    def set_weights(self, *args, **kwargs):
+        self._sleep()
+        return super().set_weights(*args, **kwargs)
+
+    def virtual_block_source(
+        self, block_time: float = 12
+    ) -> VirtualBlockSource:
+        """Returns a virtual block source that steps this mock chain once per `block_time` seconds of virtual time."""
+        return VirtualBlockSource(
+            start_block=super().get_current_block(),
+            block_time=block_time,
+            on_block=self.do_block_step,
+        )
+
 
 class MockMetagraph(bt.metagraph):
     def __init__(self, netuid=1, network="mock", subtensor=None):
-        super().__init__(
-            netuid=netuid, network=network, sync=False
-        )
+        super().__init__(netuid=netuid, network=network, sync=False)
 
         if subtensor is not None:
             self.subtensor = subtensor
@@ -56,9 +100,34 @@ class MockMetagraph(bt.metagraph):
 class MockDendrite(bt.dendrite):
     """
     Replaces a real bittensor network request with a mock request that just returns some static response for all axons that are passed and adds some random delay.
+
+    Every query actually waits for its latency, uniform in [min_time, max_time] unless `latency_fn` is given, so
+    timing-dependent code sees realistic behavior. Queries slower than the timeout return a 408 after the timeout.
+
+    Args:
+        wallet: Wallet of the dendrite.
+        min_time (float): Shortest latency of the default distribution, in seconds.
+        max_time (float): Longest latency of the default distribution, in seconds.
+        latency_fn (Callable): Returns the latency in seconds of one query to the given axon, e.g. to inject
+            heavy-tailed distributions or dead axons.
     """
-    def __init__(self, wallet):
+
+    def __init__(
+        self,
+        wallet,
+        min_time: float = 0.0,
+        max_time: float = 1.0,
+        latency_fn: Optional[Callable[[bt.AxonInfo], float]] = None,
+    ):
         super().__init__(wallet)
+        self.min_time = min_time
+        self.max_time = max_time
+        self.latency_fn = latency_fn
+
+    def latency(self, axon: bt.AxonInfo) -> float:
+        if self.latency_fn is not None:
+            return self.latency_fn(axon)
+        return random.uniform(self.min_time, self.max_time)
 
     async def forward(
         self,
@@ -69,7 +138,6 @@ class MockDendrite(bt.dendrite):
         run_async: bool = True,
         streaming: bool = False,
     ):
-
         if streaming:
             raise NotImplementedError("Streaming not implemented yet.")
 
@@ -83,20 +151,20 @@ class MockDendrite(bt.dendrite):
                 s = synapse.copy()
                 # Attach some more required data so it looks real
                 s = self.preprocess_synapse_for_request(axon, s, timeout)
-                # We just want to mock the response, so we'll just fill in some data
-                process_time = random.random()
+                # We just want to mock the response, so we'll just fill in some data after the injected latency
+                process_time = self.latency(axon)
+                await asyncio.sleep(min(process_time, timeout))
                 if process_time < timeout:
                     s.dendrite.process_time = str(time.time() - start_time)
                     # Update the status code and status message of the dendrite to match the axon
                     s.completion = s.messages[0].content
                     s.dendrite.status_code = 200
                     s.dendrite.status_message = "OK"
-                    synapse.dendrite.process_time = str(process_time)
                 else:
                     s.completion = ""
                     s.dendrite.status_code = 408
                     s.dendrite.status_message = "Timeout"
-                    synapse.dendrite.process_time = str(timeout)
+                    s.dendrite.process_time = str(timeout)
 
                 # Return the updated synapse object after deserializing if requested
                 if deserialize:
@@ -105,7 +173,10 @@ class MockDendrite(bt.dendrite):
                     return s
 
             return await asyncio.gather(
-                *(single_axon_response(i, target_axon) for i, target_axon in enumerate(axons))
+                *(
+                    single_axon_response(i, target_axon)
+                    for i, target_axon in enumerate(axons)
+                )
             )
 
         return await query_all_axons(streaming)
@@ -117,4 +188,4 @@ class MockDendrite(bt.dendrite):
         Returns:
             str: The string representation of the Dendrite object in the format "dendrite(<user_wallet_address>)".
         """
-        return "MockDendrite({})".format(self.keypair.ss58_address)
\ No newline at end of file
+        return "MockDendrite({})".format(self.keypair.ss58_address)
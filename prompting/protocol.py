@@ -108,6 +108,7 @@ class PromptingMixin(BaseModel):
         """
         self.completion = completion
 
+
 class Prompting(PromptingMixin, bt.Synapse):
     """
     The Prompting class encapsulates functionalities related to a simplified chat session
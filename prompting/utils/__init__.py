@@ -1,3 +1,10 @@
 from . import config
 from . import misc
 from . import uids
+from . import metrics
+from . import subtensor
+from . import metagraph
+from . import checkpoint
+from . import mmap_state
+from . import clock
+from . import cache
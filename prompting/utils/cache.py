@@ -0,0 +1,301 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import math
+import time
+import asyncio
+import inspect
+import weakref
+import functools
+import threading
+import concurrent.futures
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+HIT, MISS, COALESCED = "hit", "miss", "coalesced"
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire individually `ttl` seconds after they were stored.
+
+    `resolve` and `aresolve` compute missing values with single-flight de-duplication: while a value is being
+    computed, concurrent lookups of the same key wait for that computation instead of starting their own.
+
+    Args:
+        maxsize (int): Maximum number of entries, the least recently used one is evicted beyond it.
+        ttl (float): Default seconds an entry stays valid. Non-positive values never expire.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = -1):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._ainflight = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expires_at(self, ttl: Optional[float]) -> float:
+        ttl = self.ttl if ttl is None else ttl
+        return time.monotonic() + ttl if ttl > 0 else math.inf
+
+    def _lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        # Must hold the lock.
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key: Hashable, value: Any, ttl: Optional[float]):
+        # Must hold the lock.
+        self._entries[key] = (self._expires_at(ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Stores `value`, valid for `ttl` seconds or the cache's default."""
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def resolve(
+        self, key: Hashable, fn: Callable[[], Any], ttl: Optional[float] = None
+    ) -> Tuple[Any, str]:
+        """
+        Returns the cached value of `key`, computing it with `fn` on a miss.
+
+        Returns:
+            Tuple[Any, str]: The value and how it was obtained: "hit", "miss" (computed by this call) or "coalesced"
+            (computed by a concurrent call). Exceptions raised by `fn` reach every waiting caller and are not cached.
+        """
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value, HIT
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = concurrent.futures.Future()
+                self.misses += 1
+
+        if not owner:
+            return future.result(), COALESCED
+
+        try:
+            value = fn()
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        else:
+            with self._lock:
+                self._store(key, value, ttl)
+            future.set_result(value)
+            return value, MISS
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    async def aresolve(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+    ) -> Tuple[Any, str]:
+        """Like `resolve` for a coroutine function `fn`, for callers on a single event loop."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value, HIT
+            future = self._ainflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._ainflight[
+                    key
+                ] = asyncio.get_running_loop().create_future()
+                self.misses += 1
+
+        if not owner:
+            # Shielded, so a cancelled waiter does not cancel the computation the others wait for.
+            return await asyncio.shield(future), COALESCED
+
+        try:
+            value = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as err:
+            future.set_exception(err)
+            # Mark the exception retrieved in case nobody else was waiting.
+            future.exception()
+            raise
+        else:
+            with self._lock:
+                self._store(key, value, ttl)
+            future.set_result(value)
+            return value, MISS
+        finally:
+            with self._lock:
+                del self._ainflight[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "currsize": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+_KWARGS_MARK = object()
+
+
+def _make_key(args: tuple, kwargs: dict, typed: bool) -> Hashable:
+    key = args
+    if kwargs:
+        key += (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+    if typed:
+        key += tuple(type(arg) for arg in args)
+        key += tuple(type(value) for value in kwargs.values())
+    return key
+
+
+def ttl_cache(maxsize: int = 128, typed: bool = False, ttl: float = -1):
+    """
+    Decorator that caches the most recently used calls of a function, each for `ttl` seconds after it was computed.
+
+    When the first argument can be weakly referenced, as the `self` of a method or of a function taking the neuron,
+    every such object gets its own cache of `maxsize` entries that is dropped together with the object, so the cache
+    neither keeps it alive nor shares entries between objects. Coroutine functions are supported, and concurrent
+    calls with the same arguments share one computation.
+
+    The decorated function gets `cache_info()`, returning hits, misses, evictions and expirations summed over all
+    caches, and `cache_clear()`.
+
+    Args:
+        maxsize (int): Maximum number of cached calls per cache.
+        typed (bool): If set to True, arguments of different types are cached separately, e.g. f(3) and f(3.0).
+        ttl (float): Seconds a cached call stays valid. Non-positive values never expire.
+
+    Example:
+        @ttl_cache(ttl=12)
+        def get_block(self):
+            return self.subtensor.get_current_block()
+    """
+
+    def wrapper(func: Callable) -> Callable:
+        shared = TTLCache(maxsize, ttl)
+        per_object = weakref.WeakKeyDictionary()
+        per_object_lock = threading.Lock()
+
+        def cache_for(args: tuple) -> Tuple[TTLCache, tuple]:
+            if args:
+                try:
+                    with per_object_lock:
+                        cache = per_object.get(args[0])
+                        if cache is None:
+                            cache = per_object[args[0]] = TTLCache(
+                                maxsize, ttl
+                            )
+                    return cache, args[1:]
+                except TypeError:
+                    # Not weakly referenceable (or not hashable), cache by value instead.
+                    pass
+            return shared, args
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def wrapped(*args, **kwargs) -> Any:
+                cache, key_args = cache_for(args)
+                value, _ = await cache.aresolve(
+                    _make_key(key_args, kwargs, typed),
+                    lambda: func(*args, **kwargs),
+                )
+                return value
+
+        else:
+
+            @functools.wraps(func)
+            def wrapped(*args, **kwargs) -> Any:
+                cache, key_args = cache_for(args)
+                value, _ = cache.resolve(
+                    _make_key(key_args, kwargs, typed),
+                    lambda: func(*args, **kwargs),
+                )
+                return value
+
+        def caches():
+            with per_object_lock:
+                return [shared] + list(per_object.values())
+
+        def cache_info() -> dict:
+            info = {
+                "hits": 0,
+                "misses": 0,
+                "evictions": 0,
+                "expirations": 0,
+                "currsize": 0,
+            }
+            for cache in caches():
+                for name, value in cache.info().items():
+                    if name in info:
+                        info[name] += value
+            return info
+
+        def cache_clear():
+            for cache in caches():
+                cache.clear()
+
+        wrapped.cache_info = cache_info
+        wrapped.cache_clear = cache_clear
+        return wrapped
+
+    return wrapper
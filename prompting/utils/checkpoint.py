@@ -0,0 +1,198 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import os
+import json
+import time
+import torch
+import threading
+import bittensor as bt
+
+from collections import deque
+from typing import Callable, List, Optional, Tuple
+
+
+def atomic_save(state: dict, path: str):
+    """Saves `state` with `torch.save` to a temporary file and renames it over `path`."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        torch.save(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_deltas(path: str, after_seq: int = 0) -> List[dict]:
+    """Reads the delta log at `path`, keeping records newer than `after_seq`. A torn last line is ignored."""
+    if not os.path.exists(path):
+        return []
+    deltas = []
+    with open(path) as f:
+        for line in f:
+            try:
+                delta = json.loads(line)
+            except json.JSONDecodeError:
+                bt.logging.warning(f"Skipping corrupt delta record in {path}")
+                continue
+            if delta["seq"] > after_seq:
+                deltas.append(delta)
+    return deltas
+
+
+def truncate_torn_record(path: str):
+    """Cuts a torn last record off the log at `path`, so the next record appended starts on a line of its own."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b"\n":
+            return
+        f.seek(0)
+        f.truncate(f.read().rfind(b"\n") + 1)
+
+
+def torch_load(path: str) -> Optional[dict]:
+    """Loads a snapshot written by `atomic_save`, or returns None if there is none yet."""
+    return torch.load(path) if os.path.exists(path) else None
+
+
+def load_checkpoint(
+    path: str, load_fn: Callable[[str], Optional[dict]] = torch_load
+) -> Tuple[Optional[dict], List[dict]]:
+    """
+    Loads the full snapshot at `path` with `load_fn` and the delta records written after it.
+
+    Returns:
+        Tuple[Optional[dict], List[dict]]: The snapshot, or None if there is none yet, and the deltas to replay on top
+        of it in order.
+    """
+    state = load_fn(path)
+    after_seq = state.get("delta_seq", 0) if state is not None else 0
+    return state, read_deltas(path + ".deltas", after_seq)
+
+
+class CheckpointWriter:
+    """
+    Background writer for neuron state checkpoints.
+
+    Full snapshots are coalesced: `request` only marks the state dirty, and a background thread writes at most one
+    snapshot every `interval` seconds with `save_fn`, by default atomically via a temporary file and a rename.
+    Between snapshots, small delta
+    records appended with `append_delta` are flushed to an append-only log next to the snapshot, so recent progress
+    survives a crash. Every delta gets an increasing sequence number and every snapshot stores the last sequence
+    number it includes, so replaying is correct even if the log was not truncated after the last snapshot.
+
+    The callers never touch the disk; `flush` and `close` are the only blocking methods, meant for shutdown.
+
+    Args:
+        path (str): Path of the snapshot file. The delta log is written to `path + ".deltas"`.
+        snapshot_fn (Callable): Returns the state to snapshot. It must include the current `seq` as "delta_seq",
+            captured under the same lock as the deltas it covers.
+        save_fn (Callable): Writes a snapshot to a path, `atomic_save` by default.
+        interval (float): Minimum seconds between full snapshots.
+        delta_flush_interval (float): Seconds between flushes of the delta log.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        snapshot_fn: Callable[[], dict],
+        save_fn: Callable[[dict, str], None] = atomic_save,
+        interval: float = 60,
+        delta_flush_interval: float = 1,
+    ):
+        self.path = path
+        self.delta_path = path + ".deltas"
+        self.snapshot_fn = snapshot_fn
+        self.save_fn = save_fn
+        self.interval = interval
+        self.delta_flush_interval = delta_flush_interval
+
+        self.seq = 0
+        self.snapshots_written = 0
+        self._deltas = deque()
+        self._dirty = False
+        self._last_snapshot = time.monotonic()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        # A crash mid-append leaves a torn last line, appending onto it would corrupt the next record as well.
+        truncate_torn_record(self.delta_path)
+        self._thread = threading.Thread(
+            target=self._run, name="checkpoint-writer", daemon=True
+        )
+        self._thread.start()
+
+    def request(self):
+        """Marks the state as changed; a snapshot will be written on the next cadence tick."""
+        self._dirty = True
+
+    def append_delta(self, record: dict) -> int:
+        """Queues a delta record for the log and returns its sequence number."""
+        self.seq += 1
+        record["seq"] = self.seq
+        self._deltas.append(record)
+        self._dirty = True
+        return self.seq
+
+    def _run(self):
+        while not self._stop.wait(self.delta_flush_interval):
+            try:
+                with self._write_lock:
+                    self._write_deltas()
+                    if (
+                        self._dirty
+                        and time.monotonic() - self._last_snapshot
+                        >= self.interval
+                    ):
+                        self._write_snapshot()
+            except Exception as err:
+                bt.logging.error(f"Failed to write checkpoint: {err}")
+
+    def _write_deltas(self):
+        if not self._deltas:
+            return
+        records = [self._deltas.popleft() for _ in range(len(self._deltas))]
+        with open(self.delta_path, "a") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write_snapshot(self):
+        self._dirty = False
+        state = self.snapshot_fn()
+        self.save_fn(state, self.path)
+        # Everything in the log is covered by the snapshot now, records still queued carry newer sequence numbers.
+        open(self.delta_path, "w").close()
+        self._last_snapshot = time.monotonic()
+        self.snapshots_written += 1
+
+    def flush(self):
+        """Writes pending deltas and, if anything changed, a full snapshot right away."""
+        with self._write_lock:
+            self._write_deltas()
+            if self._dirty:
+                self._write_snapshot()
+
+    def close(self):
+        """Stops the background thread and flushes everything to disk."""
+        self._stop.set()
+        self._thread.join()
+        self.flush()
@@ -0,0 +1,241 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import time
+import threading
+import bittensor as bt
+
+from typing import Callable, Optional
+
+from prompting.utils.subtensor import BLOCK_TIME
+
+
+class BlockClock:
+    """
+    Predicts the current block from the last observed block and the block time, so reading the block costs no RPC.
+
+    The prediction is corrected against `block_fn` at most every `correction_interval` seconds, and whenever a wait
+    reaches its predicted target, so drift never makes a loop act early. Waits confirm their target at most once per
+    block, and not at all when the chain was already seen at or past it. Blocks can also be pushed in with `observe`,
+    e.g. from a block header subscription, which keeps the prediction exact.
+
+    Args:
+        block_fn (Callable): Returns the current block from the chain.
+        block_time (float): Seconds per block.
+        correction_interval (float): Maximum seconds between corrections against `block_fn`.
+        time_fn (Callable): Returns the current time in seconds, `time.time` by default.
+        sleep_fn (Callable): Sleeps for the given seconds, `time.sleep` by default.
+
+    Example:
+        clock = BlockClock(subtensor.get_current_block)
+        clock.wait_until(clock.current() + 100, should_stop=lambda: stopping)
+    """
+
+    def __init__(
+        self,
+        block_fn: Callable[[], int],
+        block_time: float = BLOCK_TIME,
+        correction_interval: float = 60,
+        time_fn: Callable[[], float] = time.time,
+        sleep_fn: Callable[[float], None] = time.sleep,
+    ):
+        self.block_fn = block_fn
+        self.block_time = block_time
+        self.correction_interval = correction_interval
+        self.time_fn = time_fn
+        self.sleep_fn = sleep_fn
+
+        self.corrections = 0
+        self._anchor_block = None
+        self._anchor_time = None
+        self._latest_block = None
+        self._last_correction = None
+        self._lock = threading.Lock()
+
+    def observe(self, block: int, at: Optional[float] = None):
+        """Records that the chain was at `block` at time `at`, now by default."""
+        at = self.time_fn() if at is None else at
+        if self._latest_block is None or block > self._latest_block:
+            self._latest_block = block
+        if self._anchor_block is not None and self._predict(at) == block:
+            # Still on the predicted block: keep the anchor, it knows the block boundaries more precisely.
+            return
+        self._anchor_block, self._anchor_time = block, at
+
+    def correct(self) -> int:
+        """Queries the chain for the current block and re-anchors the prediction on it."""
+        with self._lock:
+            block = self.block_fn()
+            now = self.time_fn()
+            self.observe(block, now)
+            self._last_correction = now
+            self.corrections += 1
+            return block
+
+    def _predict(self, at: float) -> int:
+        return self._anchor_block + int(
+            max(at - self._anchor_time, 0) // self.block_time
+        )
+
+    def current(self) -> int:
+        """Returns the predicted current block, correcting it first if the last correction is too old."""
+        now = self.time_fn()
+        if (
+            self._last_correction is None
+            or now - self._last_correction >= self.correction_interval
+        ):
+            try:
+                return self.correct()
+            except TimeoutError:
+                if self._anchor_block is None:
+                    raise
+                bt.logging.warning(
+                    "Block clock correction timed out, using the prediction."
+                )
+        return self._predict(now)
+
+    def time_until(self, block: int) -> float:
+        """Returns the predicted seconds until `block` starts, 0 if it already has."""
+        now = self.time_fn()
+        if self._anchor_block is None:
+            self.current()
+        start = (
+            self._anchor_time + (block - self._anchor_block) * self.block_time
+        )
+        return max(start - now, 0.0)
+
+    def wait_until(
+        self,
+        block: int,
+        should_stop: Optional[Callable[[], bool]] = None,
+        max_sleep: float = 1.0,
+    ) -> bool:
+        """
+        Sleeps until the chain reaches `block`. The prediction drives the sleep; the chain is only queried once the
+        prediction says the block was reached, to confirm it.
+
+        Args:
+            block (int): Block to wait for.
+            should_stop (Callable): Checked at least every `max_sleep` seconds, the wait is abandoned when it is true.
+            max_sleep (float): Longest single sleep, bounds how late `should_stop` is noticed.
+
+        Returns:
+            bool: True if `block` was reached, False if the wait was stopped.
+        """
+        while True:
+            if should_stop is not None and should_stop():
+                return False
+            remaining = self.time_until(block)
+            if remaining <= 0:
+                if (
+                    self._latest_block is not None
+                    and self._latest_block >= block
+                ):
+                    # The chain was already seen at or past the block, blocks never go back.
+                    return True
+                since = (
+                    self.time_fn() - self._last_correction
+                    if self._last_correction is not None
+                    else self.block_time
+                )
+                if since < self.block_time:
+                    # Confirm at most once per block, the chain will not have moved much sooner.
+                    remaining = self.block_time - since
+                else:
+                    try:
+                        if self.correct() >= block:
+                            return True
+                    except TimeoutError:
+                        bt.logging.warning(
+                            "Block clock correction timed out while waiting."
+                        )
+                    # The chain is behind the prediction, wait for roughly another block.
+                    remaining = self.time_until(block) or self.block_time
+            self.sleep_fn(min(remaining, max_sleep))
+
+    def subscribe(self, subtensor: "bt.subtensor") -> bool:
+        """
+        Feeds every new block header from `subtensor` into the clock on a background thread. The subscription blocks
+        its connection, so `subtensor` must be a connection of its own, not the one the neuron makes calls on.
+
+        Returns:
+            bool: Whether the subtensor supports header subscriptions.
+        """
+        substrate = getattr(subtensor, "substrate", None)
+        if substrate is None or not hasattr(
+            substrate, "subscribe_block_headers"
+        ):
+            return False
+
+        def handler(header, update_nr, subscription_id):
+            self.observe(int(header["header"]["number"]))
+
+        def run():
+            try:
+                substrate.subscribe_block_headers(handler)
+            except Exception as err:
+                bt.logging.warning(
+                    f"Block header subscription ended, falling back to periodic corrections: {err}"
+                )
+
+        threading.Thread(target=run, name="block-headers", daemon=True).start()
+        return True
+
+
+class VirtualBlockSource:
+    """
+    Chain time that only moves when told to, for tests and mock runs that need to fast-forward epochs.
+
+    Pass `block`, `time` and `sleep` to a `BlockClock`: sleeping advances virtual time instantly, and `on_block` is
+    called once for every block produced, e.g. `MockSubtensor.do_block_step` to keep a mock chain in step.
+
+    Args:
+        start_block (int): Block at virtual time 0.
+        block_time (float): Seconds per block.
+        on_block (Callable): Called once for every new block.
+    """
+
+    def __init__(
+        self,
+        start_block: int = 0,
+        block_time: float = BLOCK_TIME,
+        on_block: Optional[Callable[[], None]] = None,
+    ):
+        self.start_block = start_block
+        self.block_time = block_time
+        self.on_block = on_block
+        self.now = 0.0
+
+    def time(self) -> float:
+        return self.now
+
+    def block(self) -> int:
+        return self.start_block + int(self.now // self.block_time)
+
+    def advance(self, seconds: float):
+        """Moves virtual time forward, producing every block that starts in between."""
+        before = self.block()
+        self.now += max(seconds, 0.0)
+        if self.on_block is not None:
+            for _ in range(self.block() - before):
+                self.on_block()
+
+    def advance_blocks(self, blocks: int):
+        self.advance(blocks * self.block_time)
+
+    def sleep(self, seconds: float):
+        self.advance(seconds)
@@ -77,6 +77,41 @@ def add_args(cls, parser):
         default=100,
     )
 
+    parser.add_argument(
+        "--neuron.chain_timeout",
+        type=float,
+        help="Timeout in seconds for each blocking chain call (registration, block, metagraph sync, set_weights).",
+        default=60,
+    )
+
+    parser.add_argument(
+        "--neuron.chain_workers",
+        type=int,
+        help="Maximum number of chain calls running concurrently on the subtensor thread pool.",
+        default=4,
+    )
+
+    parser.add_argument(
+        "--neuron.chain_cache_ttl",
+        type=float,
+        help="Seconds that subnet hyperparameters fetched from the chain are reused before being queried again.",
+        default=600,
+    )
+
+    parser.add_argument(
+        "--neuron.block_correction_interval",
+        type=float,
+        help="Maximum seconds between corrections of the predicted block against the chain.",
+        default=60,
+    )
+
+    parser.add_argument(
+        "--neuron.block_subscription",
+        action="store_true",
+        help="If set, keeps the predicted block exact with a block header subscription on a dedicated connection.",
+        default=False,
+    )
+
     parser.add_argument(
         "--mock",
         action="store_true",
@@ -172,10 +207,117 @@ def add_validator_args(cls, parser):
     parser.add_argument(
         "--neuron.timeout",
         type=float,
-        help="The timeout for each forward call in seconds.",
+        help="The timeout for each forward call in seconds. With an adaptive deadline, the upper bound of the deadline.",
         default=10,
     )
 
+    parser.add_argument(
+        "--neuron.deadline_percentile",
+        type=float,
+        help="Latency percentile (0-100) of successful responses that the per-request deadline covers. Set to 0 to always use neuron.timeout.",
+        default=0,
+    )
+
+    parser.add_argument(
+        "--neuron.deadline_margin",
+        type=float,
+        help="Seconds added to the latency percentile to get the per-request deadline.",
+        default=0.5,
+    )
+
+    parser.add_argument(
+        "--neuron.min_timeout",
+        type=float,
+        help="Lower bound of the adaptive per-request deadline in seconds.",
+        default=1.0,
+    )
+
+    parser.add_argument(
+        "--neuron.quorum",
+        type=float,
+        help="Fraction of the queried miners whose responses complete a step. Set to 1 to wait for every miner.",
+        default=1.0,
+    )
+
+    parser.add_argument(
+        "--neuron.quorum_successes",
+        type=int,
+        help="Number of successful responses that complete a step. Set to 0 to disable.",
+        default=0,
+    )
+
+    parser.add_argument(
+        "--neuron.soft_deadline",
+        type=float,
+        help="Seconds after which a step continues with the responses that arrived. Set to 0 to disable.",
+        default=0,
+    )
+
+    parser.add_argument(
+        "--neuron.late_policy",
+        type=str,
+        choices=["score", "timeout"],
+        help="What happens to responses arriving after a step completed early: score them when they land, or cancel them and give them a zero reward. Cancelled responses do not count against the miner's health or the adaptive deadline.",
+        default="score",
+    )
+
+    parser.add_argument(
+        "--neuron.stream_scoring",
+        action="store_true",
+        help="Scores responses while slower miners are still answering, in batches of whatever arrived meanwhile, overlapping reward computation with the wait.",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--neuron.reward_processes",
+        type=int,
+        help="Worker processes computing rewards. Set to 0 to compute them in the validator process.",
+        default=0,
+    )
+
+    parser.add_argument(
+        "--neuron.reward_chunksize",
+        type=int,
+        help="Responses scored per reward worker task. Set to 0 to split each batch evenly over the workers.",
+        default=0,
+    )
+
+    parser.add_argument(
+        "--neuron.reward_cache_size",
+        type=int,
+        help="Rewards of recent completions kept so identical completions are scored once. Set to 0 to disable.",
+        default=4096,
+    )
+
+    parser.add_argument(
+        "--neuron.max_completion_chars",
+        type=int,
+        help="Completions longer than this many characters get a zero reward without being scored.",
+        default=10000,
+    )
+
+    parser.add_argument(
+        "--neuron.sentiment_scorer",
+        type=str,
+        choices=["textblob", "lexicon"],
+        help="Sentiment reward implementation. lexicon is a compiled port of TextBlob's analyzer that scores batches without loading TextBlob, and the only one that can score a streamed completion incrementally. The validator does not stream completions yet, so both score whole responses.",
+        default="textblob",
+    )
+
+    parser.add_argument(
+        "--neuron.prompt_corpus",
+        type=str,
+        help="JSONL file of prompts to sample queries from, one JSON string or {prompt, character_info, criteria} object per line. Empty sends the template's fixed prompt.",
+        default="",
+    )
+
+    parser.add_argument(
+        "--neuron.prompt_prefetch",
+        type=int,
+        help="Number of prompts sampled from the corpus and kept ready ahead of the forwards.",
+        default=16,
+    )
+
     parser.add_argument(
         "--neuron.num_concurrent_forwards",
         type=int,
@@ -183,6 +325,13 @@ def add_validator_args(cls, parser):
         default=1,
     )
 
+    parser.add_argument(
+        "--neuron.target_forward_rate",
+        type=float,
+        help="Steady rate of forwards started per second. Set to 0 to start forwards as fast as slots free up.",
+        default=0,
+    )
+
     parser.add_argument(
         "--neuron.sample_size",
         type=int,
@@ -190,6 +339,71 @@ def add_validator_args(cls, parser):
         default=50,
     )
 
+    parser.add_argument(
+        "--neuron.sampler",
+        type=str,
+        choices=["uniform", "ucb", "thompson", "round_robin"],
+        help="Strategy picking which available miners each step queries. round_robin hands out disjoint batches to concurrent forwards.",
+        default="uniform",
+    )
+
+    parser.add_argument(
+        "--neuron.max_inflight_per_uid",
+        type=int,
+        help="Maximum number of concurrent queries to the same miner with the round_robin sampler.",
+        default=1,
+    )
+
+    parser.add_argument(
+        "--neuron.circuit_failure_threshold",
+        type=int,
+        help="Consecutive failed or timed out queries after which a miner is skipped until its cooldown ends. Set to 0 to never skip miners.",
+        default=3,
+    )
+
+    parser.add_argument(
+        "--neuron.circuit_cooldown",
+        type=float,
+        help="Seconds a failing miner is skipped before a single probe query is sent to it again.",
+        default=300,
+    )
+
+    parser.add_argument(
+        "--neuron.sampler_exploration",
+        type=float,
+        help="Fraction of every query batch picked uniformly at random by the ucb and thompson samplers, so every miner keeps being queried.",
+        default=0.1,
+    )
+
+    parser.add_argument(
+        "--neuron.pipelined",
+        action=argparse.BooleanOptionalAction,
+        help="Forwards run as a continuous pipeline while syncing, weight setting and checkpointing run as background tasks, so no forward waits for a slower one. With --no-neuron.pipelined, every step starts num_concurrent_forwards forwards and waits for all of them before syncing.",
+        default=True,
+    )
+
+    parser.add_argument(
+        "--neuron.sync_interval",
+        type=float,
+        help="Seconds between background registration, metagraph and weight checks in pipelined mode.",
+        default=12,
+    )
+
+    parser.add_argument(
+        "--neuron.save_interval",
+        type=float,
+        help="Minimum seconds between full state snapshots written by the background checkpoint writer.",
+        default=60,
+    )
+
+    parser.add_argument(
+        "--neuron.state_format",
+        type=str,
+        choices=["torch", "mmap"],
+        help="Format of the saved validator state: a pickled torch file, or a memory-mapped numpy file that other processes can read while the validator runs.",
+        default="torch",
+    )
+
     parser.add_argument(
         "--neuron.disable_set_weights",
         action="store_true",
@@ -197,6 +411,13 @@ def add_validator_args(cls, parser):
         default=False,
     )
 
+    parser.add_argument(
+        "--neuron.weights_dry_run",
+        action="store_true",
+        help="Computes the weights and logs the set_weights payload instead of submitting it.",
+        default=False,
+    )
+
     parser.add_argument(
         "--neuron.moving_average_alpha",
         type=float,
@@ -204,6 +425,28 @@ def add_validator_args(cls, parser):
         default=0.1,
     )
 
+    parser.add_argument(
+        "--neuron.duplicate_uid_policy",
+        type=str,
+        choices=["mean", "last"],
+        help="How rewards for a uid scored more than once in the same update are combined.",
+        default="mean",
+    )
+
+    parser.add_argument(
+        "--neuron.score_half_life",
+        type=float,
+        help="Seconds after which the score of a miner that has not been scored halves. Set to 0 to disable decay.",
+        default=0,
+    )
+
+    parser.add_argument(
+        "--neuron.reward_history_window",
+        type=int,
+        help="Number of recent rewards and latencies kept per miner.",
+        default=32,
+    )
+
     parser.add_argument(
         "--neuron.axon_off",
         "--axon_off",
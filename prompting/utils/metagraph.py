@@ -0,0 +1,118 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import torch
+import bittensor as bt
+
+from typing import List
+
+
+class MetagraphDiff:
+    """
+    Per-uid differences between two metagraph snapshots.
+
+    Attributes:
+        old_n (int): Number of uids in the old snapshot.
+        new_n (int): Number of uids in the new snapshot.
+        replaced (List[int]): Uids present in both snapshots whose hotkey changed.
+        axons_changed (List[int]): Uids present in both snapshots whose axon info changed.
+        stake_changed (List[int]): Uids present in both snapshots whose stake changed.
+    """
+
+    def __init__(
+        self,
+        old_n: int,
+        new_n: int,
+        replaced: List[int],
+        axons_changed: List[int],
+        stake_changed: List[int],
+    ):
+        self.old_n = old_n
+        self.new_n = new_n
+        self.replaced = replaced
+        self.axons_changed = axons_changed
+        self.stake_changed = stake_changed
+
+    @property
+    def added(self) -> List[int]:
+        """Uids that only exist in the new snapshot."""
+        return list(range(self.old_n, self.new_n))
+
+    @property
+    def changed(self) -> bool:
+        """True if any uid was added, replaced or had its axon or stake changed."""
+        return bool(
+            self.new_n != self.old_n
+            or self.replaced
+            or self.axons_changed
+            or self.stake_changed
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"MetagraphDiff(old_n={self.old_n}, new_n={self.new_n}, added={len(self.added)}, "
+            f"replaced={len(self.replaced)}, axons_changed={len(self.axons_changed)}, "
+            f"stake_changed={len(self.stake_changed)})"
+        )
+
+
+def diff_metagraphs(
+    old: "bt.metagraph",
+    new: "bt.metagraph",
+    old_hotkeys: List[str] = None,
+) -> MetagraphDiff:
+    """
+    Computes the per-uid differences of hotkeys, axons and stake between two metagraph snapshots.
+
+    Args:
+        old (bt.metagraph): The snapshot currently in use.
+        new (bt.metagraph): The freshly synced snapshot.
+        old_hotkeys (List[str]): Hotkeys to compare against instead of `old.hotkeys`, e.g. hotkeys restored from a
+            saved state.
+    Returns:
+        MetagraphDiff: The uids that changed between both snapshots.
+    """
+    if old_hotkeys is None:
+        old_hotkeys = old.hotkeys
+    new_hotkeys = new.hotkeys
+
+    common = min(len(old_hotkeys), len(new_hotkeys))
+    replaced = [
+        uid for uid in range(common) if old_hotkeys[uid] != new_hotkeys[uid]
+    ]
+
+    common_axons = min(len(old.axons), len(new.axons))
+    axons_changed = [
+        uid for uid in range(common_axons) if old.axons[uid] != new.axons[uid]
+    ]
+
+    old_stake = torch.as_tensor(old.S)
+    new_stake = torch.as_tensor(new.S)
+    common_stake = min(len(old_stake), len(new_stake))
+    stake_changed = (
+        torch.nonzero(old_stake[:common_stake] != new_stake[:common_stake])
+        .flatten()
+        .tolist()
+    )
+
+    return MetagraphDiff(
+        old_n=len(old_hotkeys),
+        new_n=len(new_hotkeys),
+        replaced=replaced,
+        axons_changed=axons_changed,
+        stake_changed=stake_changed,
+    )
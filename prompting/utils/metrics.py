@@ -0,0 +1,245 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import math
+import time
+import torch
+import bisect
+import asyncio
+
+from collections import deque
+
+
+class IdleTracker:
+    """
+    Tracks how long a pipeline spends with no work in flight.
+
+    Call `begin` when a unit of work starts and `end` when it finishes. Time during which
+    no unit of work is in flight is accumulated as idle time.
+
+    Example:
+        tracker = IdleTracker()
+        tracker.begin()
+        await forward()
+        tracker.end()
+        bt.logging.info(f"idle {tracker.idle_seconds_per_hour():.1f}s/hour")
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.in_flight = 0
+        self.idle_seconds = 0.0
+        self._idle_since = self.started_at
+
+    def begin(self):
+        """Marks the start of a unit of work."""
+        if self.in_flight == 0 and self._idle_since is not None:
+            self.idle_seconds += time.monotonic() - self._idle_since
+            self._idle_since = None
+        self.in_flight += 1
+
+    def end(self):
+        """Marks the end of a unit of work."""
+        self.in_flight = max(self.in_flight - 1, 0)
+        if self.in_flight == 0:
+            self._idle_since = time.monotonic()
+
+    def total_idle_seconds(self) -> float:
+        """Returns the idle time accumulated so far, including the current idle period."""
+        idle = self.idle_seconds
+        if self._idle_since is not None:
+            idle += time.monotonic() - self._idle_since
+        return idle
+
+    def idle_seconds_per_hour(self) -> float:
+        """Returns the idle time normalized to seconds per hour of runtime."""
+        elapsed = time.monotonic() - self.started_at
+        if elapsed <= 0:
+            return 0.0
+        return self.total_idle_seconds() / elapsed * 3600
+
+
+class RateMeter:
+    """
+    Measures the rate of events over a sliding time window.
+
+    Args:
+        window (float): Length of the sliding window in seconds.
+    """
+
+    def __init__(self, window: float = 60.0):
+        self.window = window
+        self.started_at = time.monotonic()
+        self._events = deque()
+
+    def mark(self):
+        """Records a single event."""
+        now = time.monotonic()
+        self._events.append(now)
+        self._expire(now)
+
+    def _expire(self, now: float):
+        while self._events and self._events[0] < now - self.window:
+            self._events.popleft()
+
+    def rate(self) -> float:
+        """Returns events per second over the window, or over the runtime if shorter."""
+        now = time.monotonic()
+        self._expire(now)
+        span = min(self.window, now - self.started_at)
+        if span <= 0:
+            return 0.0
+        return len(self._events) / span
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop lag: how much later than requested a periodic timer actually fires.
+
+    Anything that blocks the event loop thread, such as a synchronous chain call made from a coroutine, shows up as
+    lag. Run `monitor` as a task on the loop to be measured.
+
+    Args:
+        interval (float): Seconds between probes.
+    """
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.last = 0.0
+        self.max = 0.0
+        self.total = 0.0
+        self.samples = 0
+
+    def record(self, lag: float):
+        lag = max(lag, 0.0)
+        self.last = lag
+        self.max = max(self.max, lag)
+        self.total += lag
+        self.samples += 1
+
+    def mean(self) -> float:
+        return self.total / self.samples if self.samples else 0.0
+
+    def reset(self):
+        self.last = self.max = self.total = 0.0
+        self.samples = 0
+
+    async def monitor(self):
+        """Probes the running loop until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(loop.time() - expected)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket histogram of latencies in seconds.
+
+    `counts[i]` is the number of samples no larger than `bounds[i]` and larger than the previous bound; the last
+    count holds samples above every bound.
+
+    Args:
+        bounds (tuple): Increasing bucket upper bounds in seconds.
+    """
+
+    DEFAULT_BOUNDS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self, bounds: tuple = DEFAULT_BOUNDS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.samples = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.total += seconds
+        self.samples += 1
+
+    def mean(self) -> float:
+        return self.total / self.samples if self.samples else 0.0
+
+    def as_dict(self) -> dict:
+        """Returns the counts keyed by bucket upper bound, "+inf" for the overflow bucket."""
+        labels = [str(bound) for bound in self.bounds] + ["+inf"]
+        return dict(zip(labels, self.counts))
+
+
+class LogHistogram:
+    """
+    Streaming histogram with logarithmic buckets, in the spirit of HDR histograms: every value between `min_value`
+    and `max_value` is counted in a bucket at most `precision` wider, relatively, than the value itself, so quantiles
+    carry at most that relative error at a fixed memory cost.
+
+    To follow changes in the distribution, all counts are halved whenever more than `max_samples` have accumulated,
+    which weighs recent samples more.
+
+    Args:
+        min_value (float): Smallest value resolved, smaller values count in the first bucket.
+        max_value (float): Largest value resolved, larger values count in the last bucket.
+        precision (float): Relative bucket width.
+        max_samples (float): Total count that triggers halving. Non-positive never halves.
+    """
+
+    def __init__(
+        self,
+        min_value: float = 1e-3,
+        max_value: float = 600.0,
+        precision: float = 0.01,
+        max_samples: float = 10000,
+    ):
+        self.min_value = min_value
+        self.max_samples = max_samples
+        self._log_base = math.log1p(precision)
+        n_buckets = (
+            int(math.ceil(math.log(max_value / min_value) / self._log_base))
+            + 1
+        )
+        self.counts = torch.zeros(n_buckets, dtype=torch.float64)
+
+    @property
+    def samples(self) -> float:
+        return float(self.counts.sum())
+
+    def observe(self, values):
+        """Counts one value or a tensor of values."""
+        values = torch.as_tensor(values, dtype=torch.float64).flatten()
+        values = values[~torch.isnan(values)]
+        if not len(values):
+            return
+        buckets = torch.floor(
+            torch.log(values.clamp(min=self.min_value) / self.min_value)
+            / self._log_base
+        ).long()
+        buckets.clamp_(0, len(self.counts) - 1)
+        self.counts.index_add_(0, buckets, torch.ones_like(values))
+        if self.max_samples > 0 and self.samples > self.max_samples:
+            self.counts.mul_(0.5)
+
+    def quantile(self, q: float) -> float:
+        """Returns the `q` quantile (0-1), the upper bound of the bucket holding it. NaN without samples."""
+        total = self.samples
+        if total <= 0:
+            return float("nan")
+        cumulative = torch.cumsum(self.counts, 0)
+        bucket = int(
+            torch.searchsorted(cumulative, q * total).clamp(
+                max=len(self.counts) - 1
+            )
+        )
+        return self.min_value * math.exp((bucket + 1) * self._log_base)
@@ -16,97 +16,8 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
-import time
 import math
 import hashlib as rpccheckhealth
-from math import floor
-from typing import Callable, Any
-from functools import lru_cache, update_wrapper
 
-
-# LRU Cache with TTL
-def ttl_cache(maxsize: int = 128, typed: bool = False, ttl: int = -1):
-    """
-    Decorator that creates a cache of the most recently used function calls with a time-to-live (TTL) feature.
-    The cache evicts the least recently used entries if the cache exceeds the `maxsize` or if an entry has
-    been in the cache longer than the `ttl` period.
-
-    Args:
-        maxsize (int): Maximum size of the cache. Once the cache grows to this size, subsequent entries
-                       replace the least recently used ones. Defaults to 128.
-        typed (bool): If set to True, arguments of different types will be cached separately. For example,
-                      f(3) and f(3.0) will be treated as distinct calls with distinct results. Defaults to False.
-        ttl (int): The time-to-live for each cache entry, measured in seconds. If set to a non-positive value,
-                   the TTL is set to a very large number, effectively making the cache entries permanent. Defaults to -1.
-
-    Returns:
-        Callable: A decorator that can be applied to functions to cache their return values.
-
-    The decorator is useful for caching results of functions that are expensive to compute and are called
-    with the same arguments frequently within short periods of time. The TTL feature helps in ensuring
-    that the cached values are not stale.
-
-    Example:
-        @ttl_cache(ttl=10)
-        def get_data(param):
-            # Expensive data retrieval operation
-            return data
-    """
-    if ttl <= 0:
-        ttl = 65536
-    hash_gen = _ttl_hash_gen(ttl)
-
-    def wrapper(func: Callable) -> Callable:
-        @lru_cache(maxsize, typed)
-        def ttl_func(ttl_hash, *args, **kwargs):
-            return func(*args, **kwargs)
-
-        def wrapped(*args, **kwargs) -> Any:
-            th = next(hash_gen)
-            return ttl_func(th, *args, **kwargs)
-
-        return update_wrapper(wrapped, func)
-
-    return wrapper
-
-
-def _ttl_hash_gen(seconds: int):
-    """
-    Internal generator function used by the `ttl_cache` decorator to generate a new hash value at regular
-    time intervals specified by `seconds`.
-
-    Args:
-        seconds (int): The number of seconds after which a new hash value will be generated.
-
-    Yields:
-        int: A hash value that represents the current time interval.
-
-    This generator is used to create time-based hash values that enable the `ttl_cache` to determine
-    whether cached entries are still valid or if they have expired and should be recalculated.
-    """
-    start_time = time.time()
-    while True:
-        yield floor((time.time() - start_time) / seconds)
-
-
-# 12 seconds updating block.
-@ttl_cache(maxsize=1, ttl=12)
-def ttl_get_block(self) -> int:
-    """
-    Retrieves the current block number from the blockchain. This method is cached with a time-to-live (TTL)
-    of 12 seconds, meaning that it will only refresh the block number from the blockchain at most every 12 seconds,
-    reducing the number of calls to the underlying blockchain interface.
-
-    Returns:
-        int: The current block number on the blockchain.
-
-    This method is useful for applications that need to access the current block number frequently and can
-    tolerate a delay of up to 12 seconds for the latest information. By using a cache with TTL, the method
-    efficiently reduces the workload on the blockchain interface.
-
-    Example:
-        current_block = ttl_get_block(self)
-
-    Note: self here is the miner or validator instance
-    """
-    return self.subtensor.get_current_block()
+# Re-exported, `ttl_cache` used to be defined here.
+from prompting.utils.cache import ttl_cache
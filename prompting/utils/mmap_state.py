@@ -0,0 +1,278 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""
+Memory-mapped validator state, readable without pickle by other processes on the same host.
+
+The state lives in two numpy `.npy` files:
+
+- `<path>`: a structured array of shape [2, n], two slots of one record per uid holding the hotkey, score,
+  last-scored time, last-update block and the reward/latency history ring buffers.
+- `<path>.header.npy`: a single structured record with the format version, sizes, the active slot, a generation
+  counter, the step and the last delta sequence number included.
+
+The writer updates the inactive slot in place and then flips `active` and bumps `generation`. A reader that read
+generation `g` before looking at the active slot got a consistent view as long as the generation is still `g`
+afterwards: the slot active at `g` is the one the save after the next rewrites, and the next save bumps the generation
+to `g + 1` before that one starts. When the number of uids changes, the new file is written with the snapshot in both
+slots before it replaces the old one, so it is valid whichever slot the header still points at.
+
+Example, from a dashboard process:
+    reader = MmapStateReader("~/.bittensor/miners/.../validator/state.npy")
+    state = reader.read()
+    print(state["scores"], state["hotkeys"])
+"""
+
+import os
+import time
+import torch
+import numpy as np
+
+from typing import Optional, Tuple
+
+FORMAT_VERSION = 1
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("version", "<u4"),
+        ("window", "<u4"),
+        ("active", "<u4"),
+        ("n", "<u8"),
+        ("generation", "<u8"),
+        ("step", "<i8"),
+        ("delta_seq", "<i8"),
+    ]
+)
+
+
+def record_dtype(window: int) -> np.dtype:
+    """Returns the per-uid record layout for a reward history of `window` samples."""
+    return np.dtype(
+        [
+            ("hotkey", "<U64"),
+            ("score", "<f4"),
+            ("last_scored", "<f8"),
+            ("last_update", "<i8"),
+            ("rewards", "<f4", (window,)),
+            ("latencies", "<f4", (window,)),
+            ("cursor", "<i8"),
+            ("count", "<i8"),
+        ]
+    )
+
+
+def header_path(path: str) -> str:
+    return path + ".header.npy"
+
+
+class MmapStateFile:
+    """
+    Writer side of the memory-mapped state. `save` and `load` take and return the same state dict as
+    `torch.save`/`torch.load` of `BaseValidatorNeuron.state_dict`, so they can be used as the `save_fn` and `load_fn`
+    of the checkpoint writer. The `path` arguments they accept for that purpose are ignored.
+
+    Args:
+        path (str): Path of the data file. The header is written next to it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._header = None
+        self._data = None
+
+    def _open(self) -> bool:
+        if self._header is None and os.path.exists(header_path(self.path)):
+            self._header = np.load(header_path(self.path), mmap_mode="r+")
+            if int(self._header["version"]) != FORMAT_VERSION:
+                raise ValueError(
+                    f"Unsupported state format version {int(self._header['version'])} in {self.path}"
+                )
+        if self._data is None and os.path.exists(self.path):
+            self._data = np.load(self.path, mmap_mode="r+")
+        return self._header is not None and self._data is not None
+
+    def _create_header(self):
+        tmp_path = header_path(self.path) + ".tmp.npy"
+        header = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=HEADER_DTYPE, shape=()
+        )
+        header["version"] = FORMAT_VERSION
+        header.flush()
+        del header
+        os.replace(tmp_path, header_path(self.path))
+        self._header = np.load(header_path(self.path), mmap_mode="r+")
+
+    def save(self, state: dict, path: str = None):
+        """Writes `state` into the inactive slot in place and makes it the active one."""
+        n = len(state["scores"])
+        window = state["reward_history"]["rewards"].shape[1]
+        self._open()
+        if self._header is None:
+            self._create_header()
+
+        slot = 1 - int(self._header["active"])
+        if (
+            self._data is None
+            or self._data.shape[1] != n
+            or self._data.dtype != record_dtype(window)
+        ):
+            # The size changed: build the new file on the side and swap it in, readers of the old one are unaffected.
+            tmp_path = self.path + ".tmp.npy"
+            data = np.lib.format.open_memmap(
+                tmp_path, mode="w+", dtype=record_dtype(window), shape=(2, n)
+            )
+            # Both slots hold the snapshot, so the file is valid whichever slot the header points at, even if the
+            # writer dies between the swap and the header flip.
+            fill_records(data[slot], state)
+            data[1 - slot] = data[slot]
+            data.flush()
+            del data
+            os.replace(tmp_path, self.path)
+            self._data = np.load(self.path, mmap_mode="r+")
+        else:
+            fill_records(self._data[slot], state)
+            self._data.flush()
+
+        self._header["n"] = n
+        self._header["window"] = window
+        self._header["step"] = state["step"]
+        self._header["delta_seq"] = state.get("delta_seq", 0)
+        self._header["active"] = slot
+        self._header["generation"] = int(self._header["generation"]) + 1
+        self._header.flush()
+
+    def load(self, path: str = None) -> Optional[dict]:
+        """Reads the active slot back into a state dict, or returns None if no state was written yet."""
+        if not self._open() or int(self._header["generation"]) == 0:
+            return None
+        return records_to_state(
+            self._data[int(self._header["active"])], self._header
+        )
+
+
+def fill_records(records: np.ndarray, state: dict):
+    """Copies the torch state dict used by the validator into a slot of records."""
+    n = len(records)
+    history = state["reward_history"]
+    records["hotkey"] = list(state["hotkeys"][:n]) + [""] * max(
+        n - len(state["hotkeys"]), 0
+    )
+    records["score"] = state["scores"].cpu().numpy()
+    records["last_scored"] = state["last_scored"].cpu().numpy()
+    last_update = np.zeros(n, dtype=np.int64)
+    if state.get("last_update") is not None:
+        block = np.asarray(state["last_update"], dtype=np.int64)[:n]
+        last_update[: len(block)] = block
+    records["last_update"] = last_update
+    records["rewards"] = history["rewards"][:n].cpu().numpy()
+    records["latencies"] = history["latencies"][:n].cpu().numpy()
+    records["cursor"] = history["cursor"][:n].cpu().numpy()
+    records["count"] = history["count"][:n].cpu().numpy()
+
+
+def records_to_state(records: np.ndarray, header: np.ndarray) -> dict:
+    """Converts a slot of records into the torch state dict used by the validator."""
+    n = int(header["n"])
+    return {
+        "step": int(header["step"]),
+        "delta_seq": int(header["delta_seq"]),
+        "scores": torch.from_numpy(np.array(records["score"])),
+        "last_scored": torch.from_numpy(np.array(records["last_scored"])),
+        "last_update": torch.from_numpy(np.array(records["last_update"])),
+        "hotkeys": [str(hotkey) for hotkey in records["hotkey"][:n]],
+        "reward_history": {
+            "rewards": torch.from_numpy(np.array(records["rewards"])),
+            "latencies": torch.from_numpy(np.array(records["latencies"])),
+            "cursor": torch.from_numpy(np.array(records["cursor"])),
+            "count": torch.from_numpy(np.array(records["count"])),
+        },
+    }
+
+
+class MmapStateReader:
+    """
+    Read-only access to a memory-mapped validator state for external tools. Never takes a lock on the writer.
+
+    Args:
+        path (str): Path of the data file, e.g. `<neuron.full_path>/state.npy`.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self._header = None
+        self._data = None
+        self._data_inode = None
+
+    def _open_data(self):
+        self._data_inode = os.stat(self.path).st_ino
+        self._data = np.load(self.path, mmap_mode="r")
+
+    def view(self) -> Tuple[Optional[np.ndarray], int]:
+        """
+        Returns a zero-copy view of the active slot and the generation it belongs to. A copy of the view is
+        consistent if `is_consistent(generation)` holds once it was taken. The view is None if the writer is in the middle of resizing.
+        """
+        if self._header is None:
+            self._header = np.load(header_path(self.path), mmap_mode="r")
+            if int(self._header["version"]) != FORMAT_VERSION:
+                raise ValueError(
+                    f"Unsupported state format version {int(self._header['version'])} in {self.path}"
+                )
+        generation = int(self._header["generation"])
+        active = int(self._header["active"])
+        n = int(self._header["n"])
+        if self._data is None or os.stat(self.path).st_ino != self._data_inode:
+            # The writer grew the state into a new file.
+            self._open_data()
+        if self._data.shape[1] != n:
+            return None, generation
+        return self._data[active], generation
+
+    def is_consistent(self, generation: int) -> bool:
+        """True if no save completed since `generation`, so the slot that was active then cannot be half rewritten."""
+        return int(self._header["generation"]) == generation
+
+    def read(self, retries: int = 10, backoff: float = 0.001) -> dict:
+        """
+        Returns a consistent copy of the state as a dict of numpy arrays.
+
+        Args:
+            retries (int): Attempts before giving up while the writer keeps saving or resizing.
+            backoff (float): Seconds to wait after the first failed attempt, doubled after every further one.
+        """
+        for attempt in range(retries):
+            if attempt:
+                time.sleep(backoff * 2 ** (attempt - 1))
+            records, generation = self.view()
+            if records is None:
+                continue
+            copy = np.array(records)
+            if self.is_consistent(generation):
+                return {
+                    "generation": generation,
+                    "step": int(self._header["step"]),
+                    "hotkeys": copy["hotkey"].tolist(),
+                    "scores": copy["score"],
+                    "last_scored": copy["last_scored"],
+                    "last_update": copy["last_update"],
+                    "rewards": copy["rewards"],
+                    "latencies": copy["latencies"],
+                    "count": copy["count"],
+                }
+        raise RuntimeError(
+            f"Could not get a consistent read of {self.path} after {retries} attempts"
+        )
@@ -0,0 +1,314 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import time
+import asyncio
+import functools
+import threading
+import concurrent.futures
+
+from collections import Counter, defaultdict
+from typing import Any, Callable, Optional
+
+import bittensor as bt
+
+from prompting.utils.cache import COALESCED, HIT, TTLCache
+from prompting.utils.metrics import LatencyHistogram, RateMeter
+
+# Subtensor queries whose answer only changes with subnet governance, cached for `hyperparameter_ttl` seconds.
+HYPERPARAMETER_METHODS = frozenset(
+    [
+        "get_subnet_hyperparameters",
+        "min_allowed_weights",
+        "max_weight_limit",
+        "tempo",
+        "weights_rate_limit",
+        "immunity_period",
+        "difficulty",
+    ]
+)
+
+# Seconds between blocks.
+BLOCK_TIME = 12
+
+
+class AsyncSubtensor:
+    """
+    Facade that runs blocking subtensor calls on a bounded thread pool with per-call timeouts.
+
+    Blocking callers use `call`, which waits for the result for at most `timeout` seconds. Coroutines use `acall`,
+    which awaits the result without blocking the event loop. In both cases a slow chain endpoint raises a
+    `TimeoutError` instead of stalling the caller indefinitely.
+
+    Note that a timed out call keeps occupying its worker thread until the underlying RPC returns, which is why the
+    pool is bounded: a hung endpoint can exhaust at most `max_workers` threads.
+
+    Args:
+        subtensor (bt.subtensor): The subtensor connection to wrap.
+        max_workers (int): Maximum number of chain calls running at once.
+        timeout (float): Default per-call timeout in seconds.
+
+    Example:
+        chain = AsyncSubtensor(subtensor, max_workers=4, timeout=30)
+        block = chain.call(subtensor.get_current_block)
+        registered = await chain.acall(
+            subtensor.is_hotkey_registered, netuid=1, hotkey_ss58=hotkey
+        )
+    """
+
+    def __init__(
+        self,
+        subtensor: "bt.subtensor",
+        max_workers: int = 4,
+        timeout: float = 60,
+    ):
+        self.subtensor = subtensor
+        self.timeout = timeout
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="subtensor"
+        )
+        self.calls = 0
+        self.timeouts = 0
+
+    def _timed_out(self, fn: Callable, timeout: float) -> TimeoutError:
+        self.timeouts += 1
+        name = getattr(fn, "__name__", repr(fn))
+        bt.logging.warning(f"Chain call {name} timed out after {timeout}s")
+        return TimeoutError(f"Chain call {name} timed out after {timeout}s")
+
+    def call(
+        self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs
+    ) -> Any:
+        """Runs `fn(*args, **kwargs)` on the pool and blocks for at most `timeout` seconds."""
+        timeout = self.timeout if timeout is None else timeout
+        self.calls += 1
+        future = self.executor.submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            raise self._timed_out(fn, timeout)
+
+    async def acall(
+        self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs
+    ) -> Any:
+        """Runs `fn(*args, **kwargs)` on the pool and awaits it for at most `timeout` seconds."""
+        timeout = self.timeout if timeout is None else timeout
+        self.calls += 1
+        future = asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(fn, *args, **kwargs)
+        )
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out(fn, timeout)
+
+    def shutdown(self):
+        """Stops accepting new calls without waiting for the ones still running."""
+        self.executor.shutdown(wait=False)
+
+
+class CachingSubtensor:
+    """
+    Subtensor proxy that answers the queries neurons make on their hot paths without an RPC where possible, and
+    accounts for every RPC it does make.
+
+    - `is_hotkey_registered` and `subnetwork_n` for the neuron's own subnet are answered from the current metagraph
+      snapshot, so a deregistration is noticed at the next metagraph resync instead of the next step.
+    - `get_current_block` is cached for one block time, `latest_block` always asks the chain.
+    - Subnet hyperparameters (`HYPERPARAMETER_METHODS`) are cached for `hyperparameter_ttl` seconds.
+
+    Concurrent identical cache misses are coalesced into a single RPC whose result all callers share. Every other
+    attribute is passed through to the wrapped subtensor, with calls counted and timed. `stats` reports per-method
+    RPC counts, cache hits, coalesced calls and latency histograms.
+
+    The proxy is synchronous, like the subtensor it wraps, so it still goes through `AsyncSubtensor` for timeouts.
+
+    Args:
+        subtensor (bt.subtensor): The subtensor connection to wrap.
+        metagraph_fn (Callable): Returns the neuron's current metagraph snapshot, or None before there is one.
+        hyperparameter_ttl (float): Seconds cached subnet hyperparameters are reused.
+        block_ttl (float): Seconds the current block is reused.
+    """
+
+    def __init__(
+        self,
+        subtensor: "bt.subtensor",
+        metagraph_fn: Callable[[], Optional["bt.metagraph"]] = lambda: None,
+        hyperparameter_ttl: float = 600,
+        block_ttl: float = BLOCK_TIME,
+    ):
+        self.subtensor = subtensor
+        self.metagraph_fn = metagraph_fn
+        self.hyperparameter_ttl = hyperparameter_ttl
+        self.block_ttl = block_ttl
+
+        self.rpc_calls = Counter()
+        self.hits = Counter()
+        self.coalesced = Counter()
+        self.latency = defaultdict(LatencyHistogram)
+        self.rpc_rate = RateMeter(window=60)
+
+        self._cache = TTLCache(maxsize=1024)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "subtensor":
+            # Not set yet, e.g. while unpickling; do not recurse.
+            raise AttributeError(name)
+        attr = getattr(self.subtensor, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        if name in HYPERPARAMETER_METHODS:
+
+            @functools.wraps(attr)
+            def cached(*args, **kwargs):
+                return self._cached(
+                    name, attr, args, kwargs, self.hyperparameter_ttl
+                )
+
+            return cached
+
+        @functools.wraps(attr)
+        def accounted(*args, **kwargs):
+            return self._rpc(name, attr, args, kwargs)
+
+        return accounted
+
+    def __repr__(self) -> str:
+        return f"CachingSubtensor({self.subtensor})"
+
+    def _rpc(self, name: str, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.rpc_calls[name] += 1
+                self.latency[name].observe(elapsed)
+                self.rpc_rate.mark()
+
+    def _hit(self, name: str):
+        with self._lock:
+            self.hits[name] += 1
+
+    def _cached(
+        self, name: str, fn: Callable, args: tuple, kwargs: dict, ttl: float
+    ) -> Any:
+        key = (name, args, tuple(sorted(kwargs.items())))
+        value, outcome = self._cache.resolve(
+            key, lambda: self._rpc(name, fn, args, kwargs), ttl=ttl
+        )
+        if outcome == HIT:
+            self._hit(name)
+        elif outcome == COALESCED:
+            with self._lock:
+                self.coalesced[name] += 1
+        return value
+
+    def _metagraph(self, netuid: Optional[int], block: Optional[int]):
+        """Returns the current metagraph if it can answer a query about `netuid` at the latest block."""
+        metagraph = self.metagraph_fn()
+        if (
+            block is not None
+            or metagraph is None
+            or metagraph.netuid != netuid
+        ):
+            return None
+        return metagraph
+
+    def is_hotkey_registered(
+        self,
+        hotkey_ss58: str,
+        netuid: Optional[int] = None,
+        block: Optional[int] = None,
+    ) -> bool:
+        metagraph = self._metagraph(netuid, block)
+        if metagraph is not None:
+            self._hit("is_hotkey_registered")
+            return hotkey_ss58 in metagraph.hotkeys
+        return self._rpc(
+            "is_hotkey_registered",
+            self.subtensor.is_hotkey_registered,
+            (hotkey_ss58,),
+            {"netuid": netuid, "block": block},
+        )
+
+    def subnetwork_n(self, netuid: int, block: Optional[int] = None) -> int:
+        metagraph = self._metagraph(netuid, block)
+        if metagraph is not None:
+            self._hit("subnetwork_n")
+            return int(metagraph.n)
+        return self._rpc(
+            "subnetwork_n",
+            self.subtensor.subnetwork_n,
+            (netuid,),
+            {"block": block},
+        )
+
+    def get_current_block(self) -> int:
+        return self._cached(
+            "get_current_block",
+            self.subtensor.get_current_block,
+            (),
+            {},
+            self.block_ttl,
+        )
+
+    def latest_block(self) -> int:
+        """Fetches the current block from the chain, bypassing the cache, and refreshes the cached block with it."""
+        block = self._rpc(
+            "get_current_block", self.subtensor.get_current_block, (), {}
+        )
+        self._cache.set(
+            ("get_current_block", (), ()), block, ttl=self.block_ttl
+        )
+        return block
+
+    @property
+    def block(self) -> int:
+        return self.get_current_block()
+
+    def invalidate(self):
+        """Drops every cached answer, e.g. after an extrinsic that changes them."""
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        """Returns per-method RPC counts, cache hits, coalesced calls and mean latency and latency histogram."""
+        with self._lock:
+            methods = (
+                set(self.rpc_calls) | set(self.hits) | set(self.coalesced)
+            )
+            return {
+                name: {
+                    "rpc_calls": self.rpc_calls[name],
+                    "hits": self.hits[name],
+                    "coalesced": self.coalesced[name],
+                    "mean_latency": self.latency[name].mean()
+                    if name in self.latency
+                    else 0.0,
+                    "latency": self.latency[name].as_dict()
+                    if name in self.latency
+                    else {},
+                }
+                for name in sorted(methods)
+            }
+
+    def rpc_per_minute(self) -> float:
+        with self._lock:
+            return self.rpc_rate.rate() * 60
@@ -1,8 +1,9 @@
 import torch
-import random
 import bittensor as bt
 from typing import List
 
+from prompting.utils.cache import ttl_cache
+
 
 def check_uid_availability(
     metagraph: "bt.metagraph.Metagraph", uid: int, vpermit_tao_limit: int
@@ -26,10 +27,33 @@ def check_uid_availability(
     return True
 
 
+@ttl_cache(maxsize=1)
+def availability_mask(
+    metagraph: "bt.metagraph.Metagraph", vpermit_tao_limit: int
+) -> torch.BoolTensor:
+    """Availability of every uid as a boolean tensor, see `check_uid_availability`.
+
+    Metagraph snapshots are swapped rather than synced in place, so the mask is computed once per snapshot and cached
+    for as long as the snapshot is alive.
+    Args:
+        metagraph (:obj: bt.metagraph.Metagraph): Metagraph object
+        vpermit_tao_limit (int): Validator permit tao limit
+    Returns:
+        torch.BoolTensor: True for every available uid.
+    """
+    serving = torch.tensor(
+        [axon.is_serving for axon in metagraph.axons], dtype=torch.bool
+    )
+    permit = torch.as_tensor(metagraph.validator_permit, dtype=torch.bool)
+    stake = torch.as_tensor(metagraph.S, dtype=torch.float32)
+    return serving & ~(permit & (stake > vpermit_tao_limit))
+
+
 def get_random_uids(
     self, k: int, exclude: List[int] = None
 ) -> torch.LongTensor:
     """Returns k available random uids from the metagraph.
+
     Args:
         k (int): Number of uids to return.
         exclude (List[int]): List of uids to exclude from the random sampling.
@@ -37,27 +61,40 @@ def get_random_uids(
         uids (torch.LongTensor): Randomly sampled available uids.
     Notes:
         If `k` is larger than the number of available `uids`, set `k` to the number of available `uids`.
+        The uids are picked by the validator's `sampler` strategy if it has one, uniformly otherwise. Miners whose
+        circuit breaker in the validator's `health` tracker is open are not available.
     """
-    candidate_uids = []
-    avail_uids = []
-
-    for uid in range(self.metagraph.n.item()):
-        uid_is_available = check_uid_availability(
-            self.metagraph, uid, self.config.neuron.vpermit_tao_limit
-        )
-        uid_is_not_excluded = exclude is None or uid not in exclude
-
-        if uid_is_available:
-            avail_uids.append(uid)
-            if uid_is_not_excluded:
-                candidate_uids.append(uid)
-
-    # Check if candidate_uids contain enough for querying, if not grab all avaliable uids
-    available_uids = candidate_uids
+    available = availability_mask(
+        self.metagraph, self.config.neuron.vpermit_tao_limit
+    )
+    health = getattr(self, "health", None)
+    if health is not None:
+        # Skip miners whose circuit breaker is open.
+        allowed = health.allowed()[: len(available)]
+        available = available.clone()
+        available[: len(allowed)] &= allowed
+    candidates = available.clone()
+    if exclude is not None and len(exclude) > 0:
+        exclude = torch.as_tensor(list(exclude), dtype=torch.long)
+        candidates[
+            exclude[(exclude >= 0) & (exclude < len(candidates))]
+        ] = False
+    candidate_uids = candidates.nonzero().flatten()
+
+    # Check if candidate_uids contain enough for querying, if not grab random excluded available uids
     if len(candidate_uids) < k:
-        available_uids += random.sample(
-            [uid for uid in avail_uids if uid not in candidate_uids],
-            k - len(candidate_uids),
-        )
-    uids = torch.tensor(random.sample(available_uids, k))
+        excluded_uids = (available & ~candidates).nonzero().flatten()
+        padding = excluded_uids[torch.randperm(len(excluded_uids))][
+            : k - len(candidate_uids)
+        ]
+        candidate_uids = torch.cat([candidate_uids, padding])
+    k = min(k, len(candidate_uids))
+
+    sampler = getattr(self, "sampler", None)
+    if sampler is None:
+        uids = candidate_uids[torch.randperm(len(candidate_uids))[:k]]
+    else:
+        uids = sampler.sample(candidate_uids, k, self.reward_history)
+    if health is not None:
+        health.mark_probing(uids)
     return uids
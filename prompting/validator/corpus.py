@@ -0,0 +1,299 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""
+Prompt corpus the validator samples its queries from, kept on disk instead of in memory.
+
+The corpus is a JSONL file with one prompt per line, either a JSON string or an object:
+
+    {"prompt": "Tell me a joke.", "character_info": "...", "criteria": ["..."]}
+
+where `character_info` and `criteria` default to those of `DEFAULT_PROMPT`. Blank lines are ignored.
+
+A first pass over the file writes an offset index next to it, `<path>.index.npy`: an [n + 1, 2] uint64 array whose
+first row holds the size and modification time of the corpus it was built for and whose other rows hold the start
+and end byte offsets of every prompt. It is rebuilt whenever the corpus changes. Both files are memory-mapped, so
+reading a prompt only touches the pages holding its index row and its line, and the resident memory stays small
+and bounded by what the OS keeps cached, whatever the size of the corpus.
+
+`PromptSource` samples prompts uniformly at random on a background thread and keeps a bounded queue of ready
+`Prompting` synapses, so a forward never waits on the disk or on building its synapse.
+"""
+
+import os
+import json
+import mmap
+import queue
+import threading
+import numpy as np
+import bittensor as bt
+
+from typing import Iterator, Optional, Tuple
+
+from prompting.protocol import Prompting
+
+# The prompt the template always sent, and the defaults of the fields a corpus line leaves out.
+DEFAULT_PROMPT = {
+    "prompt": "Tell me a joke.",
+    "character_info": "GPT-4, for engaging and informative conversations.",
+    "criteria": ["Ensure accuracy.", "Maintain a friendly tone."],
+}
+
+
+def index_path(path: str) -> str:
+    return path + ".index.npy"
+
+
+def _line_spans(
+    buffer: mmap.mmap, block_size: int
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yields the start and end offsets of the non-empty lines of `buffer`, one block at a time."""
+    size = len(buffer)
+    start = 0
+    for offset in range(0, size, block_size):
+        block = np.frombuffer(
+            buffer,
+            dtype=np.uint8,
+            count=min(block_size, size - offset),
+            offset=offset,
+        )
+        newlines = (
+            np.flatnonzero(block == ord("\n")).astype(np.uint64) + offset
+        )
+        if len(newlines) == 0:
+            continue
+        starts = np.concatenate(
+            [np.array([start], dtype=np.uint64), newlines[:-1] + 1]
+        )
+        start = int(newlines[-1]) + 1
+        keep = newlines > starts
+        yield starts[keep], newlines[keep]
+    if start < size:
+        yield np.array([start], dtype=np.uint64), np.array(
+            [size], dtype=np.uint64
+        )
+
+
+def build_index(path: str, block_size: int = 1 << 22) -> str:
+    """
+    Writes the offset index of the corpus at `path`, see the module docstring, and returns its path.
+
+    The corpus is scanned twice in blocks of `block_size` bytes, first counting the prompts and then writing their
+    offsets into the memory-mapped index, so building it needs no more memory than a block.
+    """
+    stat = os.stat(path)
+    target = index_path(path)
+    tmp_path = target + ".tmp"
+    with open(path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as buffer:
+        n = sum(len(starts) for starts, _ in _line_spans(buffer, block_size))
+        index = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.uint64, shape=(n + 1, 2)
+        )
+        index[0] = (stat.st_size, stat.st_mtime_ns)
+        row = 1
+        for starts, ends in _line_spans(buffer, block_size):
+            index[row : row + len(starts), 0] = starts
+            index[row : row + len(starts), 1] = ends
+            row += len(starts)
+        index.flush()
+        del index
+    os.replace(tmp_path, target)
+    return target
+
+
+def parse_prompt(line: bytes) -> dict:
+    """Parses a corpus line into a prompt record with every field of `DEFAULT_PROMPT`."""
+    try:
+        record = json.loads(line)
+    except ValueError as err:
+        raise ValueError(f"Invalid corpus line: {err}") from err
+    if isinstance(record, str):
+        record = {"prompt": record}
+    if not isinstance(record, dict) or not isinstance(
+        record.get("prompt"), str
+    ):
+        raise ValueError(f"Corpus line has no prompt: {line[:100]!r}")
+    return {**DEFAULT_PROMPT, **record}
+
+
+def build_prompting(record: dict) -> Prompting:
+    """Returns the synapse querying miners with a prompt record."""
+    prompting = Prompting(
+        character_info=record["character_info"],
+        criteria=list(record["criteria"]),
+        messages=[],
+    )
+    prompting.add_message(record["prompt"])
+    return prompting
+
+
+class PromptCorpus:
+    """
+    Random access to the prompts of a JSONL corpus through its memory-mapped offset index.
+
+    The index is built, or rebuilt when the corpus changed since, on opening.
+
+    Args:
+        path (str): Path of the JSONL corpus.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        stat = os.stat(self.path)
+        if stat.st_size == 0:
+            raise ValueError(f"Prompt corpus {self.path} is empty")
+
+        index = self._load_index(stat)
+        if index is None:
+            bt.logging.info(f"Building the offset index of {self.path}")
+            build_index(self.path)
+            index = self._load_index(stat)
+        if index is None or len(index) < 2:
+            raise ValueError(f"Prompt corpus {self.path} has no prompts")
+        self.index = index
+
+        self._file = open(self.path, "rb")
+        self._buffer = mmap.mmap(
+            self._file.fileno(), 0, access=mmap.ACCESS_READ
+        )
+
+    def _load_index(self, stat: os.stat_result) -> Optional[np.ndarray]:
+        """Returns the memory-mapped index if it was built for the corpus as it is now."""
+        try:
+            index = np.load(index_path(self.path), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if index.ndim != 2 or tuple(index[0]) != (
+            stat.st_size,
+            stat.st_mtime_ns,
+        ):
+            return None
+        return index
+
+    def __len__(self) -> int:
+        return len(self.index) - 1
+
+    def line(self, i: int) -> bytes:
+        """Raw bytes of the `i`-th prompt."""
+        if not 0 <= i < len(self):
+            raise IndexError(
+                f"Prompt {i} out of range for a corpus of {len(self)}"
+            )
+        start, end = self.index[i + 1]
+        return self._buffer[int(start) : int(end)]
+
+    def __getitem__(self, i: int) -> dict:
+        return parse_prompt(self.line(i))
+
+    def close(self):
+        self._buffer.close()
+        self._file.close()
+
+
+class PromptSource:
+    """
+    Hands out the `Prompting` synapse of every forward, sampled uniformly from a corpus.
+
+    A background thread keeps up to `prefetch` synapses ready in a queue. `next` takes one without blocking, and
+    only builds one in place when the queue ran dry. Corpus lines that fail to parse are logged and skipped. Without
+    a corpus every synapse carries `DEFAULT_PROMPT`.
+
+    Args:
+        corpus (PromptCorpus): Corpus to sample from, None for `DEFAULT_PROMPT`.
+        prefetch (int): Synapses kept ready. Non-positive disables the background thread.
+        seed (int): Seed of the sampling, random by default.
+    """
+
+    # Invalid lines sampled in a row before `sample` gives up on the corpus.
+    max_attempts = 100
+
+    def __init__(
+        self,
+        corpus: Optional[PromptCorpus] = None,
+        prefetch: int = 16,
+        seed: Optional[int] = None,
+    ):
+        self.corpus = corpus
+        self.rng = np.random.default_rng(seed)
+        self.misses = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._ready = queue.Queue(maxsize=max(prefetch, 1))
+        self._stop = threading.Event()
+        self._thread = None
+        if corpus is not None and prefetch > 0:
+            self._thread = threading.Thread(
+                target=self._run, name="prompt-prefetch", daemon=True
+            )
+            self._thread.start()
+
+    def sample(self) -> dict:
+        """Returns a random prompt record of the corpus."""
+        if self.corpus is None:
+            return DEFAULT_PROMPT
+        for _ in range(self.max_attempts):
+            with self._lock:
+                i = int(self.rng.integers(len(self.corpus)))
+            try:
+                return self.corpus[i]
+            except ValueError as err:
+                self.skipped += 1
+                bt.logging.warning(
+                    f"Skipping prompt {i} of {self.corpus.path}: {err}"
+                )
+        raise ValueError(
+            f"No valid prompt in {self.max_attempts} samples of {self.corpus.path}"
+        )
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                prompting = build_prompting(self.sample())
+            except Exception as err:
+                bt.logging.error(f"Failed to prefetch a prompt: {err}")
+                self._stop.wait(1)
+                continue
+            # Wait for room, checking now and then whether the source was closed.
+            while not self._stop.is_set():
+                try:
+                    self._ready.put(prompting, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+
+    def next(self) -> Prompting:
+        """Returns the synapse of the next forward."""
+        try:
+            return self._ready.get_nowait()
+        except queue.Empty:
+            if self._thread is not None:
+                self.misses += 1
+            return build_prompting(self.sample())
+
+    def ready(self) -> int:
+        """Number of synapses waiting in the prefetch queue."""
+        return self._ready.qsize()
+
+    def close(self):
+        """Stops the background thread and closes the corpus."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.corpus is not None:
+            self.corpus.close()
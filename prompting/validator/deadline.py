@@ -0,0 +1,74 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import math
+import torch
+
+from prompting.utils.metrics import LogHistogram
+
+
+class AdaptiveDeadline:
+    """
+    Per-request deadline derived from how fast miners actually answer.
+
+    Latencies of successful responses feed a streaming histogram. Timed out responses are recorded at the deadline
+    they timed out at, the only bound known on their latency, so the percentile covers the miners that did not
+    answer in time instead of only the ones that did. The deadline is its `percentile` plus `margin` seconds, clamped to [`min_timeout`, `max_timeout`]. Until `min_samples` latencies were seen, or when
+    `percentile` is 0, the deadline is `max_timeout`.
+
+    Args:
+        max_timeout (float): Upper bound of the deadline, and the deadline while adaptation is off.
+        min_timeout (float): Lower bound of the deadline.
+        percentile (float): Latency percentile (0-100) the deadline covers. 0 disables adaptation.
+        margin (float): Seconds added to the percentile.
+        min_samples (int): Latencies needed before adapting.
+    """
+
+    def __init__(
+        self,
+        max_timeout: float,
+        min_timeout: float = 1.0,
+        percentile: float = 0,
+        margin: float = 0.5,
+        min_samples: int = 50,
+    ):
+        self.max_timeout = max_timeout
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.percentile = percentile
+        self.margin = margin
+        self.min_samples = min_samples
+        self.histogram = LogHistogram()
+
+    def observe(self, latencies: torch.FloatTensor):
+        """Records the latencies of successful responses."""
+        self.histogram.observe(latencies)
+
+    def observe_timeouts(self, count: int, deadline: float):
+        """Records `count` responses that timed out after `deadline` seconds."""
+        if count > 0:
+            self.histogram.observe(torch.full((count,), float(deadline)))
+
+    def current(self) -> float:
+        """Returns the deadline to use for the next request, in seconds."""
+        if self.percentile <= 0 or self.histogram.samples < self.min_samples:
+            return self.max_timeout
+        latency = self.histogram.quantile(self.percentile / 100)
+        if math.isnan(latency):
+            return self.max_timeout
+        return min(
+            max(latency + self.margin, self.min_timeout), self.max_timeout
+        )
@@ -16,11 +16,101 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
+import time
+import torch
+import asyncio
 import bittensor as bt
 
-from prompting.protocol import Prompting
+from typing import Hashable, List, Optional
+
 from prompting.validator.reward import get_rewards
+from prompting.validator.reward_engine import prompt_key
 from prompting.utils.uids import get_random_uids
+from prompting.validator.quorum import (
+    ArrivalScorer,
+    QuorumResult,
+    query_quorum,
+    timed_out,
+)
+
+
+def score_responses(
+    self,
+    uids: torch.LongTensor,
+    responses: List[bt.Synapse],
+    deadline: float,
+    rewards: Optional[torch.FloatTensor] = None,
+    query: Hashable = None,
+    observe: bool = True,
+) -> torch.BoolTensor:
+    """
+    Scores the `responses` of the miners `uids` and records their latency and health.
+
+    Args:
+        deadline (float): Timeout the miners were queried with, the latency of responses without a process time.
+        rewards (torch.FloatTensor): Rewards to use instead of computing them with `get_rewards`.
+        query (Hashable): Query the rewards are computed for, the `prompt_key` of the synapse the miners answered.
+        observe (bool): Whether the responses feed the miners' health and the adaptive deadline. Stragglers the
+            validator cut off at the quorum did not time out, so they do not.
+
+    Returns:
+        torch.BoolTensor: Which of the responses timed out.
+    """
+    if len(responses) == 0:
+        return torch.zeros(0, dtype=torch.bool)
+    if rewards is None:
+        # Adjust the scores based on responses from miners.
+        rewards = get_rewards(self, query=query, responses=responses)
+
+    # Keep how long each miner took to answer, timed out queries count as the full deadline.
+    latencies = torch.FloatTensor(
+        [
+            float(response.dendrite.process_time or deadline)
+            for response in responses
+        ]
+    )
+
+    # Track the health of every queried miner, so dead axons stop taking query slots.
+    status_codes = [response.dendrite.status_code for response in responses]
+    successes = torch.tensor(
+        [code == 200 for code in status_codes], dtype=torch.bool
+    )
+    timeouts = torch.tensor(
+        [code == 408 for code in status_codes], dtype=torch.bool
+    )
+    if observe:
+        self.health.observe(
+            uids, latencies, successes=successes, timeouts=timeouts
+        )
+        self.deadline.observe(latencies[successes])
+        self.deadline.observe_timeouts(int(timeouts.sum()), deadline)
+
+    bt.logging.info(f"Scored responses: {rewards}")
+    # Update the scores based on the rewards. You may want to define your own update_scores function for custom behavior.
+    self.update_scores(rewards, uids, latencies)
+    return timeouts
+
+
+async def score_late_responses(
+    self,
+    uids: torch.LongTensor,
+    result: QuorumResult,
+    deadline: float,
+    query: Hashable,
+):
+    """Scores the responses a quorum query left pending once they land, then lets the sampler hand the miners out again."""
+    try:
+        late = await result.late()
+        responses = [late[i] for i in result.pending]
+        rewards = await asyncio.get_running_loop().run_in_executor(
+            self.reward_executor,
+            lambda: get_rewards(self, query=query, responses=responses),
+        )
+        score_responses(self, uids, responses, deadline, rewards=rewards)
+    except Exception as err:
+        bt.logging.error(f"Failed to score late responses: {err}")
+    finally:
+        self.sampler.release(uids)
 
 
 async def forward(self):
@@ -29,6 +119,13 @@ async def forward(self):
 
     It is responsible for querying the network and scoring the responses.
 
+    With a quorum configured (neuron.quorum, neuron.quorum_successes or neuron.soft_deadline), the step continues as
+    soon as enough miners answered. The responses of the others are scored when they land, or counted as timeouts,
+    depending on neuron.late_policy.
+
+    With neuron.stream_scoring, responses are scored while the others are still pending instead of in one batch after
+    the slowest miner, so reward computation overlaps the network wait.
+
     Args:
         self (:obj:`bittensor.neuron.Neuron`): The neuron object which contains all the necessary state for the validator.
 
@@ -36,33 +133,145 @@ async def forward(self):
     # TODO(developer): Define how the validator selects a miner to query, how often, etc.
     # get_random_uids is an example method, but you can replace it with your own.
     miner_uids = get_random_uids(self, k=self.config.neuron.sample_size)
+    if len(miner_uids) == 0:
+        # Every candidate already has the maximum number of queries in flight, give them time to finish.
+        bt.logging.debug(
+            "No miners available to query, waiting for in-flight queries."
+        )
+        await asyncio.sleep(1)
+        return
 
-    # Assuming Synapse provides certain functionalities required for integration
-    # TODO(developer): Define the Synapse instance for our use case.
-    prompting = Prompting(
-        character_info="GPT-4, for engaging and informative conversations.",
-        criteria=["Ensure accuracy.", "Maintain a friendly tone."],
-        messages=[],
-    )
+    # Miners whose queries outlive this forward, released by the task scoring them instead.
+    late_uids = miner_uids[:0]
 
-    prompting.add_message("Tell me a joke.")
+    # The sampler counts the miners as in flight from here on, so release them whatever fails below.
+    try:
+        # Resyncs swap in a new metagraph snapshot, so hold on to the one this forward started with.
+        metagraph = self.metagraph
 
-    # The dendrite client queries the network.
-    responses = await self.dendrite(
-        # Send the query to selected miner axons in the network.
-        axons=[self.metagraph.axons[uid] for uid in miner_uids],
-        synapse=prompting,
-        # All responses have the deserialize function called on them before returning.
-        # You are encouraged to define your own deserialization function.
-        deserialize=True,
-    )
+        # A prompt sampled from the corpus (neuron.prompt_corpus), its synapse already built by the prefetch thread.
+        prompting = self.prompts.next()
+        # Rewards are computed and cached per prompt, so identical completions to the same prompt are scored once.
+        query = prompt_key(prompting)
 
-    # Log the results for monitoring purposes.
-    bt.logging.info(f"Received responses: {responses}")
+        # Deadline for this step's queries, adapted to how fast miners have been answering.
+        deadline = self.deadline.current()
+        start_time = time.perf_counter()
+        axons = [metagraph.axons[uid] for uid in miner_uids]
+        neuron = self.config.neuron
+        use_quorum = (
+            neuron.quorum < 1
+            or neuron.quorum_successes > 0
+            or neuron.soft_deadline > 0
+            or neuron.stream_scoring
+        )
+        # Scores the responses arriving while the query is still pending, in batches of whatever arrived meanwhile.
+        score_on_arrival = ArrivalScorer(
+            lambda arrived: get_rewards(self, query=query, responses=arrived),
+            executor=self.reward_executor,
+        )
+        loop = asyncio.get_running_loop()
 
-    # Adjust the scores based on responses from miners.
-    rewards = get_rewards(self, query=self.step, responses=responses)
+        if not use_quorum:
+            # The dendrite client queries the network.
+            responses = await self.dendrite(
+                # Send the query to selected miner axons in the network.
+                axons=axons,
+                synapse=prompting,
+                # All responses have the deserialize function called on them before returning.
+                # You are encouraged to define your own deserialization function.
+                deserialize=True,
+                timeout=deadline,
+            )
 
-    bt.logging.info(f"Scored responses: {rewards}")
-    # Update the scores based on the rewards. You may want to define your own update_scores function for custom behavior.
-    self.update_scores(rewards, miner_uids)
+            # Log the results for monitoring purposes.
+            bt.logging.info(f"Received responses: {responses}")
+            # Compute the rewards off the event loop, so the other forwards keep running meanwhile.
+            rewards = await loop.run_in_executor(
+                self.reward_executor,
+                lambda: get_rewards(self, query=query, responses=responses),
+            )
+            timeouts = score_responses(
+                self, miner_uids, responses, deadline, rewards=rewards
+            )
+        else:
+            result = await query_quorum(
+                self.dendrite,
+                axons,
+                prompting,
+                timeout=deadline,
+                quorum=neuron.quorum,
+                min_successes=neuron.quorum_successes,
+                soft_deadline=neuron.soft_deadline,
+                deserialize=True,
+                on_response=score_on_arrival
+                if neuron.stream_scoring
+                else None,
+            )
+            arrived = result.arrived
+            responses = [result.responses[i] for i in arrived]
+            bt.logging.info(
+                f"Received {len(arrived)}/{len(miner_uids)} responses: {responses}"
+            )
+            if neuron.stream_scoring and arrived:
+                rewards = await score_on_arrival.gather(arrived)
+            else:
+                # Compute the rewards off the event loop, so the other forwards keep running meanwhile.
+                rewards = await loop.run_in_executor(
+                    self.reward_executor,
+                    lambda: get_rewards(
+                        self, query=query, responses=responses
+                    ),
+                )
+            timeouts = score_responses(
+                self,
+                miner_uids[arrived],
+                responses,
+                deadline,
+                rewards=rewards,
+                query=query,
+            )
+
+            if result.pending:
+                pending_uids = miner_uids[list(result.pending)]
+                if neuron.late_policy == "timeout":
+                    result.cancel()
+                    timeouts = torch.cat(
+                        [
+                            timeouts,
+                            score_responses(
+                                self,
+                                pending_uids,
+                                [
+                                    timed_out(prompting, deadline)
+                                    for _ in pending_uids
+                                ],
+                                deadline,
+                                rewards=torch.zeros(len(pending_uids)).to(
+                                    self.device
+                                ),
+                                observe=False,
+                            ),
+                        ]
+                    )
+                else:
+                    task = asyncio.create_task(
+                        score_late_responses(
+                            self, pending_uids, result, deadline, query
+                        )
+                    )
+                    self.late_tasks.add(task)
+                    task.add_done_callback(self.late_tasks.discard)
+                    late_uids = pending_uids
+
+        bt.logging.info(
+            f"step({self.step}) deadline({deadline:.2f}s) "
+            f"timeout_rate({timeouts.float().mean().item() if len(timeouts) else 0.0:.2f}) "
+            f"late({len(late_uids)}) wall_time({time.perf_counter() - start_time:.2f}s)"
+        )
+    finally:
+        # Let the sampler hand these miners out again.
+        late = set(late_uids.tolist())
+        self.sampler.release(
+            [uid for uid in miner_uids.tolist() if uid not in late]
+        )
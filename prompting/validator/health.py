@@ -0,0 +1,164 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import time
+import torch
+import threading
+
+from typing import List, Optional, Union
+
+
+class MinerHealth:
+    """
+    Per-uid latency and health tracker driving a circuit breaker.
+
+    Every dendrite response updates an EWMA of the uid's latency and timeout rate and its count of consecutive
+    failures. After `failure_threshold` consecutive failures the uid's breaker opens and sampling skips it. Once
+    `cooldown` seconds have passed the uid becomes eligible again for a single probe query: a successful probe closes
+    the breaker, a failed one keeps it open for another cooldown.
+
+    Args:
+        n (int): Number of uids.
+        alpha (float): EWMA weight of a new observation.
+        failure_threshold (int): Consecutive failures that open the breaker. Non-positive disables the breaker.
+        cooldown (float): Seconds an open breaker waits before allowing a probe.
+    """
+
+    def __init__(
+        self,
+        n: int,
+        alpha: float = 0.2,
+        failure_threshold: int = 3,
+        cooldown: float = 300,
+    ):
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self.latency = torch.full((n,), float("nan"), dtype=torch.float32)
+        self.timeout_rate = torch.zeros(n, dtype=torch.float32)
+        self.consecutive_failures = torch.zeros(n, dtype=torch.long)
+        # Time the breaker opened or the last probe was sent, NaN while closed.
+        self.opened_at = torch.full((n,), float("nan"), dtype=torch.float64)
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.latency)
+
+    def observe(
+        self,
+        uids: Union[torch.LongTensor, List[int]],
+        latencies: torch.FloatTensor,
+        successes: torch.BoolTensor,
+        timeouts: Optional[torch.BoolTensor] = None,
+        now: Optional[float] = None,
+    ):
+        """
+        Records one response per entry of `uids`. Duplicate uids within a call count once.
+
+        Args:
+            uids: The queried uids.
+            latencies: Seconds each response took.
+            successes: Whether each response was successful.
+            timeouts: Whether each response timed out, by default every unsuccessful one.
+            now: Current time, `time.time()` by default.
+        """
+        uids = torch.as_tensor(uids, dtype=torch.long)
+        latencies = torch.as_tensor(latencies, dtype=torch.float32)
+        successes = torch.as_tensor(successes, dtype=torch.bool)
+        timeouts = (
+            ~successes
+            if timeouts is None
+            else torch.as_tensor(timeouts, dtype=torch.bool)
+        )
+        now = time.time() if now is None else now
+
+        with self.lock:
+            previous = self.latency[uids]
+            self.latency[uids] = torch.where(
+                torch.isnan(previous),
+                latencies,
+                (1 - self.alpha) * previous + self.alpha * latencies,
+            )
+            self.timeout_rate[uids] = (1 - self.alpha) * self.timeout_rate[
+                uids
+            ] + self.alpha * timeouts.float()
+
+            failures = self.consecutive_failures[uids] + 1
+            self.consecutive_failures[uids] = torch.where(
+                successes, torch.zeros_like(failures), failures
+            )
+            if self.failure_threshold <= 0:
+                return
+
+            # Successes close the breaker, reaching the threshold (or a failed probe) opens it for a new cooldown.
+            self.opened_at[uids[successes]] = float("nan")
+            tripped = uids[
+                ~successes
+                & (self.consecutive_failures[uids] >= self.failure_threshold)
+            ]
+            self.opened_at[tripped] = now
+
+    def is_open(self, now: Optional[float] = None) -> torch.BoolTensor:
+        """Uids whose breaker is open and still cooling down."""
+        now = time.time() if now is None else now
+        with self.lock:
+            return now - self.opened_at < self.cooldown
+
+    def allowed(self, now: Optional[float] = None) -> torch.BoolTensor:
+        """Uids that may be queried: breaker closed, or open with the cooldown over so a probe is due."""
+        return ~self.is_open(now)
+
+    def mark_probing(
+        self,
+        uids: Union[torch.LongTensor, List[int]],
+        now: Optional[float] = None,
+    ):
+        """Restarts the cooldown of the sampled uids whose breaker is open, so each cooldown allows one probe."""
+        uids = torch.as_tensor(uids, dtype=torch.long)
+        now = time.time() if now is None else now
+        with self.lock:
+            probing = uids[~torch.isnan(self.opened_at[uids])]
+            self.opened_at[probing] = now
+
+    def open_count(self, now: Optional[float] = None) -> int:
+        return int(self.is_open(now).sum())
+
+    def resize(self, n: int):
+        """Grows the tracker to `n` uids, new uids start healthy."""
+        with self.lock:
+            old_n = len(self.latency)
+            if n <= old_n:
+                return
+            grown = MinerHealth(
+                n, self.alpha, self.failure_threshold, self.cooldown
+            )
+            grown.latency[:old_n] = self.latency
+            grown.timeout_rate[:old_n] = self.timeout_rate
+            grown.consecutive_failures[:old_n] = self.consecutive_failures
+            grown.opened_at[:old_n] = self.opened_at
+            self.latency, self.timeout_rate = grown.latency, grown.timeout_rate
+            self.consecutive_failures = grown.consecutive_failures
+            self.opened_at = grown.opened_at
+
+    def reset(self, uids: List[int]):
+        """Forgets the health of `uids`, e.g. when their hotkeys were replaced."""
+        with self.lock:
+            self.latency[uids] = float("nan")
+            self.timeout_rate[uids] = 0
+            self.consecutive_failures[uids] = 0
+            self.opened_at[uids] = float("nan")
@@ -0,0 +1,156 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import torch
+import threading
+
+from typing import List, Optional, Union
+
+
+class RewardHistory:
+    """
+    Preallocated per-uid ring buffer of the last `window` rewards and latencies.
+
+    Both buffers have shape [n, window] and are allocated once, so memory use does not depend on how long the
+    validator runs. Empty slots hold NaN and are ignored by the statistics, which are computed for all uids at once.
+
+    Args:
+        n (int): Number of uids.
+        window (int): Number of samples kept per uid.
+        device (str): Device holding the tensors.
+    """
+
+    def __init__(self, n: int, window: int = 32, device: str = "cpu"):
+        self.window = window
+        self.device = device
+        self.rewards = torch.full(
+            (n, window), float("nan"), dtype=torch.float32, device=device
+        )
+        self.latencies = torch.full_like(self.rewards, float("nan"))
+        self.cursor = torch.zeros(n, dtype=torch.long, device=device)
+        self.count = torch.zeros(n, dtype=torch.long, device=device)
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.rewards)
+
+    def push(
+        self,
+        uids: Union[torch.LongTensor, List[int]],
+        rewards: torch.FloatTensor,
+        latencies: Optional[torch.FloatTensor] = None,
+    ):
+        """Appends one reward (and latency) sample per entry of `uids`."""
+        uids = torch.as_tensor(uids, dtype=torch.long, device=self.device)
+        rewards = torch.as_tensor(rewards, dtype=torch.float32).to(self.device)
+        if latencies is None:
+            latencies = torch.full_like(rewards, float("nan"))
+        latencies = torch.as_tensor(latencies, dtype=torch.float32).to(
+            self.device
+        )
+
+        with self.lock:
+            if len(torch.unique(uids)) != len(uids):
+                # Each write of a vectorized push must target a different row, so push duplicates one at a time.
+                for i in range(len(uids)):
+                    self._push(
+                        uids[i : i + 1],
+                        rewards[i : i + 1],
+                        latencies[i : i + 1],
+                    )
+            else:
+                self._push(uids, rewards, latencies)
+
+    def _push(self, uids, rewards, latencies):
+        slots = self.cursor[uids]
+        self.rewards[uids, slots] = rewards
+        self.latencies[uids, slots] = latencies
+        self.cursor[uids] = (slots + 1) % self.window
+        self.count[uids] = torch.clamp(self.count[uids] + 1, max=self.window)
+
+    def mean(self, latencies: bool = False) -> torch.FloatTensor:
+        """Per-uid mean over the window, NaN for uids without samples."""
+        data = self.latencies if latencies else self.rewards
+        with self.lock:
+            return torch.nanmean(data, dim=1)
+
+    def variance(self, latencies: bool = False) -> torch.FloatTensor:
+        """Per-uid population variance over the window, NaN for uids without samples."""
+        data = self.latencies if latencies else self.rewards
+        with self.lock:
+            mean = torch.nanmean(data, dim=1, keepdim=True)
+            return torch.nanmean((data - mean) ** 2, dim=1)
+
+    def percentile(
+        self, q: float, latencies: bool = False
+    ) -> torch.FloatTensor:
+        """Per-uid `q`-th percentile (0-100) over the window, NaN for uids without samples."""
+        data = self.latencies if latencies else self.rewards
+        with self.lock:
+            return torch.nanquantile(data, q / 100, dim=1)
+
+    def resize(self, n: int):
+        """Grows the buffers to `n` uids, new uids start empty."""
+        with self.lock:
+            if n <= len(self.rewards):
+                return
+            grown = RewardHistory(n, self.window, self.device)
+            old_n = len(self.rewards)
+            grown.rewards[:old_n] = self.rewards
+            grown.latencies[:old_n] = self.latencies
+            grown.cursor[:old_n] = self.cursor
+            grown.count[:old_n] = self.count
+            self.rewards, self.latencies = grown.rewards, grown.latencies
+            self.cursor, self.count = grown.cursor, grown.count
+
+    def reset(self, uids: List[int]):
+        """Clears the history of `uids`, e.g. when their hotkeys were replaced."""
+        with self.lock:
+            self.rewards[uids] = float("nan")
+            self.latencies[uids] = float("nan")
+            self.cursor[uids] = 0
+            self.count[uids] = 0
+
+    def state_dict(self) -> dict:
+        with self.lock:
+            return {
+                "rewards": self.rewards.clone(),
+                "latencies": self.latencies.clone(),
+                "cursor": self.cursor.clone(),
+                "count": self.count.clone(),
+            }
+
+    def load_state_dict(self, state: dict):
+        """Restores a saved history. A different window size discards it, since samples cannot be re-binned."""
+        if state["rewards"].shape[1] != self.window:
+            return
+        with self.lock:
+            n = max(len(self.rewards), len(state["rewards"]))
+            self.rewards = torch.full(
+                (n, self.window),
+                float("nan"),
+                dtype=torch.float32,
+                device=self.device,
+            )
+            self.latencies = torch.full_like(self.rewards, float("nan"))
+            self.cursor = torch.zeros(n, dtype=torch.long, device=self.device)
+            self.count = torch.zeros(n, dtype=torch.long, device=self.device)
+            saved_n = len(state["rewards"])
+            self.rewards[:saved_n] = state["rewards"].to(self.device)
+            self.latencies[:saved_n] = state["latencies"].to(self.device)
+            self.cursor[:saved_n] = state["cursor"].to(self.device)
+            self.count[:saved_n] = state["count"].to(self.device)
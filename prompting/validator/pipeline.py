@@ -0,0 +1,456 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""
+Reward pipeline: cheap filters followed by weighted reward models, sharing one preprocessing of every completion.
+
+A completion first runs through the filters in order. The first filter it fails gives it `filtered_reward` and skips
+everything after, so empty, oversized or error completions never reach tokenization or the reward models. Completions
+that pass are preprocessed once, computing every feature (e.g. sentences) the models declare in `requires`, and the
+models then score them as one batch sharing that preprocessing. The reward is the weighted mean of the models'
+rewards.
+
+Every stage, and the preprocessing, can be timed into a dict of per-stage calls, seconds and rejections.
+
+Streamed completions can be scored while they arrive: models that support it (see `RewardModel.stream`) consume
+every chunk as it comes in, so when the stream closes only the filters and the tail of the completion are left, and
+the reward is the one `score` gives the whole completion. Only `LexiconSentimentReward` streams, so with the default
+TextBlob scorer the whole completion is still scored at close. The validator queries miners with the non-streaming
+`Prompting` synapse and does not call `score_stream`; it is the building block for a validator querying
+`StreamPrompting`.
+"""
+
+import time
+
+from abc import ABC, abstractmethod
+from functools import cached_property
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from prompting.validator.reward import sentiment_reward
+from prompting.validator.sentiment import (
+    LexiconSentiment,
+    SentimentStream,
+    default_lexicon,
+)
+
+if TYPE_CHECKING:
+    import textblob
+
+
+class Completion:
+    """A completion's text, with the preprocessing stages share computed on first use."""
+
+    def __init__(self, query: Hashable, text: str):
+        self.query = query
+        self.text = text
+
+    @cached_property
+    def blob(self) -> "textblob.TextBlob":
+        # Imported on first use, so pipelines without TextBlob models never pay for loading it.
+        import textblob
+
+        return textblob.TextBlob(self.text)
+
+    @cached_property
+    def sentences(self) -> List["textblob.Sentence"]:
+        return self.blob.sentences
+
+    @cached_property
+    def words(self) -> List[str]:
+        return list(self.blob.words)
+
+
+class Filter(ABC):
+    """Cheap check run before any preprocessing. `name` labels its timings and rejections."""
+
+    name = "filter"
+
+    @abstractmethod
+    def check(self, completion: Completion) -> bool:
+        """Returns whether the completion passes, i.e. is worth scoring."""
+        ...
+
+
+class EmptyFilter(Filter):
+    """Rejects completions without any non-whitespace text, e.g. the empty completion of a timed out query."""
+
+    name = "empty"
+
+    def check(self, completion: Completion) -> bool:
+        return bool(completion.text.strip())
+
+
+class LengthFilter(Filter):
+    """Rejects completions longer than `max_chars` characters."""
+
+    name = "oversized"
+
+    def __init__(self, max_chars: int = 10000):
+        self.max_chars = max_chars
+
+    def check(self, completion: Completion) -> bool:
+        return len(completion.text) <= self.max_chars
+
+
+class ErrorFilter(Filter):
+    """Rejects the "Error: ..." completions miners send back from their exception path."""
+
+    name = "error"
+
+    def check(self, completion: Completion) -> bool:
+        return not completion.text.lstrip().startswith("Error:")
+
+
+class RewardModel(ABC):
+    """
+    Scores completions that passed every filter.
+
+    Attributes:
+        name (str): Labels the model's timings.
+        requires (Sequence[str]): `Completion` features the model reads, computed once before any model runs.
+        weight (float): Weight of the model's reward in the pipeline's weighted mean.
+    """
+
+    name = "reward"
+    requires: Sequence[str] = ()
+
+    def __init__(self, weight: float = 1.0):
+        self.weight = weight
+
+    @abstractmethod
+    def reward(self, completion: Completion) -> float:
+        ...
+
+    def rewards(self, completions: List[Completion]) -> List[float]:
+        """Scores a batch of completions, override to vectorize the model."""
+        return [self.reward(completion) for completion in completions]
+
+    def warm_up(self):
+        """Loads whatever the model needs, so the first batch it scores is as fast as the rest."""
+
+    def stream(self) -> Optional["RewardStream"]:
+        """
+        Returns a scorer fed a completion chunk by chunk while it streams in, whose `close()` is the completion's
+        reward, or None when the model can only score whole completions. Of the built-in models only
+        `LexiconSentimentReward` streams.
+        """
+        return None
+
+
+class RewardStream(ABC):
+    """Interface of `RewardModel.stream` scorers, e.g. `prompting.validator.sentiment.SentimentStream`."""
+
+    @abstractmethod
+    def feed(self, text: str):
+        ...
+
+    @abstractmethod
+    def close(self) -> float:
+        ...
+
+
+RewardStream.register(SentimentStream)
+
+
+class SentimentReward(RewardModel):
+    """Normalized mean sentence polarity, the reward the template always used."""
+
+    name = "sentiment"
+    requires = ("sentences",)
+
+    def reward(self, completion: Completion) -> float:
+        return sentiment_reward(completion.sentences)
+
+    def warm_up(self):
+        for sentence in Completion(
+            0, "Warm up the tokenizer. Warm up the lexicon!"
+        ).sentences:
+            sentence.sentiment
+
+
+class LexiconSentimentReward(RewardModel):
+    """
+    The sentiment reward computed by the compiled lexicon scorer in `prompting.validator.sentiment`, batched and
+    without TextBlob. Matches `SentimentReward` within the tolerance documented there.
+    """
+
+    name = "lexicon_sentiment"
+
+    def reward(self, completion: Completion) -> float:
+        return self.rewards([completion])[0]
+
+    def rewards(self, completions: List[Completion]) -> List[float]:
+        scorer = LexiconSentiment()
+        return scorer.score(
+            [completion.text for completion in completions]
+        ).tolist()
+
+    def warm_up(self):
+        default_lexicon()
+
+    def stream(self) -> SentimentStream:
+        return SentimentStream()
+
+
+class RewardPipeline:
+    """
+    Declared filters and reward models, see the module docstring.
+
+    Args:
+        filters (List[Filter]): Run in order, cheapest first.
+        models (List[RewardModel]): Reward models whose weighted mean is the reward.
+        filtered_reward (float): Reward of a completion rejected by a filter.
+
+    Example:
+        pipeline = RewardPipeline(
+            filters=[EmptyFilter(), ErrorFilter()],
+            models=[SentimentReward(weight=0.8), MyRelevanceReward(weight=0.2)],
+        )
+        rewards = pipeline.score(query, completions)
+    """
+
+    def __init__(
+        self,
+        filters: List[Filter],
+        models: List[RewardModel],
+        filtered_reward: float = 0.0,
+    ):
+        self.filters = filters
+        self.models = models
+        self.filtered_reward = filtered_reward
+        self.requires = list(
+            dict.fromkeys(
+                feature for model in models for feature in model.requires
+            )
+        )
+        self.total_weight = sum(model.weight for model in models)
+
+    def _prepare(
+        self, completion: Completion, timings: Dict[str, dict]
+    ) -> bool:
+        """Runs the filters, then the shared preprocessing if they all passed. Returns whether they did."""
+        for stage in self.filters:
+            start = time.perf_counter()
+            passed = stage.check(completion)
+            record(
+                timings, stage.name, time.perf_counter() - start, not passed
+            )
+            if not passed:
+                return False
+
+        start = time.perf_counter()
+        for feature in self.requires:
+            getattr(completion, feature)
+        record(timings, "preprocess", time.perf_counter() - start)
+        return True
+
+    def warm_up(self):
+        """Warms up every model, e.g. as the initializer of reward worker processes."""
+        for model in self.models:
+            model.warm_up()
+
+    def score(
+        self,
+        query: Hashable,
+        completions: List[str],
+        timings: Optional[Dict[str, dict]] = None,
+    ) -> List[float]:
+        """
+        Returns the reward of every completion, in order.
+
+        Args:
+            timings (Dict[str, dict]): If given, the calls, seconds and rejections of every stage are added to it.
+        """
+        timings = {} if timings is None else timings
+        rewards = [self.filtered_reward] * len(completions)
+        passed = [
+            (index, completion)
+            for index, completion in enumerate(
+                Completion(query, text) for text in completions
+            )
+            if self._prepare(completion, timings)
+        ]
+        if not passed:
+            return rewards
+
+        # Models score the passing completions as one batch.
+        totals = [0.0] * len(passed)
+        batch = [completion for _, completion in passed]
+        for model in self.models:
+            start = time.perf_counter()
+            for i, value in enumerate(model.rewards(batch)):
+                totals[i] += model.weight * value
+            record(
+                timings,
+                model.name,
+                time.perf_counter() - start,
+                calls=len(batch),
+            )
+
+        for (index, _), total in zip(passed, totals):
+            rewards[index] = (
+                total / self.total_weight if self.total_weight else 0.0
+            )
+        return rewards
+
+    def __call__(self, query: Hashable, completion: str) -> float:
+        return self.score(query, [completion])[0]
+
+    def stream(self, query: Hashable) -> "StreamingCompletion":
+        """Starts scoring a streamed completion, see `StreamingCompletion`."""
+        return StreamingCompletion(self, query)
+
+
+class StreamingCompletion:
+    """
+    A completion scored by a pipeline while it streams in.
+
+    Every chunk is kept and fed to the streaming scorers of the models that have one. Closing runs the filters on the
+    whole completion, then closes those scorers and scores the completion with the remaining models, giving exactly
+    the reward `RewardPipeline.score` gives the whole completion.
+
+    Example:
+        scored = pipeline.stream(query)
+        async for tokens in synapse.process_streaming_response(response):
+            for token in tokens:
+                scored.feed(token)
+        reward = scored.close()
+    """
+
+    def __init__(self, pipeline: RewardPipeline, query: Hashable):
+        self.pipeline = pipeline
+        self.query = query
+        self.chunks: List[str] = []
+        self.streams = [model.stream() for model in pipeline.models]
+
+    def feed(self, text: str):
+        """Adds the next chunk of the completion."""
+        if not text:
+            return
+        self.chunks.append(text)
+        for stream in self.streams:
+            if stream is not None:
+                stream.feed(text)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+    def close(self, timings: Optional[Dict[str, dict]] = None) -> float:
+        """
+        Returns the reward of the completion fed so far.
+
+        Args:
+            timings (Dict[str, dict]): If given, the calls, seconds and rejections of every stage are added to it.
+        """
+        timings = {} if timings is None else timings
+        pipeline = self.pipeline
+        completion = Completion(self.query, self.text)
+        if not pipeline._prepare(completion, timings):
+            return pipeline.filtered_reward
+
+        total = 0.0
+        for model, stream in zip(pipeline.models, self.streams):
+            start = time.perf_counter()
+            value = (
+                stream.close()
+                if stream is not None
+                else model.rewards([completion])[0]
+            )
+            total += model.weight * value
+            record(timings, model.name, time.perf_counter() - start)
+        return total / pipeline.total_weight if pipeline.total_weight else 0.0
+
+
+async def score_stream(
+    pipeline: RewardPipeline,
+    query: Hashable,
+    chunks: AsyncIterator[Union[str, List[str]]],
+    timings: Optional[Dict[str, dict]] = None,
+) -> float:
+    """
+    Scores a completion while it streams in and returns its reward once the stream ends.
+
+    Args:
+        chunks: Text chunks, or lists of them such as the tokens `StreamPrompting.process_streaming_response` yields.
+        timings (Dict[str, dict]): If given, the calls, seconds and rejections of every stage are added to it.
+    """
+    scored = pipeline.stream(query)
+    async for chunk in chunks:
+        for text in [chunk] if isinstance(chunk, str) else chunk:
+            scored.feed(text)
+    return scored.close(timings)
+
+
+def record(
+    timings: Dict[str, dict],
+    name: str,
+    seconds: float,
+    rejected: bool = False,
+    calls: int = 1,
+):
+    timing = timings.setdefault(
+        name, {"calls": 0, "seconds": 0.0, "rejected": 0}
+    )
+    timing["calls"] += calls
+    timing["seconds"] += seconds
+    timing["rejected"] += rejected
+
+
+def merge_timings(
+    into: Dict[str, dict], timings: Dict[str, dict]
+) -> Dict[str, dict]:
+    """Adds the stage `timings` of one batch into the running totals `into`."""
+    for name, timing in timings.items():
+        total = into.setdefault(
+            name, {"calls": 0, "seconds": 0.0, "rejected": 0}
+        )
+        for field, value in timing.items():
+            total[field] += value
+    return into
+
+
+SENTIMENT_MODELS = {
+    "textblob": SentimentReward,
+    "lexicon": LexiconSentimentReward,
+}
+
+
+def default_pipeline(
+    max_chars: int = 10000, sentiment: str = "textblob"
+) -> RewardPipeline:
+    """
+    The validator's pipeline: drops empty, oversized and error completions, then scores sentiment with the model
+    registered under `sentiment` in `SENTIMENT_MODELS`.
+    """
+    if sentiment not in SENTIMENT_MODELS:
+        raise ValueError(
+            f"sentiment must be one of {list(SENTIMENT_MODELS)}, got {sentiment}"
+        )
+    return RewardPipeline(
+        filters=[EmptyFilter(), LengthFilter(max_chars), ErrorFilter()],
+        models=[SENTIMENT_MODELS[sentiment]()],
+    )
@@ -0,0 +1,216 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import math
+import time
+import torch
+import asyncio
+import bittensor as bt
+import concurrent.futures
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+LATE_POLICIES = ("score", "timeout")
+
+
+def is_success(response: bt.Synapse) -> bool:
+    return (
+        response.dendrite is not None and response.dendrite.status_code == 200
+    )
+
+
+def timed_out(synapse: bt.Synapse, timeout: float) -> bt.Synapse:
+    """Returns a copy of `synapse` that looks like a query that timed out after `timeout` seconds."""
+    response = synapse.copy()
+    response.dendrite = bt.TerminalInfo(
+        status_code=408, status_message="Timeout", process_time=timeout
+    )
+    return response
+
+
+class QuorumResult:
+    """
+    Outcome of a quorum query.
+
+    Attributes:
+        responses (List): Response of every axon, in query order, None for the ones still pending.
+        pending (Dict[int, asyncio.Task]): Tasks of the axons that had not answered yet, by query index.
+        elapsed (float): Seconds until the query returned.
+    """
+
+    def __init__(
+        self,
+        responses: List[Optional[bt.Synapse]],
+        pending: Dict[int, asyncio.Task],
+        elapsed: float,
+    ):
+        self.responses = responses
+        self.pending = pending
+        self.elapsed = elapsed
+
+    @property
+    def arrived(self) -> List[int]:
+        """Query indices of the responses that arrived."""
+        return [
+            i
+            for i, response in enumerate(self.responses)
+            if response is not None
+        ]
+
+    async def late(self) -> Dict[int, bt.Synapse]:
+        """Waits for the pending responses, by query index."""
+        if not self.pending:
+            return {}
+        indices = list(self.pending)
+        responses = await asyncio.gather(*(self.pending[i] for i in indices))
+        return dict(zip(indices, responses))
+
+    def cancel(self):
+        """Abandons the pending responses."""
+        for task in self.pending.values():
+            task.cancel()
+
+
+async def query_quorum(
+    dendrite: bt.dendrite,
+    axons: List[bt.AxonInfo],
+    synapse: bt.Synapse,
+    timeout: float,
+    quorum: float = 1.0,
+    min_successes: int = 0,
+    soft_deadline: float = 0,
+    deserialize: bool = True,
+    on_response: Optional[Callable[[int, bt.Synapse], None]] = None,
+) -> QuorumResult:
+    """
+    Queries `axons` like `dendrite(...)`, but returns as soon as enough of them answered instead of waiting for the
+    slowest one.
+
+    Every axon is queried with its own dendrite call, so each response can be collected as soon as it lands. The query
+    returns once a `quorum` fraction of the axons responded (successfully or not), once `min_successes` successful
+    responses arrived, or once `soft_deadline` seconds passed, whichever comes first. The axons that had not answered
+    keep running until their `timeout` and are left in `QuorumResult.pending` for the caller to await or cancel.
+
+    Args:
+        quorum (float): Fraction of the axons, in (0, 1], whose responses complete the query.
+        min_successes (int): Successful responses that complete the query. Non-positive disables it.
+        soft_deadline (float): Seconds after which the query returns with what arrived. Non-positive disables it.
+        on_response (Callable): Called with the query index and the response as soon as each response arrives,
+            e.g. to start scoring it while the others are still in flight. Not called for pending responses.
+    """
+    start = time.perf_counter()
+
+    async def query(axon: bt.AxonInfo) -> bt.Synapse:
+        responses = await dendrite(
+            axons=[axon],
+            synapse=synapse,
+            deserialize=deserialize,
+            timeout=timeout,
+        )
+        return responses[0]
+
+    tasks = {
+        asyncio.ensure_future(query(axon)): i for i, axon in enumerate(axons)
+    }
+    responses = [None] * len(axons)
+    needed = math.ceil(min(max(quorum, 0.0), 1.0) * len(axons))
+    arrived = successes = 0
+
+    pending = set(tasks)
+    try:
+        while (
+            pending
+            and arrived < needed
+            and not (0 < min_successes <= successes)
+        ):
+            remaining = None
+            if soft_deadline > 0:
+                remaining = soft_deadline - (time.perf_counter() - start)
+                if remaining <= 0:
+                    break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                response = task.result()
+                responses[tasks[task]] = response
+                arrived += 1
+                successes += is_success(response)
+                if on_response is not None:
+                    on_response(tasks[task], response)
+    except BaseException:
+        for task in pending:
+            task.cancel()
+        raise
+
+    return QuorumResult(
+        responses,
+        pending={tasks[task]: task for task in pending},
+        elapsed=time.perf_counter() - start,
+    )
+
+
+class ArrivalScorer:
+    """
+    Scores responses while the rest of a query is still pending, as the `on_response` callback of `query_quorum`.
+
+    Responses are not scored one by one: whatever arrived while a batch was being scored makes up the next batch,
+    so the reward engine still gets batches it can split over its workers, and a forward keeps at most one batch on
+    `executor` at a time.
+
+    Args:
+        score_fn (Callable): Returns the rewards of a list of responses, e.g. a `get_rewards` partial.
+        executor (concurrent.futures.Executor): Runs `score_fn`, None for the event loop's default executor.
+    """
+
+    def __init__(
+        self,
+        score_fn: Callable[[List[bt.Synapse]], torch.FloatTensor],
+        executor: Optional[concurrent.futures.Executor] = None,
+    ):
+        self.score_fn = score_fn
+        self.executor = executor
+        self.arrived: List[Tuple[int, bt.Synapse]] = []
+        self.rewards: Dict[int, torch.Tensor] = {}
+        self.batches = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def __call__(self, index: int, response: bt.Synapse):
+        self.arrived.append((index, response))
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._drain())
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        while self.arrived:
+            batch, self.arrived = self.arrived, []
+            rewards = await loop.run_in_executor(
+                self.executor,
+                self.score_fn,
+                [response for _, response in batch],
+            )
+            self.batches += 1
+            for (index, _), reward in zip(batch, rewards):
+                self.rewards[index] = reward
+
+    async def gather(self, indices: List[int]) -> torch.FloatTensor:
+        """Waits for the batches in progress and returns the rewards of the responses at `indices`, in order."""
+        if self._task is not None:
+            await self._task
+        if not indices:
+            return torch.zeros(0)
+        return torch.stack([self.rewards[index] for index in indices])
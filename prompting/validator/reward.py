@@ -18,12 +18,34 @@
 # DEALINGS IN THE SOFTWARE.
 
 from functools import reduce
-import textblob
 import torch
-from typing import List
+from typing import TYPE_CHECKING, Hashable, List, Union
 
+from prompting.protocol import Prompting
 
-def reward(query: int, response: str) -> float:
+if TYPE_CHECKING:
+    import textblob
+
+
+# Bump whenever `reward` or the stages of the default reward pipeline change, so cached rewards of the previous
+# version are not reused.
+REWARD_VERSION = 2
+
+
+def sentiment_reward(sentences: List["textblob.Sentence"]) -> float:
+    """
+    Returns the mean polarity of `sentences`, normalized from [-1, 1] to [0, 1].
+    """
+    sentiment_sum = reduce(
+        lambda x, y: x + y,
+        [sentence.sentiment.polarity for sentence in sentences],
+    )
+    sentiment_avg = sentiment_sum / len(sentences)
+    sentiment_normalized = (sentiment_avg + 1) / 2
+    return sentiment_normalized
+
+
+def reward(query: Hashable, response: str) -> float:
     """
     Reward the miner response to the prompting request. This method returns a reward
     value for the miner, which is used to update the miner's score.
@@ -32,29 +54,38 @@ def reward(query: int, response: str) -> float:
     - float: The reward value for the miner.
     """
 
+    # Imported on first use, loading TextBlob adds seconds to the validator startup.
+    import textblob
+
     blob = textblob.TextBlob(response)
-    sentiment_sum = reduce(lambda x, y: x + y, [sentence.sentiment.polarity for sentence in blob.sentences])
-    sentiment_avg = sentiment_sum / len(blob.sentences)
-    sentiment_normalized = (sentiment_avg + 1) / 2
-    return sentiment_normalized
+    return sentiment_reward(blob.sentences)
 
 
 def get_rewards(
     self,
-    query: int,
-    responses: List[str],
+    query: Hashable,
+    responses: List[Union[str, Prompting]],
 ) -> torch.FloatTensor:
     """
     Returns a tensor of rewards for the given query and responses.
 
     Args:
-    - query (int): The query sent to the miner.
-    - responses (List[float]): A list of responses from the miner.
+    - query (Hashable): The query sent to the miner, in forward the `prompt_key` of its synapse, which rewards are cached under.
+    - responses (List[Union[str, Prompting]]): A list of responses from the miner, completions or the synapses carrying them.
 
     Returns:
     - torch.FloatTensor: A tensor of rewards for the given query and responses.
     """
+    completions = [
+        response if isinstance(response, str) else response.completion
+        for response in responses
+    ]
+    # Score on the validator's reward engine when it has one, its worker processes keep the event loop free.
+    engine = getattr(self, "reward_engine", None)
+    if engine is not None:
+        return engine.rewards(query, completions).to(self.device)
+
     # Get all the reward results by iteratively calling your reward() function.
     return torch.FloatTensor(
-        [reward(query, response) for response in responses]
+        [reward(query, completion) for completion in completions]
     ).to(self.device)
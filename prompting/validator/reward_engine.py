@@ -0,0 +1,241 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import json
+import math
+import torch
+import hashlib
+import threading
+import multiprocessing
+import concurrent.futures
+
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Tuple,
+)
+
+from prompting.utils.cache import TTLCache
+from prompting.validator.reward import REWARD_VERSION
+from prompting.validator.pipeline import (
+    RewardPipeline,
+    SentimentReward,
+    default_pipeline,
+    merge_timings,
+)
+
+if TYPE_CHECKING:
+    from prompting.protocol import Prompting
+
+
+def preload_textblob():
+    """Loads TextBlob's sentence tokenizer and sentiment lexicon, so a worker's first reward is as fast as the rest."""
+    SentimentReward().warm_up()
+
+
+def score_chunk(
+    reward_fn: Callable[[Hashable, str], float],
+    query: Hashable,
+    completions: List[str],
+) -> Tuple[List[float], Dict[str, dict]]:
+    """Returns the rewards of `completions` and, for a reward pipeline, the timings of its stages."""
+    timings = {}
+    if isinstance(reward_fn, RewardPipeline):
+        return reward_fn.score(query, completions, timings), timings
+    return [
+        reward_fn(query, completion) for completion in completions
+    ], timings
+
+
+def prompt_key(synapse: "Prompting") -> str:
+    """
+    The query rewards are computed and cached for: a hash of the prompt the synapse carries, i.e. its messages,
+    character info and criteria, so the same prompt has the same key in every step and every concurrent forward.
+    """
+    prompt = json.dumps(
+        [
+            [message.content for message in synapse.messages],
+            synapse.character_info,
+            list(synapse.criteria),
+        ]
+    )
+    return hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+
+
+def completion_key(
+    version: Hashable, query: Hashable, completion: str
+) -> tuple:
+    """Cache key of a reward: the reward version, the query and a hash of the completion without surrounding whitespace."""
+    digest = hashlib.blake2b(
+        completion.strip().encode(), digest_size=16
+    ).digest()
+    return version, query, digest
+
+
+class RewardEngine:
+    """
+    Runs a reward function over the completions of a step on a persistent pool of worker processes.
+
+    The completions are split into chunks, at most one per worker unless `chunksize` is set, and each chunk is scored
+    by a single task, so the cost of shipping work to the pool is paid per chunk rather than per completion. Workers
+    are spawned once and warmed up with `initializer`, which keeps model loading out of the step. With `processes` 0
+    the rewards are computed in the calling thread, as get_rewards always did.
+
+    Rewards are cached in a bounded LRU keyed by (`version`, query, completion hash), so identical completions to the
+    same query, within a batch, across steps or across the concurrent forwards sharing the engine, are scored once.
+    The validator's query is the `prompt_key` of the synapse it sent. `version` must change whenever the reward
+    function does.
+
+    The reward function must be picklable, i.e. a `RewardPipeline` or a function defined at the top level of a module.
+    The stage timings of a pipeline, wherever it ran, add up in `stage_timings`.
+
+    Args:
+        processes (int): Worker processes. 0 scores in the calling thread.
+        chunksize (int): Completions per task. 0 splits every batch evenly over the workers.
+        reward_fn (Callable): Returns the reward of a completion to a query, `default_pipeline()` by default.
+        initializer (Callable): Run once in every worker before it takes tasks.
+        cache_size (int): Cached rewards. 0 disables the cache.
+        version (Hashable): Version of `reward_fn`, part of every cache key.
+
+    Example:
+        engine = RewardEngine(processes=4)
+        rewards = engine.rewards(query, completions)
+    """
+
+    def __init__(
+        self,
+        processes: int = 0,
+        chunksize: int = 0,
+        reward_fn: Optional[Callable[[Hashable, str], float]] = None,
+        initializer: Optional[Callable[[], None]] = preload_textblob,
+        cache_size: int = 0,
+        version: Hashable = REWARD_VERSION,
+    ):
+        self.processes = max(int(processes), 0)
+        self.chunksize = chunksize
+        self.reward_fn = default_pipeline() if reward_fn is None else reward_fn
+        self.initializer = initializer
+        self.version = version
+        self.cache = TTLCache(maxsize=cache_size) if cache_size > 0 else None
+        self.duplicates = 0
+        self.timings = {}
+        self._lock = threading.Lock()
+        self.executor = None
+        if self.processes > 0:
+            # Spawned rather than forked: the validator runs threads, which a forked child would inherit mid-state.
+            self.executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=initializer,
+            )
+
+    def start(self):
+        """Starts and warms up every worker now instead of on the first batch, or warms up in-process without workers."""
+        if self.executor is None:
+            if self.initializer is not None:
+                self.initializer()
+            return
+        futures = [
+            self.executor.submit(score_chunk, self.reward_fn, 0, [])
+            for _ in range(self.processes)
+        ]
+        for future in futures:
+            future.result()
+
+    def chunks(self, completions: List[str]) -> List[List[str]]:
+        size = self.chunksize
+        if size <= 0:
+            size = math.ceil(len(completions) / self.processes)
+        return [
+            completions[start : start + size]
+            for start in range(0, len(completions), size)
+        ]
+
+    def compute(self, query: Hashable, completions: List[str]) -> List[float]:
+        """Runs the reward function over `completions`, bypassing the cache."""
+        if self.executor is None or len(completions) == 0:
+            results = [score_chunk(self.reward_fn, query, completions)]
+        else:
+            futures = [
+                self.executor.submit(score_chunk, self.reward_fn, query, chunk)
+                for chunk in self.chunks(completions)
+            ]
+            results = [future.result() for future in futures]
+
+        with self._lock:
+            for _, timings in results:
+                merge_timings(self.timings, timings)
+        return [reward for rewards, _ in results for reward in rewards]
+
+    def rewards(
+        self, query: Hashable, completions: List[str]
+    ) -> torch.FloatTensor:
+        """Returns the reward of every completion, in the order of `completions`."""
+        if self.cache is None:
+            return torch.FloatTensor(self.compute(query, completions))
+
+        keys = [
+            completion_key(self.version, query, completion)
+            for completion in completions
+        ]
+        rewards, missing, duplicates = {}, {}, 0
+        for key, completion in zip(keys, completions):
+            if key in rewards or key in missing:
+                # Duplicate within the batch, scored together with its first copy.
+                duplicates += 1
+                continue
+            cached = self.cache.get(key)
+            if cached is None:
+                missing[key] = completion
+            else:
+                rewards[key] = cached
+
+        with self._lock:
+            self.duplicates += duplicates
+
+        if missing:
+            computed = self.compute(query, list(missing.values()))
+            for key, value in zip(missing, computed):
+                self.cache.set(key, value)
+                rewards[key] = value
+        return torch.FloatTensor([rewards[key] for key in keys])
+
+    def cache_info(self) -> dict:
+        """
+        Hits, misses and evictions of the reward cache, plus the duplicates found within a batch, which are scored
+        once without a cache lookup. Empty when the cache is disabled.
+        """
+        if self.cache is None:
+            return {}
+        with self._lock:
+            return {**self.cache.info(), "duplicates": self.duplicates}
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    def stage_timings(self) -> Dict[str, dict]:
+        """Calls, seconds and rejections of every reward pipeline stage so far."""
+        with self._lock:
+            return {
+                name: dict(timing) for name, timing in self.timings.items()
+            }
@@ -0,0 +1,287 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""
+Strategies that pick which of the candidate uids a forward queries.
+
+Bandit strategies rank the candidates by a priority computed from the validator's reward history, query the top
+of that ranking and fill an `exploration` fraction of every batch uniformly at random from the rest. The uniform
+slots are the exploration floor: every candidate keeps a sampling probability of at least
+`ceil(exploration * k) / len(candidates)` per forward, however its priority looks.
+
+The round robin strategy instead walks a shared shuffled order of all uids, so concurrent forwards get disjoint
+batches and every available uid is queried once per pass.
+"""
+
+import math
+import torch
+import threading
+
+from abc import ABC, abstractmethod
+from typing import List, Union
+
+from prompting.validator.history import RewardHistory
+
+
+class Sampler(ABC):
+    """
+    Base sampling strategy, subclasses define `sample`.
+
+    Args:
+        exploration (float): Fraction of every batch sampled uniformly from the candidates left after the top ones.
+    """
+
+    def __init__(self, exploration: float = 0.1):
+        self.exploration = exploration
+
+    @abstractmethod
+    def sample(
+        self, candidates: torch.LongTensor, k: int, history: RewardHistory
+    ) -> torch.LongTensor:
+        """Returns `k` distinct uids from `candidates`."""
+        ...
+
+    def release(self, uids: Union[torch.LongTensor, List[int]]):
+        """Called when the queries of a sampled batch have finished."""
+
+    def resize(self, n: int):
+        """Called on every metagraph resync, `n` being its size."""
+
+
+class BanditSampler(Sampler):
+    """Bandit strategy querying the candidates with the highest `priority`, subclasses define `priority`."""
+
+    @abstractmethod
+    def priority(
+        self, history: RewardHistory, uids: torch.LongTensor
+    ) -> torch.FloatTensor:
+        ...
+
+    def sample(
+        self, candidates: torch.LongTensor, k: int, history: RewardHistory
+    ) -> torch.LongTensor:
+        """Returns `k` distinct uids from `candidates`, in random order."""
+        # Shuffle first, so ties in priority are broken at random.
+        candidates = candidates[torch.randperm(len(candidates))]
+        n_explore = min(math.ceil(self.exploration * k), k)
+        order = torch.argsort(
+            self.priority(history, candidates), descending=True, stable=True
+        )
+        exploit = candidates[order[: k - n_explore]]
+        rest = candidates[order[k - n_explore :]]
+        explore = rest[torch.randperm(len(rest))[:n_explore]]
+        uids = torch.cat([exploit, explore])
+        return uids[torch.randperm(len(uids))]
+
+
+class UniformSampler(Sampler):
+    """Every candidate is equally likely, the strategy get_random_uids always used."""
+
+    def sample(
+        self, candidates: torch.LongTensor, k: int, history: RewardHistory
+    ) -> torch.LongTensor:
+        return candidates[torch.randperm(len(candidates))[:k]]
+
+
+class UCBSampler(BanditSampler):
+    """
+    Upper confidence bound: mean reward plus `c * sqrt(2 ln(t) / count)`, where `count` is the number of rewards in
+    the uid's history window and `t` the total over all uids. Uids without any reward come first.
+
+    Because the history window is bounded, the bonus of a stable miner never vanishes and it is still revisited from
+    time to time, which keeps the estimates fresh when miners change.
+    """
+
+    def __init__(self, exploration: float = 0.1, c: float = 1.0):
+        super().__init__(exploration)
+        self.c = c
+
+    def priority(
+        self, history: RewardHistory, uids: torch.LongTensor
+    ) -> torch.FloatTensor:
+        with history.lock:
+            mean = history.mean()[uids].cpu()
+            count = history.count[uids].cpu().float()
+            total = history.count.sum().item()
+        bonus = self.c * torch.sqrt(2 * math.log(max(total, 1) + 1) / count)
+        return torch.where(
+            count > 0, mean + bonus, torch.full_like(mean, math.inf)
+        )
+
+
+class ThompsonSampler(BanditSampler):
+    """
+    Thompson sampling with a normal posterior per uid: a draw from N(mean, variance / count), floored at `min_std`
+    so the posterior never collapses. Uids without any reward draw from N(prior mean, `prior_std`), the prior mean
+    being the mean reward over every uid sampled so far.
+    """
+
+    def __init__(
+        self,
+        exploration: float = 0.1,
+        prior_std: float = 0.5,
+        min_std: float = 0.02,
+    ):
+        super().__init__(exploration)
+        self.prior_std = prior_std
+        self.min_std = min_std
+
+    def priority(
+        self, history: RewardHistory, uids: torch.LongTensor
+    ) -> torch.FloatTensor:
+        with history.lock:
+            all_means = history.mean()
+            mean = all_means[uids].cpu()
+            variance = history.variance()[uids].cpu()
+            count = history.count[uids].cpu().float()
+        prior_mean = torch.nanmean(all_means).item()
+        if math.isnan(prior_mean):
+            prior_mean = 0.5
+
+        sampled = count > 0
+        std = torch.sqrt(
+            torch.nan_to_num(variance) / count.clamp(min=1)
+        ).clamp(min=self.min_std)
+        mean = torch.where(sampled, mean, torch.full_like(mean, prior_mean))
+        std = torch.where(sampled, std, torch.full_like(std, self.prior_std))
+        return torch.normal(mean, std)
+
+
+class RoundRobinSampler(Sampler):
+    """
+    Shared cursor over a shuffled order of all uids, handing out disjoint batches to concurrent forwards.
+
+    Each batch continues the walk where the previous one stopped, skipping uids that are not candidates. A uid that
+    already has `max_in_flight` queries in flight is deferred instead: it is handed out first once it has been
+    released. Every available uid is therefore queried within one pass, `ceil(n / k)` batches, plus the time it
+    spends at the in-flight cap. Uids that join the metagraph are shuffled into the part of the pass not walked yet,
+    so a resync never restarts the pass in progress.
+
+    Batches are smaller than `k` when fewer candidates are below the in-flight cap.
+
+    Args:
+        max_in_flight (int): Maximum number of concurrent queries per uid.
+    """
+
+    def __init__(self, exploration: float = 0.0, max_in_flight: int = 1):
+        super().__init__(exploration)
+        self.max_in_flight = max_in_flight
+        self.order = torch.empty(0, dtype=torch.long)
+        self.in_flight = torch.zeros(0, dtype=torch.long)
+        self.cursor = 0
+        self.passes = 0
+        self.deferred = {}
+        self._lock = threading.Lock()
+
+    def resize(self, n: int):
+        with self._lock:
+            self._resize(n)
+
+    def _resize(self, n: int):
+        if n > len(self.order):
+            # The walked part keeps its place, the new uids land anywhere in the rest of the pass.
+            rest = torch.cat(
+                [self.order[self.cursor :], torch.arange(len(self.order), n)]
+            )
+            self.order = torch.cat(
+                [self.order[: self.cursor], rest[torch.randperm(len(rest))]]
+            )
+        elif n < len(self.order):
+            kept = self.order < n
+            self.cursor = int(kept[: self.cursor].sum()) % max(
+                int(kept.sum()), 1
+            )
+            self.order = self.order[kept]
+        self.deferred = {uid: None for uid in self.deferred if uid < n}
+        if n > len(self.in_flight):
+            in_flight = torch.zeros(n, dtype=torch.long)
+            in_flight[: len(self.in_flight)] = self.in_flight
+            self.in_flight = in_flight
+
+    def release(self, uids: Union[torch.LongTensor, List[int]]):
+        uids = torch.as_tensor(uids, dtype=torch.long)
+        with self._lock:
+            self.in_flight.index_add_(0, uids, -torch.ones_like(uids))
+            self.in_flight.clamp_(min=0)
+
+    def sample(
+        self,
+        candidates: torch.LongTensor,
+        k: int,
+        history: RewardHistory = None,
+    ) -> torch.LongTensor:
+        with self._lock:
+            n = int(candidates.max()) + 1 if len(candidates) else 0
+            if n > len(self.order):
+                self._resize(n)
+            eligible = torch.zeros(len(self.order), dtype=torch.bool)
+            eligible[candidates] = True
+            free = eligible & (self.in_flight < self.max_in_flight)
+
+            # Deferred uids that were released since go first, the others wait for a later batch. Uids that are no
+            # longer candidates are dropped, the walk reaches them again on the next pass.
+            for uid in [uid for uid in self.deferred if not eligible[uid]]:
+                del self.deferred[uid]
+            picked = [uid for uid in self.deferred if free[uid]][:k]
+            for uid in picked:
+                del self.deferred[uid]
+            free[picked] = False
+
+            # Continue the walk over the shuffled order.
+            remaining = k - len(picked)
+            rotated = torch.cat(
+                [self.order[self.cursor :], self.order[: self.cursor]]
+            )
+            rotated_free = free[rotated]
+            positions = rotated_free.nonzero().flatten()[:remaining]
+            end = (
+                int(positions[-1]) + 1
+                if remaining > 0 and len(positions) == remaining
+                else len(rotated)
+            )
+            walked = rotated[:end]
+            for uid in walked[eligible[walked] & ~rotated_free[:end]].tolist():
+                if uid not in picked:
+                    self.deferred[uid] = None
+            if self.cursor + end >= len(self.order) and len(self.order):
+                self.passes += 1
+            self.cursor = (self.cursor + end) % max(len(self.order), 1)
+
+            uids = torch.cat(
+                [torch.tensor(picked, dtype=torch.long), rotated[positions]]
+            )
+            self.in_flight[uids] += 1
+            return uids
+
+
+SAMPLERS = {
+    "uniform": UniformSampler,
+    "ucb": UCBSampler,
+    "thompson": ThompsonSampler,
+    "round_robin": RoundRobinSampler,
+}
+
+
+def build_sampler(name: str, exploration: float = 0.1, **kwargs) -> Sampler:
+    """Returns the sampling strategy registered under `name` in `SAMPLERS`."""
+    if name not in SAMPLERS:
+        raise ValueError(
+            f"sampler must be one of {list(SAMPLERS)}, got {name}"
+        )
+    if name == "round_robin":
+        return RoundRobinSampler(max_in_flight=kwargs.get("max_in_flight", 1))
+    return SAMPLERS[name](exploration=exploration)
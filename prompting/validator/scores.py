@@ -0,0 +1,188 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import time
+import torch
+import threading
+
+from collections import deque
+from typing import List, Optional, Union
+
+DUPLICATE_POLICIES = ("mean", "last")
+
+
+class ScoreEngine:
+    """
+    In-place, time-aware exponential moving average of miner scores.
+
+    Rewards are submitted as (rewards, uids) batches and committed together. A commit folds every pending batch into
+    one vectorized update that touches only the scored uids, so several forwards finishing at once cost a single
+    update. When a uid appears more than once in a commit its rewards are combined with `duplicate_policy`: "mean"
+    averages them and "last" keeps the most recently submitted one.
+
+    Each uid also keeps the time it was last scored. With a positive `half_life` a score halves for every
+    `half_life` seconds the uid goes unscored: the decay is folded into the next update of that uid, and `current`
+    returns the decayed view of all scores for weight setting.
+
+    Args:
+        n (int): Number of uids.
+        alpha (float): Moving average weight of a new reward.
+        device (str): Device holding the tensors.
+        duplicate_policy (str): How duplicate uids within a commit are combined, "mean" or "last".
+        half_life (float): Seconds after which an unscored uid's score halves. Non-positive disables decay.
+    """
+
+    def __init__(
+        self,
+        n: int,
+        alpha: float,
+        device: str = "cpu",
+        duplicate_policy: str = "mean",
+        half_life: float = 0,
+    ):
+        if duplicate_policy not in DUPLICATE_POLICIES:
+            raise ValueError(
+                f"duplicate_policy must be one of {DUPLICATE_POLICIES}, got {duplicate_policy}"
+            )
+        self.alpha = alpha
+        self.device = device
+        self.duplicate_policy = duplicate_policy
+        self.half_life = half_life
+
+        self.scores = torch.zeros(n, dtype=torch.float32, device=device)
+        self.last_scored = torch.full(
+            (n,), time.time(), dtype=torch.float64, device=device
+        )
+        self.lock = threading.RLock()
+        self._pending = deque()
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def _decay(self, elapsed: torch.Tensor) -> torch.Tensor:
+        return torch.pow(0.5, elapsed.clamp(min=0) / self.half_life).to(
+            self.scores.dtype
+        )
+
+    def submit(
+        self,
+        rewards: torch.FloatTensor,
+        uids: Union[torch.LongTensor, List[int]],
+    ):
+        """Queues a batch of rewards to be folded into the scores on the next `commit`."""
+        uids = torch.as_tensor(uids, dtype=torch.long, device=self.device)
+        rewards = torch.as_tensor(rewards, dtype=self.scores.dtype).to(
+            self.device
+        )
+        self._pending.append((rewards, uids))
+
+    def commit(self, now: Optional[float] = None):
+        """Applies all pending batches to the scores in place."""
+        with self.lock:
+            if not self._pending:
+                return
+            batches = [
+                self._pending.popleft() for _ in range(len(self._pending))
+            ]
+            if len(batches) == 1:
+                rewards, uids = batches[0]
+            else:
+                rewards = torch.cat([rewards for rewards, _ in batches])
+                uids = torch.cat([uids for _, uids in batches])
+            self._apply(rewards, uids, time.time() if now is None else now)
+
+    def update(
+        self,
+        rewards: torch.FloatTensor,
+        uids: Union[torch.LongTensor, List[int]],
+        now: Optional[float] = None,
+    ):
+        """Submits a batch and commits it, together with any batch submitted concurrently."""
+        self.submit(rewards, uids)
+        self.commit(now=now)
+
+    def _apply(
+        self, rewards: torch.FloatTensor, uids: torch.LongTensor, now: float
+    ):
+        unique_uids, inverse = torch.unique(uids, return_inverse=True)
+        if len(unique_uids) == len(uids):
+            # Fast path, no duplicates: just reorder the rewards to match the sorted uids.
+            batch_rewards = torch.empty_like(rewards).scatter_(
+                0, inverse, rewards
+            )
+        elif self.duplicate_policy == "mean":
+            sums = torch.zeros(
+                len(unique_uids), dtype=rewards.dtype, device=self.device
+            ).index_add_(0, inverse, rewards)
+            counts = torch.bincount(inverse, minlength=len(unique_uids))
+            batch_rewards = sums / counts
+        else:
+            positions = torch.arange(len(uids), device=self.device)
+            last = torch.zeros(
+                len(unique_uids), dtype=torch.long, device=self.device
+            ).scatter_reduce_(0, inverse, positions, reduce="amax")
+            batch_rewards = rewards[last]
+
+        current = self.scores[unique_uids]
+        if self.half_life > 0:
+            current.mul_(self._decay(now - self.last_scored[unique_uids]))
+        current.mul_(1 - self.alpha).add_(batch_rewards, alpha=self.alpha)
+        self.scores.index_copy_(0, unique_uids, current)
+        self.last_scored.index_fill_(0, unique_uids, now)
+
+    def current(self, now: Optional[float] = None) -> torch.FloatTensor:
+        """Returns a copy of the scores with the time decay of every uid applied."""
+        with self.lock:
+            if self.half_life <= 0:
+                return self.scores.clone()
+            now = time.time() if now is None else now
+            return self.scores * self._decay(now - self.last_scored)
+
+    def load(
+        self,
+        scores: torch.FloatTensor,
+        last_scored: Optional[torch.Tensor] = None,
+    ):
+        """Replaces the scores, e.g. with ones restored from a saved state."""
+        with self.lock:
+            self.scores = scores.to(self.device)
+            if last_scored is None or len(last_scored) != len(scores):
+                last_scored = torch.full(
+                    (len(scores),), time.time(), dtype=torch.float64
+                )
+            self.last_scored = last_scored.to(self.device, torch.float64)
+
+    def resize(self, n: int):
+        """Grows the engine to `n` uids, new uids start with a zero score."""
+        with self.lock:
+            if n <= len(self.scores):
+                return
+            scores = torch.zeros(
+                n, dtype=self.scores.dtype, device=self.device
+            )
+            scores[: len(self.scores)] = self.scores
+            last_scored = torch.full(
+                (n,), time.time(), dtype=torch.float64, device=self.device
+            )
+            last_scored[: len(self.last_scored)] = self.last_scored
+            self.scores, self.last_scored = scores, last_scored
+
+    def reset(self, uids: List[int]):
+        """Zeroes the scores of `uids`, e.g. when their hotkeys were replaced."""
+        with self.lock:
+            self.scores[uids] = 0
+            self.last_scored[uids] = time.time()
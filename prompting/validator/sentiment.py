@@ -0,0 +1,448 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""
+Lexicon sentiment scorer reproducing TextBlob's default polarity without importing TextBlob.
+
+TextBlob's default analyzer is the pattern library's: it tokenizes a sentence with a rule-based tokenizer, looks up
+every word in an adjective polarity lexicon (en-sentiment.xml), adjusts the hits for preceding intensifiers ("very
+good"), negations ("not good") and trailing exclamation marks, and averages the resulting polarities. This module
+ports that algorithm, compiles the lexicon once into a word -> row hash table over flat arrays, and aggregates the
+polarities of a whole batch of responses with vectorized arithmetic.
+
+Tolerance: the polarity of a sentence matches TextBlob's `Sentence.sentiment.polarity` to within 1e-9. The reward of
+a multi-sentence response, the mean sentence polarity normalized to [0, 1], additionally depends on where sentences
+are split. TextBlob splits with NLTK's punkt model, this scorer with the pattern tokenizer's rules (sentence-ending
+punctuation, abbreviations, paragraph breaks). The two agree on ordinary prose, and where they do the reward matches
+`reward()` to within 1e-9; where they split differently the reward can differ by a few hundredths.
+"""
+
+import os
+import re
+import functools
+import importlib.util
+import numpy as np
+
+from xml.etree import ElementTree
+from typing import Dict, List, Optional
+
+NEGATIONS = ("no", "not", "n't", "never")
+
+# Tokenizer rules of pattern's find_tokens, which TextBlob's analyzer uses.
+TOKEN = re.compile(r"(\S+)\s")
+PUNCTUATION = ".,;:!?()[]{}`''\"@#$^&*+-|=~_"
+ABBREVIATIONS = {
+    "a.", "adj.", "adv.", "al.", "a.m.", "c.", "cf.", "comp.", "conf.", "def.", "ed.", "e.g.", "esp.", "etc.",
+    "ex.", "f.", "fig.", "gen.", "id.", "i.e.", "int.", "l.", "m.", "Med.", "Mil.", "Mr.", "n.", "n.q.", "orig.",
+    "pl.", "pred.", "pres.", "p.m.", "ref.", "v.", "vs.", "w/",
+}  # fmt: skip
+RE_ABBR1 = re.compile(r"^[A-Za-z]\.$")
+RE_ABBR2 = re.compile(r"^([A-Za-z]\.)+$")
+RE_ABBR3 = re.compile("^[A-Z][" + "|".join("bcdfghjklmnpqrstvwxz") + "]+.$")
+REPLACEMENTS = {
+    "'d": " 'd",
+    "'m": " 'm",
+    "'s": " 's",
+    "'ll": " 'll",
+    "'re": " 're",
+    "'ve": " 've",
+    "n't": " n't",
+}
+EOS = "END-OF-SENTENCE"
+SENTENCE_END = ("...", ".", "!", "?", EOS)
+SENTENCE_TAIL = ("'", '"', "”", "’", "...", ".", "!", "?", ")", EOS)
+
+EMOTICONS = {
+    +1.00: ("<3", "♥", ">:D", ":-D", ":D", "=-D", "=D", "X-D", "x-D", "XD", "xD", "8-D"),
+    +0.75: (">:P", ":-P", ":P", ":-p", ":p", ":-b", ":b", ":c)", ":o)", ":^)"),
+    +0.50: (">:)", ":-)", ":)", "=)", "=]", ":]", ":}", ":>", ":3", "8)", "8-)"),
+    +0.25: (">;]", ";-)", ";)", ";-]", ";]", ";D", ";^)", "*-)", "*)"),
+    +0.05: (">:o", ":-O", ":O", ":o", ":-o", "o_O", "o.O", "°O°", "°o°"),
+    -0.25: (">:/", ":-/", ":/", ":\\", ">:\\", ":-.", ":-s", ":s", ":S", ":-S", ">.>"),
+    -0.75: (">:[", ":-(", ":(", "=(", ":-[", ":[", ":{", ":-<", ":c", ":-c", "=/"),
+    -1.00: (":'(", ":'''(", ";'("),
+}  # fmt: skip
+# Lowercased emoticon -> polarity, the first listed polarity wins as in pattern.
+EMOTICON_POLARITY = {}
+for _polarity, _emoticons in EMOTICONS.items():
+    for _emoticon in _emoticons:
+        EMOTICON_POLARITY.setdefault(_emoticon.lower(), _polarity)
+RE_EMOTICONS = re.compile(
+    r"(%s)($|\s)"
+    % "|".join(
+        r" ?".join(re.escape(c) for c in e)
+        for e in EMOTICONS.values()
+        for e in e
+    )
+)
+RE_SARCASM = re.compile(r"\( ?\! ?\)")
+
+
+def lexicon_path() -> str:
+    """Path of the polarity lexicon shipped with TextBlob, found without importing it."""
+    spec = importlib.util.find_spec("textblob")
+    return os.path.join(
+        spec.submodule_search_locations[0], "en", "en-sentiment.xml"
+    )
+
+
+def _mean(values: List[float]) -> float:
+    return sum(values) / float(len(values) or 1)
+
+
+class Lexicon:
+    """
+    The polarity lexicon compiled into a hash table from word to row of flat polarity, intensity and modifier arrays.
+
+    The compilation follows TextBlob's loading exactly: scores are averaged over the senses of every part of speech,
+    then over the parts of speech, and every adjective gets an adverb form ("terrible" -> "terribly").
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        words = {}
+        for word in (
+            ElementTree.parse(path or lexicon_path()).getroot().findall("word")
+        ):
+            form = word.attrib.get("form")
+            if not form:
+                continue
+            scores = (
+                float(word.attrib.get("polarity", 0.0)),
+                float(word.attrib.get("subjectivity", 0.0)),
+                float(word.attrib.get("intensity", 1.0)),
+            )
+            words.setdefault(form, {}).setdefault(
+                word.attrib.get("pos"), []
+            ).append(scores)
+        for form, senses in words.items():
+            words[form] = {
+                pos: [_mean(each) for each in zip(*scores)]
+                for pos, scores in senses.items()
+            }
+        for form, pos in words.items():
+            pos[None] = [_mean(each) for each in zip(*pos.values())]
+        for form, pos in list(words.items()):
+            if "JJ" in pos:
+                if form.endswith("y"):
+                    form = form[:-1] + "i"
+                if form.endswith("le"):
+                    form = form[:-2]
+                scores = pos["JJ"]
+                adverb = words.setdefault(form + "ly", {})
+                adverb["RB"] = adverb[None] = scores
+
+        self.index: Dict[str, int] = {
+            form: row for row, form in enumerate(words)
+        }
+        self.polarity = np.array([pos[None][0] for pos in words.values()])
+        self.intensity = np.array([pos[None][2] for pos in words.values()])
+        self.modifier = np.array(["RB" in pos for pos in words.values()])
+        # Plain tuples for the per-token walk, faster to index than numpy scalars.
+        self.rows = list(
+            zip(
+                self.polarity.tolist(),
+                self.intensity.tolist(),
+                self.modifier.tolist(),
+            )
+        )
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+@functools.lru_cache(maxsize=1)
+def default_lexicon() -> Lexicon:
+    """The lexicon shipped with TextBlob, compiled once per process."""
+    return Lexicon()
+
+
+def find_tokens(text: str) -> List[str]:
+    """
+    Splits `text` into tokens like pattern's find_tokens, which TextBlob's analyzer tokenizes with, paragraph breaks
+    becoming `EOS` tokens.
+
+    Every rule applies within one word or one whitespace run, so tokenizing a text cut between a word and a whitespace
+    run gives the same tokens as tokenizing it whole.
+    """
+    punctuation = tuple(PUNCTUATION.replace(".", ""))
+    for contraction, replacement in REPLACEMENTS.items():
+        text = text.replace(contraction, replacement)
+    text = (
+        text.replace("“", " “ ")
+        .replace("”", " ” ")
+        .replace("‘", " ‘ ")
+        .replace("’", " ’ ")
+        .replace("'", " ' ")
+        .replace('"', ' " ')
+    )
+    text = text.replace("\r\n", "\n")
+    text = re.sub(r"\n{2,}", " %s " % EOS, text)
+    text = re.sub(r"\s+", " ", text)
+
+    tokens = []
+    for token in TOKEN.findall(text + " "):
+        tail = []
+        while token.startswith(punctuation) and token not in REPLACEMENTS:
+            tokens.append(token[0])
+            token = token[1:]
+        while (
+            token.endswith(punctuation + (".",)) and token not in REPLACEMENTS
+        ):
+            if token.endswith(punctuation):
+                tail.append(token[-1])
+                token = token[:-1]
+            if token.endswith("..."):
+                tail.append("...")
+                token = token[:-3].rstrip(".")
+            if token.endswith("."):
+                if (
+                    token in ABBREVIATIONS
+                    or RE_ABBR1.match(token) is not None
+                    or RE_ABBR2.match(token) is not None
+                    or RE_ABBR3.match(token) is not None
+                ):
+                    break
+                tail.append(token[-1])
+                token = token[:-1]
+        if token != "":
+            tokens.append(token)
+        tokens.extend(reversed(tail))
+    return tokens
+
+
+class SentenceSplitter:
+    """
+    Groups tokens into sentences one token at a time, as pattern does over a whole text.
+
+    A sentence ends at sentence-ending punctuation together with the closing quotes, parentheses and repeated
+    punctuation that follow it, so it is only complete once the first token after that tail is pushed, or the text
+    closes.
+    """
+
+    def __init__(self):
+        self.sentence: List[str] = []
+        self.in_tail = False
+
+    def push(self, token: str) -> Optional[List[str]]:
+        """Adds the next token, returns the sentence it completed if any."""
+        if not self.in_tail:
+            self.sentence.append(token)
+            self.in_tail = token in SENTENCE_END
+            return None
+        # Straight quotes after the end always open the next sentence, as they do in pattern.
+        if token in SENTENCE_TAIL and token not in ("'", '"'):
+            self.sentence.append(token)
+            return None
+        sentence = [t for t in self.sentence if t != EOS]
+        self.sentence, self.in_tail = [token], False
+        return sentence or None
+
+    def close(self) -> Optional[List[str]]:
+        """Ends the text, returns its last sentence if any."""
+        sentence = [t for t in self.sentence if t != EOS]
+        self.sentence, self.in_tail = [], False
+        return sentence or None
+
+
+def normalize_sentence(tokens: List[str]) -> List[str]:
+    """Lowercased tokens of a sentence, with sarcasm marks and spaced out emoticons joined into one token."""
+    sentence = RE_SARCASM.sub("(!)", " ".join(tokens))
+    return (
+        RE_EMOTICONS.sub(
+            lambda m: m.group(1).replace(" ", "") + m.group(2), sentence
+        )
+        .lower()
+        .split()
+    )
+
+
+def find_sentences(text: str) -> List[List[str]]:
+    """Splits `text` into sentences of lowercased tokens, see `find_tokens` and `SentenceSplitter`."""
+    splitter = SentenceSplitter()
+    sentences = [splitter.push(token) for token in find_tokens(text)]
+    sentences.append(splitter.close())
+    return [normalize_sentence(sentence) for sentence in sentences if sentence]
+
+
+class LexiconSentiment:
+    """
+    Scores the sentiment of responses from a compiled `Lexicon`, see the module docstring for the tolerance against
+    TextBlob.
+
+    Example:
+        scorer = LexiconSentiment()
+        rewards = scorer.score(["What a lovely day!", "This is not good."])
+    """
+
+    def __init__(self, lexicon: Optional[Lexicon] = None):
+        self.lexicon = lexicon or default_lexicon()
+
+    def assess(self, tokens: List[str]) -> List[float]:
+        """Returns the polarity of every assessment (a known word with its modifiers) in a sentence's lowercased tokens."""
+        index, rows = self.lexicon.index, self.lexicon.rows
+        # Every assessment is [polarity, intensity, negated].
+        assessments = []
+        modifier = None
+        negation = None
+        for token in tokens:
+            row = index.get(token)
+            if row is not None:
+                polarity, intensity, is_modifier = rows[row]
+                if modifier is None:
+                    assessments.append([polarity, intensity, False])
+                else:
+                    # Known word after an intensifier, scaled by the intensifier's intensity ("really good").
+                    last = assessments[-1]
+                    last[0] = max(-1.0, min(polarity * last[1], 1.0))
+                    last[1] = intensity
+                if negation is not None:
+                    assessments[-1][1] = 1.0 / assessments[-1][1]
+                    assessments[-1][2] = True
+                modifier = token if is_modifier else None
+                negation = token if token in NEGATIONS else None
+                continue
+
+            if token in NEGATIONS:
+                negation = token
+            elif negation and len(token.strip("'")) > 1:
+                # Negations carry over small words only ("not a good").
+                negation = None
+            if (
+                negation is not None
+                and modifier is not None
+                and modifier.endswith("ly")
+            ):
+                # A negation after an adverb negates the adverb's assessment ("really not good").
+                assessments[-1][2] = True
+                negation = None
+            elif modifier and len(token) > 2:
+                modifier = None
+            if token == "!" and assessments:
+                assessments[-1][0] = max(
+                    -1.0, min(assessments[-1][0] * 1.25, 1.0)
+                )
+            if token == "(!)":
+                assessments.append([0.0, 1.0, False])
+            if (
+                not token.isalpha()
+                and len(token) <= 5
+                and token not in PUNCTUATION
+            ):
+                polarity = EMOTICON_POLARITY.get(token)
+                if polarity is not None:
+                    assessments.append([polarity, 1.0, False])
+
+        return [
+            polarity * -0.5 if negated else polarity
+            for polarity, _, negated in assessments
+        ]
+
+    def polarity(self, sentence: str) -> float:
+        """Polarity of `sentence` in [-1, 1], as TextBlob's `TextBlob(sentence).sentiment.polarity`."""
+        tokens = [
+            token for tokens in find_sentences(sentence) for token in tokens
+        ]
+        return _mean(self.assess(tokens))
+
+    def score(self, responses: List[str]) -> np.ndarray:
+        """
+        Returns the reward of every response: its mean sentence polarity normalized from [-1, 1] to [0, 1], 0.5 for
+        a response without any sentence.
+        """
+        polarities, sentence_of_polarity, response_of_sentence = [], [], []
+        for response_index, response in enumerate(responses):
+            for tokens in find_sentences(response):
+                sentence = len(response_of_sentence)
+                response_of_sentence.append(response_index)
+                assessed = self.assess(tokens)
+                polarities.extend(assessed)
+                sentence_of_polarity.extend([sentence] * len(assessed))
+
+        sentences = len(response_of_sentence)
+        sums = np.bincount(
+            sentence_of_polarity, weights=polarities, minlength=sentences
+        )
+        counts = np.bincount(sentence_of_polarity, minlength=sentences)
+        sentence_polarity = sums / np.maximum(counts, 1)
+
+        response_sums = np.bincount(
+            response_of_sentence,
+            weights=sentence_polarity,
+            minlength=len(responses),
+        )
+        response_counts = np.bincount(
+            response_of_sentence, minlength=len(responses)
+        )
+        mean = response_sums / np.maximum(response_counts, 1)
+        return (mean + 1) / 2
+
+
+class SentimentStream:
+    """
+    Scores one response incrementally while it streams in, to the same reward `LexiconSentiment.score` gives the
+    whole response.
+
+    Text is fed in chunks cut anywhere. The last word or whitespace run of what was fed so far can still grow, so it
+    stays pending, everything before it is tokenized, and every sentence the tokens complete is assessed right away.
+    Only the running sum of sentence polarities and the sentence count are kept, so closing the stream just adds the
+    pending tail.
+
+    Example:
+        stream = SentimentStream()
+        async for chunk in chunks:
+            stream.feed(chunk)
+        reward = stream.close()
+    """
+
+    def __init__(self, scorer: Optional[LexiconSentiment] = None):
+        self.scorer = scorer or LexiconSentiment()
+        self.splitter = SentenceSplitter()
+        self.pending = ""
+        self.polarity_sum = 0.0
+        self.sentences = 0
+
+    def feed(self, text: str):
+        """Adds the next chunk of the response."""
+        pending = self.pending + text
+        cut = len(pending)
+        if cut == 0:
+            return
+        space = pending[-1].isspace()
+        while cut and pending[cut - 1].isspace() == space:
+            cut -= 1
+        self.pending = pending[cut:]
+        self._push(find_tokens(pending[:cut]))
+
+    def _push(self, tokens: List[str]):
+        for token in tokens:
+            self._add(self.splitter.push(token))
+
+    def _add(self, sentence: Optional[List[str]]):
+        if not sentence:
+            return
+        # Summed in order and divided as `score` does, so the reward is identical and not merely close.
+        assessed = self.scorer.assess(normalize_sentence(sentence))
+        self.polarity_sum += sum(assessed) / max(len(assessed), 1)
+        self.sentences += 1
+
+    def close(self) -> float:
+        """Ends the response and returns its reward, 0.5 for a response without any sentence."""
+        self._push(find_tokens(self.pending))
+        self.pending = ""
+        self._add(self.splitter.close())
+        mean = self.polarity_sum / max(self.sentences, 1)
+        return (mean + 1) / 2
@@ -0,0 +1,217 @@
+# The MIT License (MIT)
+# Copyright © 2024 nanlabs
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""
+Local weight processing, equivalent to `bt.utils.weight_utils.process_weights_for_netuid` followed by
+`convert_weights_and_uids_for_emit`, but using subnet hyperparameters snapshotted once per epoch instead of querying
+the chain on every call.
+
+The float32 normalization and clipping keep the exact torch operations of the library, with its per-element Python
+loops replaced by tensor ops, so the resulting uint16 payload is bit-identical. The uint16 quantization is done in
+float64 numpy, which matches the library's Python float arithmetic and round-half-to-even rounding.
+"""
+
+import torch
+import numpy as np
+import bittensor as bt
+
+from typing import List, Tuple
+
+U16_MAX = 65535
+
+
+class SubnetHyperparameters:
+    """
+    Snapshot of the subnet limits that weight processing depends on.
+
+    Attributes:
+        min_allowed_weights (int): Minimum number of non-zero weights.
+        max_weight_limit (float): Maximum normalized weight any single uid may get.
+        n (int): Number of uids in the subnet.
+    """
+
+    def __init__(
+        self, min_allowed_weights: int, max_weight_limit: float, n: int
+    ):
+        self.min_allowed_weights = min_allowed_weights
+        self.max_weight_limit = max_weight_limit
+        self.n = n
+
+    def __repr__(self) -> str:
+        return (
+            f"SubnetHyperparameters(min_allowed_weights={self.min_allowed_weights}, "
+            f"max_weight_limit={self.max_weight_limit}, n={self.n})"
+        )
+
+
+def fetch_hyperparameters(
+    self, metagraph: "bt.metagraph" = None
+) -> SubnetHyperparameters:
+    """
+    Queries the subnet limits from the chain through the neuron's chain pool.
+
+    Args:
+        self (:obj:`bittensor.neuron.Neuron`): The neuron object.
+        metagraph (bt.metagraph): Metagraph snapshot to take `n` from, the neuron's current one by default.
+    """
+    metagraph = metagraph or self.metagraph
+    return SubnetHyperparameters(
+        min_allowed_weights=self.chain.call(
+            self.subtensor.min_allowed_weights, netuid=self.config.netuid
+        ),
+        max_weight_limit=self.chain.call(
+            self.subtensor.max_weight_limit, netuid=self.config.netuid
+        ),
+        n=int(metagraph.n),
+    )
+
+
+def normalize_max_weight(
+    x: torch.FloatTensor, limit: float = 0.1
+) -> torch.FloatTensor:
+    """Normalizes `x` to sum to 1 while capping every entry at `limit`, as `bt.utils.weight_utils` does."""
+    epsilon = 1e-7  # For numerical stability after normalization
+    weights = x.clone()
+    values, _ = torch.sort(weights)
+
+    if x.sum() == 0 or len(x) * limit <= 1:
+        return torch.ones_like(x) / x.size(0)
+
+    estimation = values / values.sum()
+    if estimation.max() <= limit:
+        return weights / weights.sum()
+
+    # Find the cumulative sum and sorted tensor
+    cumsum = torch.cumsum(estimation, 0)
+
+    # Determine the index of cutoff, (len - i - 1) * estimation[i] for every i at once.
+    estimation_sum = (
+        torch.arange(
+            len(values) - 1,
+            -1,
+            -1,
+            dtype=estimation.dtype,
+            device=estimation.device,
+        )
+        * estimation
+    )
+    n_values = (estimation / (estimation_sum + cumsum + epsilon) < limit).sum()
+
+    # Determine the cutoff based on the index
+    cutoff_scale = (limit * cumsum[n_values - 1] - epsilon) / (
+        1 - (limit * (len(estimation) - n_values))
+    )
+    cutoff = cutoff_scale * values.sum()
+
+    # Applying the cutoff
+    weights[weights > cutoff] = cutoff
+    return weights / weights.sum()
+
+
+def process_weights(
+    uids: torch.LongTensor,
+    weights: torch.FloatTensor,
+    hyperparameters: SubnetHyperparameters,
+    exclude_quantile: int = 0,
+) -> Tuple[torch.LongTensor, torch.FloatTensor]:
+    """
+    Applies the subnet limits to raw weights, like `bt.utils.weight_utils.process_weights_for_netuid`.
+
+    Returns:
+        Tuple[torch.LongTensor, torch.FloatTensor]: The uids to set weights for and their normalized weights.
+    """
+    weights = weights.type(torch.float32)
+    n = hyperparameters.n
+    min_allowed_weights = hyperparameters.min_allowed_weights
+    max_weight_limit = hyperparameters.max_weight_limit
+    quantile = exclude_quantile / U16_MAX
+
+    # Find all non zero weights.
+    non_zero_weight_idx = torch.argwhere(weights > 0).squeeze(dim=1)
+    non_zero_weight_uids = uids[non_zero_weight_idx]
+    non_zero_weights = weights[non_zero_weight_idx]
+    if non_zero_weights.numel() == 0 or n < min_allowed_weights:
+        bt.logging.warning("No non-zero weights returning all ones.")
+        final_weights = torch.ones(n) / n
+        return torch.arange(n), final_weights
+
+    if non_zero_weights.numel() < min_allowed_weights:
+        bt.logging.warning(
+            "No non-zero weights less then min allowed weight, returning all ones."
+        )
+        # Creating minimum even non-zero weights.
+        weights = torch.full((n,), 1e-5)
+        weights[non_zero_weight_idx] += non_zero_weights
+        normalized_weights = normalize_max_weight(
+            x=weights, limit=max_weight_limit
+        )
+        return torch.arange(len(normalized_weights)), normalized_weights
+
+    # Compute the exclude quantile and find the weights in the lowest quantile
+    max_exclude = max(0, len(non_zero_weights) - min_allowed_weights) / len(
+        non_zero_weights
+    )
+    exclude_quantile = min([quantile, max_exclude])
+    lowest_quantile = non_zero_weights.quantile(exclude_quantile)
+
+    # Exclude all weights below the allowed quantile.
+    keep = lowest_quantile <= non_zero_weights
+    non_zero_weight_uids = non_zero_weight_uids[keep]
+    non_zero_weights = non_zero_weights[keep]
+
+    # Normalize weights and return.
+    normalized_weights = normalize_max_weight(
+        x=non_zero_weights, limit=max_weight_limit
+    )
+    return non_zero_weight_uids, normalized_weights
+
+
+def convert_weights_and_uids_for_emit(
+    uids: torch.LongTensor, weights: torch.FloatTensor
+) -> Tuple[List[int], List[int]]:
+    """
+    Max-upscales `weights` to uint16 and drops the uids whose weight rounds to zero, like
+    `bt.utils.weight_utils.convert_weights_and_uids_for_emit`.
+
+    Returns:
+        Tuple[List[int], List[int]]: The uids and uint16 weights to submit.
+    """
+    weights = np.asarray(weights.cpu(), dtype=np.float64)
+    uids = np.asarray(uids.cpu(), dtype=np.int64)
+    if weights.min() < 0:
+        raise ValueError(
+            f"Passed weight is negative cannot exist on chain {weights.tolist()}"
+        )
+    if uids.min() < 0:
+        raise ValueError(
+            f"Passed uid is negative cannot exist on chain {uids.tolist()}"
+        )
+    if len(uids) != len(weights):
+        raise ValueError(
+            f"Passed weights and uids must have the same length, got {len(uids)} and {len(weights)}"
+        )
+    if not weights.any():
+        return [], []  # Nothing to set on chain.
+
+    # Max-upscale values (max_weight = 1) and convert to int representation.
+    uint16_weights = np.round(weights / weights.max() * U16_MAX).astype(
+        np.int64
+    )
+
+    # Filter zeros.
+    non_zero = uint16_weights != 0
+    return uids[non_zero].tolist(), uint16_weights[non_zero].tolist()
@@ -0,0 +1,8 @@
+import pytest
+import bittensor as bt
+
+
+@pytest.fixture
+def fresh_mock_chain():
+    """Every MockSubtensor registers its neurons in bittensor's global mock chain, start a test from an empty one."""
+    bt.MockSubtensor.reset()
@@ -0,0 +1,115 @@
+import gc
+import time
+import weakref
+import asyncio
+import threading
+
+import pytest
+
+from prompting.utils.cache import TTLCache, ttl_cache
+
+
+def test_entries_expire_individually():
+    cache = TTLCache(maxsize=8, ttl=0.1)
+    cache.set("a", 1)
+    time.sleep(0.06)
+    cache.set("b", 2)
+    time.sleep(0.06)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.info()["expirations"] == 1
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    info = cache.info()
+    assert info["evictions"] == 1
+    assert (info["hits"], info["misses"]) == (2, 1)
+
+
+class Neuron:
+    def __init__(self, block):
+        self.block = block
+        self.calls = 0
+
+    @ttl_cache(maxsize=1, ttl=60)
+    def get_block(self):
+        self.calls += 1
+        return self.block
+
+
+def test_instances_have_their_own_cache():
+    first, second = Neuron(1), Neuron(2)
+    assert [first.get_block(), second.get_block(), first.get_block()] == [
+        1,
+        2,
+        1,
+    ]
+    assert first.calls == second.calls == 1
+
+
+def test_does_not_keep_instances_alive():
+    neuron = Neuron(1)
+    neuron.get_block()
+    collected = threading.Event()
+    weakref.finalize(neuron, collected.set)
+    del neuron
+    gc.collect()
+    assert collected.is_set()
+
+
+def test_single_flight():
+    calls = []
+
+    @ttl_cache(ttl=60)
+    def slow(x):
+        calls.append(x)
+        time.sleep(0.1)
+        return x * 2
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(slow(3)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [6] * 5
+    assert calls == [3]
+    assert slow.cache_info()["misses"] == 1
+
+
+def test_async_single_flight_and_errors():
+    calls = []
+
+    @ttl_cache(ttl=60)
+    async def fetch(x):
+        calls.append(x)
+        await asyncio.sleep(0.05)
+        if x < 0:
+            raise ValueError(x)
+        return x + 1
+
+    async def run():
+        assert await asyncio.gather(*[fetch(1) for _ in range(4)]) == [2] * 4
+        assert await fetch(1) == 2
+        with pytest.raises(ValueError):
+            await fetch(-1)
+        # Errors are not cached.
+        with pytest.raises(ValueError):
+            await fetch(-1)
+
+    asyncio.run(run())
+    assert calls == [1, -1, -1]
+    assert fetch.cache_info()["hits"] == 1
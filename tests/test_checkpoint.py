@@ -0,0 +1,73 @@
+import os
+import time
+import torch
+
+from prompting.utils.checkpoint import CheckpointWriter, load_checkpoint
+
+
+def test_snapshot_and_deltas_roundtrip(tmp_path):
+    path = str(tmp_path / "state.pt")
+    state = {"scores": torch.zeros(4)}
+
+    writer = CheckpointWriter(
+        path,
+        snapshot_fn=lambda: {
+            "scores": state["scores"].clone(),
+            "delta_seq": writer.seq,
+        },
+        interval=3600,
+        delta_flush_interval=0.01,
+    )
+    writer.request()
+    writer.flush()
+    assert os.path.exists(path)
+
+    # Deltas appended after the snapshot reach the log long before the next snapshot is due.
+    state["scores"][1] = 0.5
+    writer.append_delta({"uids": [1], "scores": [0.5]})
+    time.sleep(0.2)
+
+    snapshot, deltas = load_checkpoint(path)
+    assert snapshot["delta_seq"] == 0
+    assert [d["seq"] for d in deltas] == [1]
+
+
+def test_snapshot_truncates_covered_deltas(tmp_path):
+    path = str(tmp_path / "state.pt")
+    writer = CheckpointWriter(
+        path, snapshot_fn=lambda: {"delta_seq": writer.seq}, interval=3600
+    )
+    for _ in range(3):
+        writer.append_delta({"uids": [0], "scores": [1.0]})
+    writer.close()
+
+    snapshot, deltas = load_checkpoint(path)
+    assert snapshot["delta_seq"] == 3
+    assert deltas == []
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_torn_delta_record_is_skipped(tmp_path):
+    path = str(tmp_path / "state.pt")
+    with open(path + ".deltas", "w") as f:
+        f.write('{"seq": 1, "uids": [0], "scores": [1.0]}\n{"seq": 2, "ui')
+
+    snapshot, deltas = load_checkpoint(path)
+    assert snapshot is None
+    assert [d["seq"] for d in deltas] == [1]
+
+
+def test_writer_appends_after_a_torn_record(tmp_path):
+    path = str(tmp_path / "state.pt")
+    with open(path + ".deltas", "w") as f:
+        f.write('{"seq": 1, "uids": [0], "scores": [1.0]}\n{"seq": 2, "ui')
+
+    writer = CheckpointWriter(
+        path, snapshot_fn=dict, interval=3600, delta_flush_interval=0.01
+    )
+    writer.seq = 1
+    writer.append_delta({"uids": [1], "scores": [0.5]})
+    time.sleep(0.2)
+
+    _, deltas = load_checkpoint(path)
+    assert [d["seq"] for d in deltas] == [1, 2]
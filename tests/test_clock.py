@@ -0,0 +1,96 @@
+from prompting.utils.clock import BlockClock, VirtualBlockSource
+
+
+def make_clock(source, correction_interval=60):
+    calls = []
+
+    def block_fn():
+        calls.append(source.time())
+        return source.block()
+
+    clock = BlockClock(
+        block_fn,
+        correction_interval=correction_interval,
+        time_fn=source.time,
+        sleep_fn=source.sleep,
+    )
+    return clock, calls
+
+
+def test_predicts_between_corrections():
+    source = VirtualBlockSource(start_block=100)
+    clock, calls = make_clock(source, correction_interval=120)
+
+    assert clock.current() == 100
+    source.advance_blocks(5)
+    assert clock.current() == 105
+    assert len(calls) == 1
+
+    # Corrected once the interval has passed.
+    source.advance_blocks(10)
+    assert clock.current() == 115
+    assert len(calls) == 2
+
+
+def test_corrects_drift():
+    source = VirtualBlockSource(start_block=100)
+    clock, _ = make_clock(source, correction_interval=30)
+    clock.current()
+
+    # The chain falls 3 blocks behind: the prediction runs ahead until the next correction.
+    source.start_block -= 3
+    source.advance(24)
+    assert clock.current() == 102
+    source.advance(12)
+    assert clock.current() == source.block() == 100
+
+
+def test_wait_until_fast_forwards_epochs():
+    produced = []
+    source = VirtualBlockSource(
+        start_block=1000, on_block=lambda: produced.append(1)
+    )
+    clock, calls = make_clock(source, correction_interval=3600)
+
+    assert clock.wait_until(1000 + 360)
+    assert source.block() == 1360
+    assert len(produced) == 360
+    # One correction to start and one to confirm the target, no polling in between.
+    assert len(calls) == 2
+
+
+def test_wait_until_stops():
+    source = VirtualBlockSource()
+    clock, _ = make_clock(source)
+    assert not clock.wait_until(100, should_stop=lambda: source.time() > 30)
+    assert source.block() < 100
+
+
+def test_observe_keeps_phase():
+    source = VirtualBlockSource(start_block=10)
+    clock, _ = make_clock(source)
+    clock.observe(10, at=0.0)
+    clock.observe(10, at=11.0)
+    assert clock.time_until(11) == 12.0
+
+
+def test_reached_blocks_are_not_confirmed_again():
+    source = VirtualBlockSource(start_block=1000)
+    clock, calls = make_clock(source, correction_interval=3600)
+
+    assert clock.wait_until(1010)
+    for _ in range(1000):
+        assert clock.wait_until(1010)
+    assert len(calls) == 2
+
+
+def test_lagging_chain_is_confirmed_once_per_block():
+    source = VirtualBlockSource(start_block=1000)
+    clock, calls = make_clock(source, correction_interval=3600)
+    clock.current()
+
+    # The chain falls 5 blocks behind the prediction.
+    source.start_block -= 5
+    assert clock.wait_until(1010)
+    assert source.block() >= 1010
+    assert len(calls) <= 1 + 5 + 2
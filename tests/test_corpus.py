@@ -0,0 +1,99 @@
+import os
+import json
+import time
+
+import pytest
+
+from prompting.validator.corpus import (
+    DEFAULT_PROMPT,
+    PromptCorpus,
+    PromptSource,
+    build_index,
+    index_path,
+)
+
+
+def write_corpus(path, lines, trailing_newline=True):
+    text = "\n".join(lines) + ("\n" if trailing_newline else "")
+    path.write_text(text)
+    return str(path)
+
+
+def test_random_access_through_offset_index(tmp_path):
+    lines = [
+        json.dumps("Tell me about the moon."),
+        "",
+        json.dumps({"prompt": "Write a haiku.", "criteria": ["Be brief."]}),
+        json.dumps({"prompt": "Ünïcode?", "character_info": "A poet."}),
+    ]
+    corpus = PromptCorpus(
+        write_corpus(tmp_path / "prompts.jsonl", lines, False)
+    )
+
+    assert len(corpus) == 3
+    assert corpus[0]["prompt"] == "Tell me about the moon."
+    assert corpus[0]["criteria"] == DEFAULT_PROMPT["criteria"]
+    assert corpus[1]["criteria"] == ["Be brief."]
+    assert (
+        corpus[2]["prompt"] == "Ünïcode?"
+        and corpus[2]["character_info"] == "A poet."
+    )
+    with pytest.raises(IndexError):
+        corpus[3]
+    corpus.close()
+
+
+def test_index_is_built_in_blocks_and_rebuilt_when_stale(tmp_path):
+    lines = [json.dumps(f"prompt {i}") for i in range(1000)]
+    path = write_corpus(tmp_path / "prompts.jsonl", lines)
+    # Blocks smaller than a line, so lines span blocks.
+    build_index(path, block_size=7)
+    corpus = PromptCorpus(path)
+    assert [corpus[i]["prompt"] for i in (0, 1, 999)] == [
+        "prompt 0",
+        "prompt 1",
+        "prompt 999",
+    ]
+    corpus.close()
+
+    time.sleep(0.01)
+    write_corpus(tmp_path / "prompts.jsonl", lines[:10] + ['"new"'])
+    corpus = PromptCorpus(path)
+    assert len(corpus) == 11 and corpus[10]["prompt"] == "new"
+    assert os.path.exists(index_path(path))
+    corpus.close()
+
+
+def test_empty_corpus_is_rejected(tmp_path):
+    for name, content in (("empty.jsonl", ""), ("blank.jsonl", "\n\n")):
+        (tmp_path / name).write_text(content)
+        with pytest.raises(ValueError):
+            PromptCorpus(str(tmp_path / name))
+
+
+def test_source_prefetches_synapses(tmp_path):
+    lines = [json.dumps(f"prompt {i}") for i in range(50)] + ["not json"]
+    source = PromptSource(
+        PromptCorpus(write_corpus(tmp_path / "prompts.jsonl", lines)),
+        prefetch=4,
+        seed=0,
+    )
+    deadline = time.time() + 5
+    while source.ready() < 4 and time.time() < deadline:
+        time.sleep(0.01)
+    assert source.ready() == 4
+
+    prompts = [source.next() for _ in range(20)]
+    assert all(p.messages[0].content.startswith("prompt ") for p in prompts)
+    assert len({p.messages[0].content for p in prompts}) > 1
+    assert all(p.criteria == DEFAULT_PROMPT["criteria"] for p in prompts)
+    source.close()
+
+
+def test_source_without_corpus_sends_default_prompt():
+    source = PromptSource(None)
+    prompting = source.next()
+    assert prompting.messages[0].content == DEFAULT_PROMPT["prompt"]
+    assert prompting.character_info == DEFAULT_PROMPT["character_info"]
+    assert source.misses == 0
+    source.close()
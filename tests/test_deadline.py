@@ -0,0 +1,43 @@
+import torch
+
+from prompting.validator.deadline import AdaptiveDeadline
+
+
+def test_defaults_to_max_timeout():
+    deadline = AdaptiveDeadline(max_timeout=10)
+    deadline.observe(torch.full((100,), 0.5))
+    assert deadline.current() == 10
+
+    deadline = AdaptiveDeadline(max_timeout=10, percentile=95, min_samples=50)
+    deadline.observe(torch.full((49,), 0.5))
+    assert deadline.current() == 10
+
+
+def test_adapts_to_latency_percentile():
+    deadline = AdaptiveDeadline(max_timeout=10, percentile=95, margin=0.5)
+    deadline.observe(torch.linspace(0.1, 2.0, 200))
+    assert 2.3 < deadline.current() < 2.6
+
+
+def test_clamps_to_bounds():
+    deadline = AdaptiveDeadline(
+        max_timeout=10, min_timeout=1, percentile=95, margin=0
+    )
+    deadline.observe(torch.full((100,), 0.01))
+    assert deadline.current() == 1
+
+    deadline = AdaptiveDeadline(max_timeout=10, percentile=95)
+    deadline.observe(torch.full((100,), 30.0))
+    assert deadline.current() == 10
+
+
+def test_timeouts_count_at_the_deadline():
+    # A tenth of the miners time out, the 95th percentile is past the deadline they timed out at.
+    deadline = AdaptiveDeadline(max_timeout=10, percentile=95, margin=0.5)
+    deadline.observe(torch.full((90,), 0.5))
+    assert deadline.current() < 1.5
+
+    deadline.observe_timeouts(10, 2.0)
+    deadline.observe_timeouts(0, 2.0)
+    assert deadline.histogram.samples == 100
+    assert deadline.current() >= 2.5
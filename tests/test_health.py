@@ -0,0 +1,43 @@
+import torch
+
+from prompting.validator.health import MinerHealth
+
+
+def test_tracks_latency_and_timeouts():
+    health = MinerHealth(4, alpha=0.5)
+    health.observe([0, 1], [1.0, 10.0], successes=[True, False], now=0)
+    health.observe([0, 1], [3.0, 10.0], successes=[True, False], now=1)
+
+    assert torch.allclose(health.latency[:2], torch.tensor([2.0, 10.0]))
+    assert torch.isnan(health.latency[2:]).all()
+    assert torch.allclose(health.timeout_rate[:2], torch.tensor([0.0, 0.75]))
+    assert health.consecutive_failures.tolist() == [0, 2, 0, 0]
+
+
+def test_breaker_opens_cools_down_and_probes():
+    health = MinerHealth(3, failure_threshold=2, cooldown=60)
+    for now in (0, 1):
+        health.observe([1], [12.0], successes=[False], now=now)
+
+    assert health.allowed(now=30).tolist() == [True, False, True]
+    assert health.open_count(now=30) == 1
+
+    # Cooldown over: one probe is allowed, sampling it restarts the cooldown.
+    assert health.allowed(now=61).tolist() == [True, True, True]
+    health.mark_probing([0, 1], now=61)
+    assert health.allowed(now=62).tolist() == [True, False, True]
+
+    # A failed probe keeps the breaker open, a successful one closes it.
+    health.observe([1], [12.0], successes=[False], now=62)
+    assert not health.allowed(now=121)[1]
+    health.observe([1], [0.5], successes=[True], now=122)
+    assert health.allowed(now=123).all()
+
+
+def test_resize_and_reset():
+    health = MinerHealth(2, failure_threshold=1)
+    health.observe([1], [12.0], successes=[False], now=0)
+    health.resize(4)
+    assert health.allowed(now=1).tolist() == [True, False, True, True]
+    health.reset([1])
+    assert health.allowed(now=1).all()
@@ -0,0 +1,54 @@
+import torch
+
+from prompting.validator.history import RewardHistory
+
+
+def test_ring_buffer_keeps_last_window():
+    history = RewardHistory(3, window=4)
+    for reward in range(6):
+        history.push([0], torch.FloatTensor([reward]))
+
+    assert history.count[0] == 4
+    assert torch.isclose(history.mean()[0], torch.tensor(3.5))
+    # Memory stays fixed regardless of how many samples were pushed.
+    assert history.rewards.shape == (3, 4)
+
+
+def test_statistics_ignore_empty_slots():
+    history = RewardHistory(3, window=8)
+    history.push(
+        [0, 1], torch.FloatTensor([1.0, 0.0]), torch.FloatTensor([0.5, 2.0])
+    )
+    history.push(
+        [0, 1], torch.FloatTensor([1.0, 1.0]), torch.FloatTensor([0.5, 4.0])
+    )
+
+    assert torch.allclose(history.mean()[:2], torch.FloatTensor([1.0, 0.5]))
+    assert torch.allclose(
+        history.variance()[:2], torch.FloatTensor([0.0, 0.25])
+    )
+    assert torch.allclose(
+        history.percentile(50, latencies=True)[:2],
+        torch.FloatTensor([0.5, 3.0]),
+    )
+    assert torch.isnan(history.mean()[2])
+
+
+def test_duplicate_uids_in_one_push():
+    history = RewardHistory(2, window=4)
+    history.push([1, 1, 1], torch.FloatTensor([0.0, 1.0, 2.0]))
+    assert history.count[1] == 3
+    assert torch.isclose(history.mean()[1], torch.tensor(1.0))
+
+
+def test_resize_reset_and_state_roundtrip():
+    history = RewardHistory(2, window=4)
+    history.push([0, 1], torch.FloatTensor([1.0, 1.0]))
+    history.resize(4)
+    history.reset([1])
+    assert history.count.tolist() == [1, 0, 0, 0]
+
+    restored = RewardHistory(4, window=4)
+    restored.load_state_dict(history.state_dict())
+    assert torch.equal(restored.count, history.count)
+    assert torch.isclose(restored.mean()[0], torch.tensor(1.0))
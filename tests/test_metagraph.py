@@ -0,0 +1,52 @@
+import torch
+import pytest
+
+from prompting.mock import MockMetagraph, MockSubtensor
+from prompting.utils.metagraph import diff_metagraphs
+
+
+pytestmark = pytest.mark.usefixtures("fresh_mock_chain")
+
+
+def test_diff_identical_snapshots():
+    subtensor = MockSubtensor(netuid=1, n=8)
+    diff = diff_metagraphs(
+        MockMetagraph(subtensor=subtensor), MockMetagraph(subtensor=subtensor)
+    )
+    assert not diff.changed
+    assert diff.old_n == diff.new_n == 8
+
+
+def test_diff_reports_only_changed_uids():
+    subtensor = MockSubtensor(netuid=1, n=8)
+    old = MockMetagraph(subtensor=subtensor)
+    new = MockMetagraph(subtensor=subtensor)
+
+    old_hotkeys = list(old.hotkeys)
+    old_hotkeys[3] = "replaced-hotkey"
+    # S is a read-only view of the metagraph's stake, change the stake in place.
+    torch.as_tensor(new.S).data[5] += 1
+
+    diff = diff_metagraphs(old, new, old_hotkeys=old_hotkeys)
+    assert diff.changed
+    assert diff.replaced == [3]
+    assert diff.stake_changed == [5]
+    assert diff.added == []
+
+
+def test_diff_reports_added_uids():
+    subtensor = MockSubtensor(netuid=1, n=4)
+    old = MockMetagraph(subtensor=subtensor)
+    for i in range(2):
+        subtensor.force_register_neuron(
+            netuid=1,
+            hotkey=f"late-miner-hotkey-{i}",
+            coldkey="mock-coldkey",
+            balance=100000,
+            stake=100000,
+        )
+    new = MockMetagraph(subtensor=subtensor)
+
+    diff = diff_metagraphs(old, new)
+    assert diff.added == [diff.old_n, diff.old_n + 1]
+    assert diff.replaced == []
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+import torch
+
+from prompting.utils.metrics import IdleTracker, LogHistogram
+
+
+def test_idle_tracker_counts_only_gaps_between_work():
+    tracker = IdleTracker()
+    tracker.begin()
+    time.sleep(0.05)
+    tracker.end()
+    time.sleep(0.05)
+    tracker.begin()
+
+    idle = tracker.total_idle_seconds()
+    assert 0.05 <= idle < 0.09
+    # Idle time must not grow while work is in flight.
+    time.sleep(0.02)
+    assert tracker.total_idle_seconds() == idle
+
+
+def test_idle_tracker_overlapping_work():
+    tracker = IdleTracker()
+    tracker.begin()
+    tracker.begin()
+    tracker.end()
+    assert tracker.in_flight == 1
+    idle = tracker.total_idle_seconds()
+    time.sleep(0.02)
+    assert tracker.total_idle_seconds() == idle
+    tracker.end()
+    assert tracker.idle_seconds_per_hour() > 0
+
+
+def test_log_histogram_quantiles():
+    histogram = LogHistogram(precision=0.01)
+    histogram.observe(torch.linspace(0.01, 10, 1000))
+
+    assert histogram.quantile(0.5) == pytest.approx(5.0, rel=0.02)
+    assert histogram.quantile(0.95) == pytest.approx(9.5, rel=0.02)
+
+
+def test_log_histogram_follows_recent_samples():
+    histogram = LogHistogram(max_samples=100)
+    for _ in range(10):
+        histogram.observe(torch.full((50,), 1.0))
+    for _ in range(10):
+        histogram.observe(torch.full((50,), 5.0))
+    assert histogram.quantile(0.5) == pytest.approx(5.0, rel=0.02)
@@ -0,0 +1,99 @@
+import torch
+
+from prompting.validator.history import RewardHistory
+from prompting.utils.mmap_state import MmapStateFile, MmapStateReader
+
+
+def make_state(n, step=1):
+    history = RewardHistory(n, window=4)
+    history.push(list(range(n)), torch.rand(n), torch.rand(n))
+    return {
+        "step": step,
+        "scores": torch.rand(n),
+        "last_scored": torch.rand(n, dtype=torch.float64),
+        "last_update": torch.arange(n),
+        "hotkeys": [f"hotkey-{uid}" for uid in range(n)],
+        "reward_history": history.state_dict(),
+        "delta_seq": step * 10,
+    }
+
+
+def test_roundtrip(tmp_path):
+    path = str(tmp_path / "state.npy")
+    state = make_state(8)
+    state_file = MmapStateFile(path)
+    assert state_file.load() is None
+
+    state_file.save(state)
+    loaded = MmapStateFile(path).load()
+    assert loaded["step"] == 1
+    assert loaded["delta_seq"] == 10
+    assert loaded["hotkeys"] == state["hotkeys"]
+    assert torch.equal(loaded["scores"], state["scores"])
+    assert torch.equal(loaded["last_update"], state["last_update"])
+    assert torch.equal(
+        loaded["reward_history"]["count"], state["reward_history"]["count"]
+    )
+
+
+def test_reader_sees_in_place_updates_and_growth(tmp_path):
+    path = str(tmp_path / "state.npy")
+    state_file = MmapStateFile(path)
+    state_file.save(make_state(4, step=1))
+
+    reader = MmapStateReader(path)
+    first = reader.read()
+    assert first["step"] == 1
+    assert len(first["scores"]) == 4
+
+    second_state = make_state(4, step=2)
+    state_file.save(second_state)
+    second = reader.read()
+    assert second["generation"] == first["generation"] + 1
+    assert torch.equal(
+        torch.from_numpy(second["scores"]), second_state["scores"]
+    )
+
+    # Growing the metagraph swaps in a bigger file that the reader picks up.
+    state_file.save(make_state(6, step=3))
+    third = reader.read()
+    assert third["step"] == 3
+    assert len(third["hotkeys"]) == 6
+
+
+def test_view_is_zero_copy(tmp_path):
+    path = str(tmp_path / "state.npy")
+    MmapStateFile(path).save(make_state(4))
+    reader = MmapStateReader(path)
+    records, generation = reader.view()
+    assert not records.flags.owndata
+    assert reader.is_consistent(generation)
+
+
+def test_any_save_after_a_view_invalidates_it(tmp_path):
+    path = str(tmp_path / "state.npy")
+    state_file = MmapStateFile(path)
+    state_file.save(make_state(4, step=1))
+    reader = MmapStateReader(path)
+    _, generation = reader.view()
+    # The next save writes the other slot, but the one after rewrites the viewed slot before bumping the generation.
+    state_file.save(make_state(4, step=2))
+    assert not reader.is_consistent(generation)
+
+
+def test_resize_survives_a_crash_before_the_header_flip(tmp_path):
+    path = str(tmp_path / "state.npy")
+    state_file = MmapStateFile(path)
+    state_file.save(make_state(4, step=1))
+    with open(path + ".header.npy", "rb") as f:
+        header = f.read()
+
+    # The writer dies after swapping in the bigger file, the header still points at the old active slot.
+    grown = make_state(6, step=2)
+    state_file.save(grown)
+    with open(path + ".header.npy", "wb") as f:
+        f.write(header)
+
+    loaded = MmapStateFile(path).load()
+    assert torch.equal(loaded["scores"], grown["scores"])
+    assert loaded["hotkeys"] == grown["hotkeys"][:4]
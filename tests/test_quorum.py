@@ -0,0 +1,157 @@
+import time
+import asyncio
+
+import torch
+import bittensor as bt
+
+from prompting.validator.quorum import ArrivalScorer, query_quorum, timed_out
+
+
+class LatencyDendrite:
+    """Answers every axon after the latency it maps to, with a 408 past the timeout."""
+
+    def __init__(self, latencies, failing=()):
+        self.latencies = latencies
+        self.failing = failing
+        self.calls = 0
+
+    async def __call__(self, axons, synapse, deserialize=True, timeout=12):
+        self.calls += 1
+        responses = []
+        for axon in axons:
+            latency = self.latencies[axon]
+            await asyncio.sleep(min(latency, timeout))
+            response = synapse.copy()
+            code = (
+                408
+                if latency >= timeout
+                else 500
+                if axon in self.failing
+                else 200
+            )
+            response.dendrite = bt.TerminalInfo(
+                status_code=code, process_time=latency
+            )
+            responses.append(response)
+        return responses
+
+
+def run(dendrite, axons, **kwargs):
+    async def query():
+        start = time.perf_counter()
+        result = await query_quorum(dendrite, axons, bt.Synapse(), **kwargs)
+        returned = time.perf_counter() - start
+        late = await result.late()
+        return result, returned, late
+
+    return asyncio.run(query())
+
+
+def test_waits_for_every_axon_by_default():
+    dendrite = LatencyDendrite({0: 0.01, 1: 0.02, 2: 0.1})
+    result, returned, late = run(dendrite, [0, 1, 2], timeout=1)
+
+    assert result.arrived == [0, 1, 2]
+    assert not result.pending and late == {}
+    assert returned >= 0.1
+    assert dendrite.calls == 3
+
+
+def test_returns_at_quorum_and_keeps_stragglers_pending():
+    dendrite = LatencyDendrite({0: 0.01, 1: 0.02, 2: 0.01, 3: 0.3})
+    result, returned, late = run(
+        dendrite, [0, 1, 2, 3], timeout=1, quorum=0.75
+    )
+
+    assert returned < 0.2
+    assert result.arrived == [0, 1, 2]
+    assert result.responses[3] is None
+    assert list(late) == [3]
+    assert late[3].dendrite.status_code == 200
+
+
+def test_min_successes_ignores_failures():
+    dendrite = LatencyDendrite(
+        {0: 0.01, 1: 0.02, 2: 0.05, 3: 0.3}, failing=(0,)
+    )
+    result, returned, _ = run(
+        dendrite, [0, 1, 2, 3], timeout=1, min_successes=2
+    )
+
+    assert result.arrived == [0, 1, 2]
+    assert returned < 0.2
+
+
+def test_soft_deadline():
+    dendrite = LatencyDendrite({0: 0.01, 1: 0.5, 2: 0.5})
+    result, returned, late = run(
+        dendrite, [0, 1, 2], timeout=1, soft_deadline=0.05
+    )
+
+    assert result.arrived == [0]
+    assert 0.05 <= returned < 0.3
+    assert sorted(late) == [1, 2]
+
+
+def test_cancelled_stragglers_count_as_timeouts():
+    async def query():
+        dendrite = LatencyDendrite({0: 0.01, 1: 5})
+        result = await query_quorum(
+            dendrite, [0, 1], bt.Synapse(), timeout=10, quorum=0.5
+        )
+        result.cancel()
+        await asyncio.sleep(0)
+        return result
+
+    result = asyncio.run(query())
+    assert result.pending[1].cancelled()
+
+    response = timed_out(bt.Synapse(), 10)
+    assert response.dendrite.status_code == 408
+    assert response.dendrite.process_time == 10
+
+
+def test_on_response_sees_responses_as_they_arrive():
+    dendrite = LatencyDendrite({0: 0.1, 1: 0.01, 2: 0.05})
+    seen = []
+
+    async def query():
+        start = time.perf_counter()
+
+        def on_response(index, response):
+            seen.append((index, time.perf_counter() - start))
+
+        return await query_quorum(
+            dendrite,
+            [0, 1, 2],
+            bt.Synapse(),
+            timeout=1,
+            on_response=on_response,
+        )
+
+    result = asyncio.run(query())
+    assert [index for index, _ in seen] == [1, 2, 0]
+    assert seen[0][1] < 0.05
+    assert result.arrived == [0, 1, 2]
+
+
+def test_arrival_scorer_batches_what_arrived_meanwhile():
+    # Latencies as axon ids, the first arrives alone and the others while its batch is being scored.
+    dendrite = LatencyDendrite({0: 0.01, 1: 0.02, 2: 0.03, 3: 0.04})
+    batches = []
+
+    def score(responses):
+        batches.append(len(responses))
+        time.sleep(0.1)
+        return torch.FloatTensor([r.dendrite.process_time for r in responses])
+
+    async def query():
+        scorer = ArrivalScorer(score)
+        result = await query_quorum(
+            dendrite, [3, 1, 0, 2], bt.Synapse(), timeout=1, on_response=scorer
+        )
+        return await scorer.gather(result.arrived), scorer
+
+    rewards, scorer = asyncio.run(query())
+    assert batches == [1, 3] and scorer.batches == 2
+    assert torch.allclose(rewards, torch.tensor([0.04, 0.02, 0.01, 0.03]))
@@ -0,0 +1,118 @@
+import os
+
+import torch
+
+from prompting.protocol import Prompting
+from prompting.validator.pipeline import EmptyFilter, RewardPipeline
+from prompting.validator.reward_engine import RewardEngine, prompt_key
+
+
+def length_reward(query: int, completion: str) -> float:
+    return query + len(completion)
+
+
+def worker_pid(query: int, completion: str) -> float:
+    return os.getpid()
+
+
+COMPLETIONS = ["a" * i for i in range(23)]
+
+
+def test_inline_engine_matches_reward():
+    engine = RewardEngine(processes=0, reward_fn=length_reward)
+    rewards = engine.rewards(1, COMPLETIONS)
+
+    assert isinstance(rewards, torch.FloatTensor)
+    assert rewards.tolist() == [1 + i for i in range(23)]
+    assert engine.rewards(1, []).tolist() == []
+
+
+def test_pool_keeps_completion_order():
+    engine = RewardEngine(
+        processes=2, reward_fn=length_reward, initializer=None
+    )
+    try:
+        engine.start()
+        for chunksize in (0, 1, 5):
+            engine.chunksize = chunksize
+            assert engine.rewards(2, COMPLETIONS).tolist() == [
+                2 + i for i in range(23)
+            ]
+    finally:
+        engine.shutdown()
+
+
+def test_chunks_spread_over_workers():
+    engine = RewardEngine(processes=2, reward_fn=worker_pid, initializer=None)
+    try:
+        assert [len(chunk) for chunk in engine.chunks(COMPLETIONS)] == [12, 11]
+        engine.start()
+        pids = set(engine.rewards(0, COMPLETIONS).tolist())
+        assert os.getpid() not in pids
+    finally:
+        engine.shutdown()
+
+
+def test_cache_scores_identical_completions_once():
+    calls = []
+
+    engine = RewardEngine(reward_fn=length_reward, cache_size=2)
+    engine.compute = lambda query, completions: calls.append(completions) or [
+        length_reward(query, completion) for completion in completions
+    ]
+
+    assert engine.rewards(0, ["ab", "ab ", "abc"]).tolist() == [2, 2, 3]
+    assert calls == [["ab", "abc"]]
+    assert engine.rewards(0, ["abc", "ab"]).tolist() == [3, 2]
+    assert len(calls) == 1
+
+    # Another query or reward version is scored again.
+    engine.rewards(1, ["ab"])
+    engine.version = "next"
+    engine.rewards(1, ["ab"])
+    assert len(calls) == 3
+
+    info = engine.cache_info()
+    assert (
+        info["hits"] == 2 and info["misses"] == 4 and info["duplicates"] == 1
+    )
+    assert info["evictions"] == 2 and info["currsize"] == 2
+
+
+def test_prompt_key_identifies_the_prompt():
+    def synapse(message, criteria=("Be brief.",)):
+        prompting = Prompting(
+            character_info="A poet.", criteria=list(criteria), messages=[]
+        )
+        prompting.add_message(message)
+        return prompting
+
+    assert prompt_key(synapse("Tell me a joke.")) == prompt_key(
+        synapse("Tell me a joke.")
+    )
+    assert prompt_key(synapse("Tell me a joke.")) != prompt_key(
+        synapse("Tell me a poem.")
+    )
+    assert prompt_key(synapse("Tell me a joke.")) != prompt_key(
+        synapse("Tell me a joke.", ())
+    )
+
+
+def test_cache_disabled():
+    engine = RewardEngine(reward_fn=length_reward, cache_size=0)
+    assert engine.rewards(0, ["ab", "ab"]).tolist() == [2, 2]
+    assert engine.cache_info() == {}
+
+
+def test_engine_collects_pipeline_timings():
+    pipeline = RewardPipeline(filters=[EmptyFilter()], models=[])
+    engine = RewardEngine(processes=2, reward_fn=pipeline, initializer=None)
+    try:
+        assert engine.rewards(0, ["", "", "", ""]).tolist() == [0.0] * 4
+        timings = engine.stage_timings()
+        assert (
+            timings["empty"]["calls"] == 4
+            and timings["empty"]["rejected"] == 4
+        )
+    finally:
+        engine.shutdown()
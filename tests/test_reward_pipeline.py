@@ -0,0 +1,141 @@
+import asyncio
+import pytest
+
+from prompting.validator.pipeline import (
+    EmptyFilter,
+    ErrorFilter,
+    LengthFilter,
+    RewardModel,
+    RewardPipeline,
+    RewardStream,
+    default_pipeline,
+    score_stream,
+)
+
+
+class CountingBlob:
+    """Stands in for TextBlob, counting how often a completion gets preprocessed."""
+
+    created = 0
+
+    def __init__(self, text):
+        CountingBlob.created += 1
+        self.sentences = text.split(".")
+        self.words = text.split()
+
+
+class WordCountReward(RewardModel):
+    name = "word_count"
+    requires = ("words",)
+
+    def __init__(self, weight=1.0):
+        super().__init__(weight)
+        self.calls = 0
+
+    def reward(self, completion):
+        self.calls += 1
+        return min(len(completion.words) / 10, 1.0)
+
+
+class SentenceReward(RewardModel):
+    name = "sentences"
+    requires = ("sentences", "words")
+
+    def reward(self, completion):
+        return 1.0 if len(completion.sentences) > 1 else 0.0
+
+
+@pytest.fixture(autouse=True)
+def counting_blob(monkeypatch):
+    CountingBlob.created = 0
+    monkeypatch.setattr("textblob.TextBlob", CountingBlob)
+
+
+def build(**kwargs):
+    word_count = WordCountReward(weight=3.0)
+    pipeline = RewardPipeline(
+        filters=[EmptyFilter(), LengthFilter(max_chars=50), ErrorFilter()],
+        models=[word_count, SentenceReward(weight=1.0)],
+        **kwargs,
+    )
+    return pipeline, word_count
+
+
+def test_filters_skip_expensive_stages():
+    pipeline, word_count = build()
+    completions = [
+        "",
+        "   ",
+        "x" * 51,
+        "Error: connection reset",
+        "  Error: boom",
+    ]
+
+    assert pipeline.score(0, completions) == [0.0] * 5
+    assert word_count.calls == 0
+    assert CountingBlob.created == 0
+
+
+def test_weighted_mean_with_shared_preprocessing():
+    pipeline, word_count = build()
+    rewards = pipeline.score(0, ["one two. three four five", "a b"])
+
+    assert rewards[0] == pytest.approx((3 * 0.5 + 1 * 1.0) / 4)
+    assert rewards[1] == pytest.approx((3 * 0.2 + 0) / 4)
+    # Both models read words and sentences, each completion is still preprocessed once.
+    assert CountingBlob.created == 2
+    assert pipeline("seven", "a b") == rewards[1]
+
+
+def test_stage_timings():
+    pipeline, _ = build(filtered_reward=-1.0)
+    timings = {}
+    rewards = pipeline.score(0, ["", "Error: x", "fine words here"], timings)
+
+    assert rewards[:2] == [-1.0, -1.0]
+    assert timings["empty"]["calls"] == 3 and timings["empty"]["rejected"] == 1
+    assert (
+        timings["oversized"]["calls"] == 2
+        and timings["oversized"]["rejected"] == 0
+    )
+    assert timings["error"]["calls"] == 2 and timings["error"]["rejected"] == 1
+    assert timings["preprocess"]["calls"] == 1
+    assert timings["word_count"]["calls"] == timings["sentences"]["calls"] == 1
+    assert all(timing["seconds"] >= 0 for timing in timings.values())
+
+
+def test_lexicon_sentiment_pipeline():
+    pipeline = default_pipeline(sentiment="lexicon")
+    rewards = pipeline.score(0, ["", "Error: boom", "What a lovely day!"])
+
+    assert rewards[:2] == [0.0, 0.0]
+    assert 0.5 < rewards[2] <= 1.0
+    with pytest.raises(ValueError):
+        default_pipeline(sentiment="unknown")
+
+
+def test_streamed_completion_scores_like_batch():
+    pipeline, _ = build()
+    for text in ["one two. three four five", "", "Error: boom", "x" * 51]:
+        scored = pipeline.stream(0)
+        for i in range(0, len(text), 3):
+            scored.feed(text[i : i + 3])
+        assert scored.text == text
+        assert scored.close() == pipeline.score(0, [text])[0]
+
+
+def test_score_stream_with_streaming_model():
+    pipeline = default_pipeline(sentiment="lexicon")
+    text = "What a lovely day! The movie was not very good, honestly.\n\nFine."
+
+    async def tokens():
+        # Token lists as StreamPrompting.process_streaming_response yields them.
+        for i in range(0, len(text), 5):
+            yield [text[i : i + 5], ""]
+            await asyncio.sleep(0)
+
+    timings = {}
+    reward = asyncio.run(score_stream(pipeline, 0, tokens(), timings))
+    assert reward == pipeline.score(0, [text])[0]
+    assert timings["lexicon_sentiment"]["calls"] == 1
+    assert isinstance(pipeline.models[0].stream(), RewardStream)
@@ -0,0 +1,115 @@
+import pytest
+import torch
+
+from prompting.validator.history import RewardHistory
+from prompting.validator.sampling import (
+    BanditSampler,
+    RoundRobinSampler,
+    ThompsonSampler,
+    UCBSampler,
+    UniformSampler,
+    build_sampler,
+)
+
+
+def trained_history(n=20):
+    history = RewardHistory(n, window=8)
+    for _ in range(8):
+        history.push(torch.arange(n), torch.linspace(0, 1, n))
+    return history
+
+
+@pytest.mark.parametrize(
+    "sampler", [UniformSampler(), UCBSampler(), ThompsonSampler()]
+)
+def test_samples_distinct_candidates(sampler):
+    history = trained_history()
+    candidates = torch.arange(0, 20, 2)
+    uids = sampler.sample(candidates, 5, history)
+    assert len(uids) == len(set(uids.tolist())) == 5
+    assert set(uids.tolist()) <= set(candidates.tolist())
+
+
+def test_ucb_queries_unsampled_uids_first():
+    history = trained_history()
+    history.reset([3, 7])
+    uids = UCBSampler(exploration=0).sample(torch.arange(20), 2, history)
+    assert set(uids.tolist()) == {3, 7}
+
+
+@pytest.mark.parametrize(
+    "sampler", [UCBSampler(exploration=0), ThompsonSampler(exploration=0)]
+)
+def test_bandits_prefer_high_rewards(sampler):
+    history = trained_history()
+    counts = torch.zeros(20)
+    for _ in range(50):
+        counts[sampler.sample(torch.arange(20), 4, history)] += 1
+    assert counts[16:].sum() > counts[:4].sum()
+
+
+def test_exploration_floor_reaches_every_uid():
+    history = trained_history()
+    sampler = UCBSampler(exploration=0.25)
+    seen = set()
+    for _ in range(200):
+        seen.update(sampler.sample(torch.arange(20), 4, history).tolist())
+    assert seen == set(range(20))
+
+
+def test_build_sampler():
+    assert isinstance(
+        build_sampler("thompson", exploration=0.2), ThompsonSampler
+    )
+    with pytest.raises(ValueError):
+        build_sampler("greedy")
+
+    # Strategies define how they sample, bandits how they rank.
+    class Greedy(BanditSampler):
+        pass
+
+    with pytest.raises(TypeError):
+        Greedy()
+
+
+def test_round_robin_batches_are_disjoint_and_cover_all_uids():
+    sampler = RoundRobinSampler(max_in_flight=1)
+    candidates = torch.arange(0, 30)
+    batches = [sampler.sample(candidates, 7, None) for _ in range(4)]
+
+    seen = torch.cat(batches).tolist()
+    assert len(seen) == len(set(seen)) == 28
+    # Nothing is released yet, so only 2 uids below the in-flight cap are left.
+    assert len(sampler.sample(candidates, 7, None)) == 2
+
+
+def test_round_robin_defers_capped_uids():
+    sampler = RoundRobinSampler(max_in_flight=1)
+    candidates = torch.arange(10)
+    first = sampler.sample(candidates, 5, None)
+    second = sampler.sample(candidates, 5, None)
+    assert set(first.tolist()) | set(second.tolist()) == set(range(10))
+
+    # A new pass starts while the first batch is still in flight: released uids come back first.
+    sampler.release(second)
+    sampler.sample(candidates, 5, None)
+    sampler.release(first)
+    assert set(sampler.sample(candidates, 5, None).tolist()) == set(
+        first.tolist()
+    )
+
+
+def test_round_robin_keeps_its_pass_across_resyncs():
+    sampler = RoundRobinSampler()
+    first = sampler.sample(torch.arange(8), 3, None)
+    sampler.release(first)
+    sampler.resize(8)
+    assert sampler.cursor == 3
+
+    # New uids join the rest of the pass, which still reaches every uid once.
+    sampler.resize(12)
+    assert sorted(sampler.order.tolist()) == list(range(12))
+    assert sampler.order[:3].tolist() == first.tolist()
+    rest = sampler.sample(torch.arange(12), 9, None)
+    assert sorted(first.tolist() + rest.tolist()) == list(range(12))
+    assert sampler.passes == 1
@@ -0,0 +1,68 @@
+import asyncio
+import random
+
+from prompting.base.scheduler import ForwardScheduler
+
+
+def test_scheduler_keeps_window_full():
+    in_flight = 0
+    peak = 0
+
+    async def forward():
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(random.uniform(0.001, 0.02))
+        in_flight -= 1
+
+    scheduler = ForwardScheduler(forward, concurrency=4)
+    asyncio.run(scheduler.run(max_forwards=40))
+
+    assert peak == 4
+    assert scheduler.started == 40
+    assert scheduler.completed == 40
+    assert scheduler.queue_depth == 0
+
+
+def test_scheduler_does_not_wait_for_slowest_forward():
+    durations = iter([0.3] + [0.01] * 20)
+
+    async def forward():
+        await asyncio.sleep(next(durations))
+
+    scheduler = ForwardScheduler(forward, concurrency=2)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await scheduler.run(max_forwards=21)
+        return loop.time() - start
+
+    # The 20 fast forwards complete in the second slot while the slow one is in flight.
+    assert asyncio.run(run()) < 0.45
+
+
+def test_scheduler_target_rate():
+    async def forward():
+        pass
+
+    scheduler = ForwardScheduler(forward, concurrency=8, target_rate=50)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await scheduler.run(max_forwards=10)
+        return loop.time() - start
+
+    elapsed = asyncio.run(run())
+    assert 0.15 <= elapsed < 0.4
+
+
+def test_scheduler_counts_failures():
+    async def forward():
+        raise RuntimeError("boom")
+
+    scheduler = ForwardScheduler(forward, concurrency=2)
+    asyncio.run(scheduler.run(max_forwards=3))
+    assert scheduler.failed == 3
+    assert scheduler.completed == 0
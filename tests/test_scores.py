@@ -0,0 +1,53 @@
+import torch
+
+from prompting.validator.scores import ScoreEngine
+
+
+def test_update_touches_only_scored_uids():
+    engine = ScoreEngine(8, alpha=0.5)
+    scores = engine.scores
+    engine.update(torch.FloatTensor([1.0, 0.5]), [2, 5])
+
+    # Updated in place.
+    assert engine.scores is scores
+    assert torch.allclose(
+        engine.scores, torch.FloatTensor([0, 0, 0.5, 0, 0, 0.25, 0, 0])
+    )
+
+
+def test_duplicate_uids_mean():
+    engine = ScoreEngine(4, alpha=1.0, duplicate_policy="mean")
+    engine.update(torch.FloatTensor([1.0, 0.0, 0.5]), [1, 1, 3])
+    assert torch.allclose(engine.scores, torch.FloatTensor([0, 0.5, 0, 0.5]))
+
+
+def test_duplicate_uids_last_wins():
+    engine = ScoreEngine(4, alpha=1.0, duplicate_policy="last")
+    engine.update(torch.FloatTensor([1.0, 0.2, 0.5]), [1, 1, 3])
+    assert torch.allclose(engine.scores, torch.FloatTensor([0, 0.2, 0, 0.5]))
+
+
+def test_batched_commit():
+    engine = ScoreEngine(4, alpha=1.0)
+    engine.submit(torch.FloatTensor([1.0]), [0])
+    engine.submit(torch.FloatTensor([0.0, 1.0]), [0, 2])
+    engine.commit()
+    assert torch.allclose(engine.scores, torch.FloatTensor([0.5, 0, 1.0, 0]))
+
+
+def test_time_decay():
+    engine = ScoreEngine(2, alpha=1.0, half_life=10)
+    engine.update(torch.FloatTensor([1.0, 1.0]), [0, 1], now=100)
+    engine.update(torch.FloatTensor([1.0]), [1], now=110)
+
+    current = engine.current(now=110)
+    assert torch.allclose(current, torch.FloatTensor([0.5, 1.0]))
+    assert engine.last_scored[1] == 110
+
+
+def test_resize_and_reset():
+    engine = ScoreEngine(2, alpha=1.0)
+    engine.update(torch.FloatTensor([1.0, 1.0]), [0, 1])
+    engine.resize(4)
+    engine.reset([1])
+    assert torch.allclose(engine.scores, torch.FloatTensor([1.0, 0, 0, 0]))
@@ -0,0 +1,128 @@
+import sys
+import random
+import subprocess
+
+import pytest
+
+from prompting.validator.sentiment import (
+    LexiconSentiment,
+    SentimentStream,
+    find_sentences,
+)
+
+SENTENCES = [
+    "What a lovely day!",
+    "This is not a very good movie!",
+    "I really don't like it, it's terribly boring.",
+    "The weather is sunny and warm outside :)",
+    "Never a dull moment, truly amazing!!",
+    "Oh great, another meeting (!)",
+    "The U.S. economy grew by 2 percent.",
+    "It is neither good nor bad, just okay.",
+    "Why did the computer go to the doctor? Because it had a virus!",
+    "",
+]
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return LexiconSentiment()
+
+
+def test_matches_textblob_polarity(scorer):
+    textblob = pytest.importorskip("textblob")
+
+    for sentence in SENTENCES:
+        expected = textblob.TextBlob(sentence).sentiment.polarity
+        assert scorer.polarity(sentence) == pytest.approx(expected, abs=1e-9)
+
+
+def test_splits_sentences_like_pattern():
+    sentences = find_sentences(
+        "Hello Mr. Smith. It's good!\n\nNo doubt... really? Yes"
+    )
+    assert sentences == [
+        ["hello", "mr.", "smith", "."],
+        ["it", "'", "s", "good", "!"],
+        ["no", "doubt", "..."],
+        ["really", "?"],
+        ["yes"],
+    ]
+
+
+def test_batch_score_is_normalized_sentence_mean(scorer):
+    responses = ["Good. Bad.", "What a lovely day!", ""]
+    rewards = scorer.score(responses)
+
+    good, bad = scorer.polarity("Good."), scorer.polarity("Bad.")
+    assert rewards[0] == pytest.approx(((good + bad) / 2 + 1) / 2)
+    assert rewards[1] == pytest.approx(
+        (scorer.polarity("What a lovely day!") + 1) / 2
+    )
+    assert rewards[2] == 0.5
+    assert len(scorer.score([])) == 0
+
+
+def chunked(text, rng):
+    cuts = sorted(
+        rng.sample(
+            range(len(text) + 1), min(len(text) + 1, rng.randint(0, 12))
+        )
+    )
+    return [
+        text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])
+    ]
+
+
+def test_stream_reward_is_identical_to_batch(scorer):
+    rng = random.Random(0)
+    pieces = SENTENCES + [
+        "Mr.",
+        "e.g.",
+        "...",
+        "\n",
+        "\n\n",
+        '"',
+        "'",
+        ")",
+        ": )",
+        "don't",
+        " ",
+        "!!",
+    ]
+    for _ in range(500):
+        text = " ".join(rng.choice(pieces) for _ in range(rng.randint(0, 8)))
+        stream = SentimentStream(scorer)
+        for chunk in chunked(text, rng):
+            stream.feed(chunk)
+        assert stream.close() == scorer.score([text])[0], text
+
+
+def test_stream_scores_sentences_as_they_complete(scorer):
+    stream = SentimentStream(scorer)
+    stream.feed("What a lovely day! It is terr")
+    # A sentence is only complete once the first word after it is, the rest is still pending.
+    assert stream.sentences == 1
+    stream.feed("ible.\n\n")
+    assert stream.sentences == 1
+    stream.feed("\nFine ")
+    assert stream.sentences == 2
+    assert (
+        stream.close()
+        == scorer.score(["What a lovely day! It is terrible.\n\n\nFine "])[0]
+    )
+    assert SentimentStream(scorer).close() == 0.5
+
+
+def test_does_not_import_textblob():
+    code = (
+        "import sys; from prompting.validator.sentiment import LexiconSentiment; "
+        "LexiconSentiment().score(['Fine.']); print('textblob' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "False"
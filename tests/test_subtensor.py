@@ -0,0 +1,194 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from prompting.base.neuron import BaseNeuron
+from prompting.mock import MockSubtensor
+from prompting.utils.metrics import LoopLagMonitor
+from prompting.utils.subtensor import AsyncSubtensor, CachingSubtensor
+
+
+pytestmark = pytest.mark.usefixtures("fresh_mock_chain")
+
+
+def measure_lag(chain_call):
+    """Runs `chain_call` on the loop next to a lag monitor and returns the max observed lag."""
+    monitor = LoopLagMonitor(interval=0.01)
+
+    async def run():
+        task = asyncio.create_task(monitor.monitor())
+        await asyncio.sleep(0.05)
+        await chain_call()
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(run())
+    return monitor.max
+
+
+def test_blocking_chain_call_lags_loop():
+    subtensor = MockSubtensor(netuid=1, n=2, delay=0.2)
+
+    async def call():
+        subtensor.get_current_block()
+
+    assert measure_lag(call) >= 0.15
+
+
+def test_async_chain_call_does_not_lag_loop():
+    subtensor = MockSubtensor(netuid=1, n=2, delay=0.2)
+    chain = AsyncSubtensor(subtensor)
+
+    async def call():
+        await chain.acall(subtensor.get_current_block)
+
+    assert measure_lag(call) < 0.1
+    assert chain.calls == 1
+
+
+def test_chain_call_timeout():
+    subtensor = MockSubtensor(netuid=1, n=2, delay=0.5)
+    chain = AsyncSubtensor(subtensor, timeout=0.05)
+
+    start = time.time()
+    with pytest.raises(TimeoutError):
+        chain.call(subtensor.get_current_block)
+    assert time.time() - start < 0.3
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(chain.acall(subtensor.get_current_block))
+    assert chain.timeouts == 2
+
+    # An explicit zero timeout does not wait at all, rather than falling back to the default.
+    start = time.time()
+    with pytest.raises(TimeoutError):
+        chain.call(time.sleep, 0.2, timeout=0)
+    assert time.time() - start < 0.1
+
+
+class SlowChainNeuron:
+    """Neuron whose metagraph resync hits a chain timeout."""
+
+    def __init__(self):
+        self.calls = []
+
+    def check_registered(self):
+        self.calls.append("check_registered")
+
+    def should_sync_metagraph(self):
+        return True
+
+    def resync_metagraph(self):
+        raise TimeoutError("Chain call build_metagraph timed out after 60s")
+
+    def should_set_weights(self):
+        return True
+
+    def set_weights(self):
+        self.calls.append("set_weights")
+
+    def save_state(self):
+        self.calls.append("save_state")
+
+
+def test_sync_skips_on_chain_timeout():
+    neuron = SlowChainNeuron()
+    BaseNeuron.sync(neuron)
+    assert neuron.calls == ["check_registered", "save_state"]
+
+
+class CountingSubtensor:
+    """Records the calls that reach the chain."""
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.block = 100
+        self.calls = []
+
+    def _call(self, name, value):
+        self.calls.append(name)
+        time.sleep(self.delay)
+        return value
+
+    def get_current_block(self):
+        return self._call("get_current_block", self.block)
+
+    def min_allowed_weights(self, netuid):
+        return self._call("min_allowed_weights", 8)
+
+    def is_hotkey_registered(self, hotkey_ss58, netuid=None, block=None):
+        return self._call("is_hotkey_registered", True)
+
+    def neurons_lite(self, netuid):
+        return self._call("neurons_lite", [])
+
+
+class Metagraph:
+    netuid = 1
+    n = 2
+    hotkeys = ["hotkey-0", "hotkey-1"]
+
+
+def test_answers_from_metagraph():
+    subtensor = CountingSubtensor()
+    proxy = CachingSubtensor(subtensor, metagraph_fn=lambda: Metagraph())
+
+    assert proxy.is_hotkey_registered(netuid=1, hotkey_ss58="hotkey-1")
+    assert not proxy.is_hotkey_registered(netuid=1, hotkey_ss58="hotkey-2")
+    assert proxy.subnetwork_n(netuid=1) == 2
+    assert subtensor.calls == []
+
+    # Other subnets still go to the chain.
+    assert proxy.is_hotkey_registered(netuid=2, hotkey_ss58="hotkey-1")
+    assert subtensor.calls == ["is_hotkey_registered"]
+    assert proxy.stats()["is_hotkey_registered"]["hits"] == 2
+
+
+def test_caches_block_and_hyperparameters():
+    subtensor = CountingSubtensor()
+    proxy = CachingSubtensor(subtensor, block_ttl=0.05)
+
+    assert [proxy.get_current_block() for _ in range(3)] == [100] * 3
+    assert proxy.min_allowed_weights(netuid=1) == 8
+    assert proxy.min_allowed_weights(netuid=1) == 8
+    assert subtensor.calls == ["get_current_block", "min_allowed_weights"]
+
+    time.sleep(0.06)
+    proxy.get_current_block()
+    assert subtensor.calls.count("get_current_block") == 2
+
+    # Everything else passes through and is accounted for.
+    proxy.neurons_lite(netuid=1)
+    stats = proxy.stats()
+    assert stats["neurons_lite"]["rpc_calls"] == 1
+    assert stats["get_current_block"]["hits"] == 2
+    assert sum(stats["get_current_block"]["latency"].values()) == 2
+
+    # The latest block always goes to the chain, and refreshes the cached one.
+    subtensor.block = 101
+    assert proxy.latest_block() == 101
+    assert proxy.get_current_block() == 101
+    assert subtensor.calls.count("get_current_block") == 3
+
+
+def test_coalesces_concurrent_misses():
+    subtensor = CountingSubtensor(delay=0.1)
+    proxy = CachingSubtensor(subtensor)
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(proxy.get_current_block())
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [100] * 8
+    assert subtensor.calls == ["get_current_block"]
+    assert proxy.stats()["get_current_block"]["coalesced"] == 7
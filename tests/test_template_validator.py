@@ -73,7 +73,9 @@ class TemplateValidatorNeuronTestCase(unittest.TestCase):
 
         # Interacting with the LLM
         prompting.add_message("Tell me a joke.")
-        prompting.update_completion("Why did the computer go to the doctor? Because it had a virus!")
+        prompting.update_completion(
+            "Why did the computer go to the doctor? Because it had a virus!"
+        )
 
         responses = self.neuron.dendrite.query(
             # Send the query to miners in the network.
@@ -99,7 +101,9 @@ class TemplateValidatorNeuronTestCase(unittest.TestCase):
 
         # Interacting with the LLM
         prompting.add_message("Tell me a joke.")
-        prompting.update_completion("Why did the computer go to the doctor? Because it had a virus!")
+        prompting.update_completion(
+            "Why did the computer go to the doctor? Because it had a virus!"
+        )
 
         # TODO: Test that the reward function returns the correct value
         responses = self.dendrite.query(
@@ -125,7 +129,9 @@ class TemplateValidatorNeuronTestCase(unittest.TestCase):
 
         # Interacting with the LLM
         prompting.add_message("Tell me a joke.")
-        prompting.update_completion("Why did the computer go to the doctor? Because it had a virus!")
+        prompting.update_completion(
+            "Why did the computer go to the doctor? Because it had a virus!"
+        )
 
         # TODO: Test that NaN rewards are correctly sanitized
         # TODO: Test that a bt.logging.warning is thrown when a NaN reward is sanitized
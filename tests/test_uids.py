@@ -0,0 +1,115 @@
+from collections import Counter
+
+import torch
+
+from prompting.utils.uids import (
+    availability_mask,
+    check_uid_availability,
+    get_random_uids,
+)
+from prompting.validator.health import MinerHealth
+
+
+class Axon:
+    def __init__(self, is_serving):
+        self.is_serving = is_serving
+
+
+class Metagraph:
+    def __init__(self, n, seed=0):
+        generator = torch.Generator().manual_seed(seed)
+        self.n = torch.tensor(n)
+        self.axons = [
+            Axon(bool(serving))
+            for serving in torch.rand(n, generator=generator) > 0.2
+        ]
+        self.validator_permit = torch.rand(n, generator=generator) > 0.7
+        self.S = torch.rand(n, generator=generator) * 2048
+
+
+class Config:
+    class neuron:
+        vpermit_tao_limit = 1024
+
+
+class Validator:
+    def __init__(self, metagraph):
+        self.metagraph = metagraph
+        self.config = Config
+
+
+def test_mask_matches_check_uid_availability():
+    metagraph = Metagraph(256)
+    mask = availability_mask(metagraph, 1024)
+    expected = [
+        check_uid_availability(metagraph, uid, 1024) for uid in range(256)
+    ]
+    assert mask.tolist() == expected
+    # Computed once per snapshot.
+    assert availability_mask(metagraph, 1024) is mask
+
+
+def test_sample_respects_availability_and_exclude():
+    validator = Validator(Metagraph(64))
+    available = set(
+        availability_mask(validator.metagraph, 1024)
+        .nonzero()
+        .flatten()
+        .tolist()
+    )
+    exclude = sorted(available)[:10]
+
+    uids = get_random_uids(validator, k=8, exclude=exclude)
+    assert len(set(uids.tolist())) == 8
+    assert set(uids.tolist()) <= available - set(exclude)
+
+    # Excluded uids may come as a tensor, e.g. the uids of the previous forward.
+    uids = get_random_uids(validator, k=8, exclude=torch.tensor(exclude))
+    assert set(uids.tolist()) <= available - set(exclude)
+
+    # Not enough candidates: every candidate is used and the rest comes from excluded available uids.
+    uids = set(
+        get_random_uids(
+            validator, k=len(available) - 5, exclude=exclude
+        ).tolist()
+    )
+    assert available - set(exclude) <= uids <= available
+
+
+def test_sample_is_uniform():
+    validator = Validator(Metagraph(32))
+    available = (
+        availability_mask(validator.metagraph, 1024)
+        .nonzero()
+        .flatten()
+        .tolist()
+    )
+    counts = Counter()
+    draws = 4000
+    for _ in range(draws):
+        counts.update(get_random_uids(validator, k=4).tolist())
+
+    expected = draws * 4 / len(available)
+    assert set(counts) == set(available)
+    assert all(
+        abs(count - expected) < 0.15 * expected for count in counts.values()
+    )
+
+
+def test_skips_open_circuits():
+    validator = Validator(Metagraph(32))
+    available = (
+        availability_mask(validator.metagraph, 1024)
+        .nonzero()
+        .flatten()
+        .tolist()
+    )
+    validator.health = MinerHealth(32, failure_threshold=1, cooldown=3600)
+    dead = available[:-3]
+    validator.health.observe(
+        dead, [12.0] * len(dead), successes=[False] * len(dead)
+    )
+
+    # Only 3 healthy miners are left, so fewer than k are returned.
+    uids = get_random_uids(validator, k=8)
+    assert sorted(uids.tolist()) == sorted(available[-3:])
@@ -0,0 +1,90 @@
+import torch
+import bittensor as bt
+
+from prompting.validator.weights import (
+    SubnetHyperparameters,
+    convert_weights_and_uids_for_emit,
+    normalize_max_weight,
+    process_weights,
+)
+
+
+class LimitsSubtensor:
+    """Answers the two hyperparameter queries of `process_weights_for_netuid` without a chain."""
+
+    def __init__(self, min_allowed_weights, max_weight_limit):
+        self._min_allowed_weights = min_allowed_weights
+        self._max_weight_limit = max_weight_limit
+
+    def min_allowed_weights(self, netuid):
+        return self._min_allowed_weights
+
+    def max_weight_limit(self, netuid):
+        return self._max_weight_limit
+
+
+class Metagraph:
+    def __init__(self, n):
+        self.n = torch.tensor(n)
+
+
+def random_weights(n, zero_fraction, skew):
+    weights = torch.rand(n) ** skew
+    weights[torch.rand(n) < zero_fraction] = 0
+    return torch.nn.functional.normalize(weights, p=1, dim=0)
+
+
+def test_normalize_max_weight_matches_library():
+    torch.manual_seed(0)
+    for n in (4, 64, 1024):
+        for limit in (0.01, 0.1, 0.5):
+            x = random_weights(n, zero_fraction=0.2, skew=8)
+            expected = bt.utils.weight_utils.normalize_max_weight(
+                x, limit=limit
+            )
+            assert torch.equal(normalize_max_weight(x, limit=limit), expected)
+
+
+def test_pipeline_is_bit_identical_to_library():
+    torch.manual_seed(0)
+    cases = [
+        # n, min_allowed_weights, max_weight_limit, zero_fraction
+        (256, 8, 0.1, 0.5),
+        (256, 8, 0.05, 0.0),
+        (256, 64, 0.1, 0.9),  # Fewer non-zero weights than allowed.
+        (256, 512, 0.1, 0.5),  # Subnet smaller than min_allowed_weights.
+        (256, 8, 0.1, 1.0),  # All zero.
+        (4096, 1024, 0.01, 0.3),
+    ]
+    for n, min_allowed_weights, max_weight_limit, zero_fraction in cases:
+        uids = torch.arange(n)
+        weights = random_weights(n, zero_fraction, skew=4)
+        hyperparameters = SubnetHyperparameters(
+            min_allowed_weights, max_weight_limit, n
+        )
+
+        expected = bt.utils.weight_utils.process_weights_for_netuid(
+            uids=uids,
+            weights=weights,
+            netuid=1,
+            subtensor=LimitsSubtensor(min_allowed_weights, max_weight_limit),
+            metagraph=Metagraph(n),
+        )
+        processed = process_weights(uids, weights, hyperparameters)
+        assert torch.equal(processed[0], expected[0])
+        assert torch.equal(processed[1], expected[1])
+
+        assert convert_weights_and_uids_for_emit(
+            *processed
+        ) == bt.utils.weight_utils.convert_weights_and_uids_for_emit(*expected)
+
+
+def test_convert_filters_zeros_and_upscales():
+    uids, weights = convert_weights_and_uids_for_emit(
+        torch.LongTensor([0, 1, 2]), torch.FloatTensor([0.5, 0.0, 0.25])
+    )
+    assert uids == [0, 2]
+    assert weights == [65535, 32768]
+    assert convert_weights_and_uids_for_emit(
+        torch.LongTensor([0, 1]), torch.zeros(2)
+    ) == ([], [])